@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+games.ts加载性能基准 - 对比旧的逐字符拼接+逐字段正则 与 单遍分词器 的加载耗时
+
+用法：
+  python benchmark_games_loading.py                          # 1k / 5k / 10k / 50k 个游戏
+  python benchmark_games_loading.py --sizes 1000 100000
+  python benchmark_games_loading.py --skip-legacy            # 只测新实现
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+
+# 基准测试不需要代理检测
+os.environ.setdefault('USE_PROXY', 'false')
+
+import game_manager
+from game_manager import GameManager
+
+
+def generate_games(count: int):
+    """生成与爬虫产出格式一致的游戏数据"""
+    games = []
+    for i in range(count):
+        games.append({
+            'id': f'basic_itch.io_html5_{1749135000 + i}_{i}',
+            'title': f'Generated Game {i}',
+            'description': '来自itch.io HTML5的HTML5游戏',
+            'category': '休闲',
+            'categoryId': str(i % 8 + 1),
+            'thumbnail': '/games/thumbnails/default.jpg',
+            'path': f'/games/basic_itch.io_html5_{1749135000 + i}_{i}',
+            'featured': i % 50 == 0,
+            'type': 'iframe',
+            'iframeUrl': f'https://html-classic.itch.zone/html/{10000000 + i}/index.html',
+            'addedAt': '2025-06-05',
+            'tags': ['HTML5', '在线', 'itch.io HTML5']
+        })
+    return games
+
+
+def legacy_load(content: str):
+    """旧实现：逐字符拼接对象字符串，再对每个对象执行13次正则"""
+    start_idx = content.find('export const games: Game[] = [') + len('export const games: Game[] = [')
+    end_idx = content.find('];', start_idx)
+    games_str = content[start_idx:end_idx]
+
+    objects = []
+    brace_count = 0
+    current_obj = ""
+    in_object = False
+    for char in games_str:
+        if char == '{':
+            if brace_count == 0:
+                in_object = True
+                current_obj = ""
+            brace_count += 1
+        if in_object:
+            current_obj += char
+        if char == '}':
+            brace_count -= 1
+            if brace_count == 0 and in_object:
+                objects.append(current_obj)
+                in_object = False
+
+    fields = ['id', 'title', 'description', 'category', 'categoryId', 'thumbnail', 'path',
+              'type', 'iframeUrl', 'staticPath', 'addedAt']
+    games = []
+    for obj_str in objects:
+        game = {}
+        for field in fields:
+            match = re.search(field + r":\s*['\"]([^'\"]+)['\"]", obj_str)
+            if match:
+                game[field] = match.group(1)
+        match = re.search(r"featured:\s*(true|false)", obj_str)
+        if match:
+            game['featured'] = match.group(1) == 'true'
+        tags_match = re.search(r'tags:\s*\[(.*?)\]', obj_str, re.DOTALL)
+        if tags_match:
+            game['tags'] = [tag.strip(' "\'') for tag in tags_match.group(1).split(',') if tag.strip(' "\'')]
+        if 'id' in game and 'title' in game:
+            games.append(game)
+    return games
+
+
+def time_load(label: str, load, repeat: int):
+    """返回平均耗时（毫秒）和加载的游戏数"""
+    count = 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        count = len(load())
+    elapsed_ms = (time.perf_counter() - started) * 1000 / repeat
+    print(f"    {label:<24} {elapsed_ms:>9.1f} ms   ({count} 个游戏)")
+    return elapsed_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description='games.ts加载性能基准')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 10000, 50000],
+                        help='生成的游戏数量')
+    parser.add_argument('--repeat', type=int, default=3, help='每个规模的重复次数')
+    parser.add_argument('--skip-legacy', action='store_true', help='不测旧实现')
+    args = parser.parse_args()
+
+    with open(game_manager.GAMES_DATA_FILE, 'r', encoding='utf-8') as f:
+        template = f.read()
+
+    manager = GameManager()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        game_manager.GAMES_DATA_FILE = os.path.join(tmp_dir, 'games.ts')
+
+        for size in args.sizes:
+            games = generate_games(size)
+            content = manager._rewrite_games_content(template, games)
+            with open(game_manager.GAMES_DATA_FILE, 'w', encoding='utf-8') as f:
+                f.write(content)
+            print(f"📄 {size} 个游戏，{len(content) / 1024 / 1024:.1f} MB")
+
+            new = time_load('单遍分词器（新）', manager.read_games_ts, args.repeat)
+            if not args.skip_legacy:
+                old = time_load('逐字符+正则（旧）', lambda: legacy_load(content), args.repeat)
+                print(f"    ⚡ 提速 {old / new:.1f}x")
+            print(f"    每千个游戏 {new / size * 1000:.1f} ms\n")
+
+    return 0
+
+
+if __name__ == '__main__':
+    game_manager.logger.setLevel('WARNING')
+    sys.exit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTML解析性能基准 - 对比 html.parser / lxml / lxml局部解析 的单页解析耗时
+
+用法：
+  python benchmark_html_parsing.py                    # 使用生成的大型详情页（约1MB）
+  python benchmark_html_parsing.py page1.html page2.html
+  python benchmark_html_parsing.py --repeat 10 --size-kb 2048
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+# 基准测试不需要代理检测
+os.environ.setdefault('USE_PROXY', 'false')
+
+from bs4 import BeautifulSoup
+
+import game_manager
+from game_manager import IFRAME_CANDIDATE_STRAINER, Config, parse_html
+
+
+def generate_detail_page(size_kb: int) -> str:
+    """生成类似GameJolt详情页的大页面：大量评论、推荐、脚本，中间夹着一个游戏iframe"""
+    rng = random.Random(42)
+    blocks = []
+    total = 0
+    i = 0
+    while total < size_kb * 1024:
+        block = (
+            f'<div class="comment-card" id="comment-{i}">'
+            f'<img src="/avatars/{i}.png" alt="user {i}">'
+            f'<p class="comment-body">{"lorem ipsum " * rng.randint(5, 30)}</p>'
+            f'<ul class="tags"><li>tag{i % 7}</li><li>tag{i % 11}</li></ul>'
+            f'<a href="/games/recommended-{i}/{1000 + i}" class="recommend">Recommended {i}</a>'
+            f'<script>window.__state_{i} = {{"likes": {rng.randint(0, 999)}}};</script>'
+            '</div>'
+        )
+        blocks.append(block)
+        total += len(block)
+        i += 1
+        if i == 200:
+            blocks.append('<div class="game-embed-wrapper"><iframe class="game-frame" '
+                          'src="https://html-classic.itch.zone/html/123/index.html" '
+                          'width="960" height="600"></iframe></div>')
+    return f'<!DOCTYPE html><html><head><title>Game</title></head><body>{"".join(blocks)}</body></html>'
+
+
+def time_parse(label: str, pages, repeat: int, parse):
+    """返回每页平均耗时（毫秒）和找到的iframe数量"""
+    iframe_count = 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages:
+            soup = parse(html)
+            iframe_count = len(soup.select('iframe[src]'))
+    elapsed_ms = (time.perf_counter() - started) * 1000 / (repeat * len(pages))
+    print(f"  {label:<28} {elapsed_ms:>9.1f} ms/页   (iframe: {iframe_count})")
+    return elapsed_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTML解析性能基准')
+    parser.add_argument('files', nargs='*', help='要解析的HTML文件（默认使用生成的详情页）')
+    parser.add_argument('--repeat', type=int, default=5, help='每个页面的重复解析次数')
+    parser.add_argument('--size-kb', type=int, default=1024, help='生成页面的大小（KB）')
+    args = parser.parse_args()
+
+    if args.files:
+        pages = []
+        for path in args.files:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                pages.append(f.read())
+    else:
+        pages = [generate_detail_page(args.size_kb)]
+
+    avg_kb = sum(len(p) for p in pages) / len(pages) / 1024
+    print(f"📄 {len(pages)} 个页面，平均 {avg_kb:.0f} KB，每页重复 {args.repeat} 次\n")
+
+    baseline = time_parse('html.parser 完整解析（旧）', pages, args.repeat,
+                          lambda html: BeautifulSoup(html, 'html.parser'))
+
+    if not game_manager.LXML_AVAILABLE:
+        print("\n⚠️ lxml未安装，无法对比")
+        return 1
+
+    Config.HTML_PARSER = 'lxml'
+    Config.HTML_PARTIAL_PARSE = True
+    full = time_parse('lxml 完整解析', pages, args.repeat, parse_html)
+    partial = time_parse('lxml 局部解析（新）', pages, args.repeat,
+                         lambda html: parse_html(html, parse_only=IFRAME_CANDIDATE_STRAINER))
+
+    print(f"\n⚡ lxml完整解析提速 {baseline / full:.1f}x，局部解析提速 {baseline / partial:.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -30,22 +30,31 @@
 """
 
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import json
 import random
 import time
 import os
 import zipfile
-import shutil
+import gzip
 import logging
 import re
+import hashlib
+import io
+import sqlite3
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from urllib.parse import urljoin, urlparse
+from functools import lru_cache
 from datetime import datetime
-from typing import List, Dict, Optional, Any
+from email.utils import parsedate_to_datetime
+from typing import List, Dict, Optional, Any, Iterable, Set, Tuple
 import argparse
 from http.client import RemoteDisconnected
 from requests.exceptions import RequestException, ConnectionError, Timeout
-from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_exception_type
+from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_exception_type, RetryError
 
 # 尝试导入SerpAPI
 try:
@@ -55,9 +64,17 @@ except ImportError:
     SERPAPI_AVAILABLE = False
     print("⚠️ SerpAPI库未安装，将使用基础API调用")
 
+# 尝试导入lxml（更快的HTML解析器）
+try:
+    import lxml  # noqa: F401
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+    print("⚠️ lxml库未安装，HTML解析将使用较慢的 html.parser")
+
 # 尝试导入PIL（缩略图生成）
 try:
-    from PIL import Image, ImageDraw, ImageFont
+    from PIL import Image, ImageChops, ImageDraw, ImageFont, ImageOps
     PIL_AVAILABLE = True
 except ImportError:
     PIL_AVAILABLE = False
@@ -96,6 +113,18 @@ class Config:
     REQUEST_TIMEOUT = 15      # 📝 请求超时时间（秒）
     RETRY_ATTEMPTS = 3        # 📝 重试次数
     
+    # ⚡ 爬虫引擎配置
+    CRAWL_ENGINE = 'sync'          # 📝 'sync' 逐个爬取（默认），'async' 多平台并发爬取
+    ASYNC_MAX_WORKERS = 12         # 📝 异步引擎的工作线程数
+    ASYNC_DOMAIN_CONCURRENCY = 1   # 📝 每个域名同时进行的请求数（延迟仍按 PLATFORM_DELAYS 控制）
+    
+    # 📝 games.ts写入配置
+    INCREMENTAL_WRITE = True       # 📝 只改写变化的游戏对象（--full-rewrite 强制整体重写）
+    
+    # 🧩 HTML解析配置
+    HTML_PARSER = 'lxml'           # 📝 'lxml'（默认，最快）或 'html.parser'；lxml未安装时自动回退
+    HTML_PARTIAL_PARSE = True      # 📝 详情页只构建iframe提取需要的元素
+    
     # 🚦 特定平台延迟配置（避免429错误）
     PLATFORM_DELAYS = {
         'itch.io': (4.0, 8.0),
@@ -108,6 +137,17 @@ class Config:
         'default': (2.0, 5.0)
     }
     
+    # 🔁 429自适应退避配置
+    BACKOFF_BASE_DELAY = 30.0      # 📝 没有 Retry-After 时首次429的等待时间（秒）
+    BACKOFF_MAX_DELAY = 600.0      # 📝 单次等待上限（秒）
+    BACKOFF_MAX_PENALTY = 16.0     # 📝 降速倍数上限（请求间隔 × 倍数）
+    BACKOFF_RELAX_AFTER = 10       # 📝 连续成功多少次后降速倍数减半
+    
+    # 🪣 令牌桶突发容量（可连续发出的请求数，之后按 PLATFORM_DELAYS 的间隔补充）
+    PLATFORM_BURST = {
+        'default': 1
+    }
+    
     # 🔍 API配置
     SERPAPI_KEY = ""        # 📝 在这里设置你的SerpAPI密钥
     GOOGLE_API_KEY = ""     # 📝 在这里设置你的Google API密钥
@@ -115,9 +155,61 @@ class Config:
     
     # 📁 路径配置
     PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    GAMES_DATA_FILE = os.path.join(PROJECT_ROOT, 'src', 'data', 'games.ts')
+    GAMES_DATA_FILE = os.path.join(PROJECT_ROOT, 'src', 'data', 'games.ts')    # 由games.json生成
+    GAMES_JSON_FILE = os.path.join(PROJECT_ROOT, 'src', 'data', 'games.json')  # 📝 游戏数据的规范存储
     LOCAL_GAMES_DIR = os.path.join(PROJECT_ROOT, 'public', 'games')
     THUMBNAILS_DIR = os.path.join(PROJECT_ROOT, 'public', 'games', 'thumbnails')
+    STATE_DIR = os.path.join(PROJECT_ROOT, 'scripts', '.state')  # 📝 跨运行持久化的爬虫状态
+    BACKOFF_STATE_FILE = os.path.join(STATE_DIR, 'backoff_state.json')
+    FRONTIER_FILE = os.path.join(STATE_DIR, 'crawl_frontier.sqlite')
+    LEARNED_SELECTORS_FILE = os.path.join(STATE_DIR, 'learned_selectors.json')
+    REPORTS_DIR = os.path.join(PROJECT_ROOT, 'reports')
+    EMBEDDABLE_DOMAINS_FILE = os.path.join(PROJECT_ROOT, 'config', 'embeddable_domains.txt')  # 📝 追加的白名单条目
+    KEYWORD_RULES_FILE = os.path.join(PROJECT_ROOT, 'config', 'keyword_rules.json')  # 📝 覆盖内置的关键词规则表
+    CATALOG_FILE = os.path.join(STATE_DIR, 'catalog.sqlite')  # games.json的索引，可随时删除重建
+    THUMBNAIL_MANIFEST_FILE = os.path.join(STATE_DIR, 'thumbnail_manifest.json')  # 生成的缩略图及其渲染参数哈希
+    COVER_HASHES_FILE = os.path.join(STATE_DIR, 'cover_hashes.json')  # 已保存封面的感知哈希
+    SELECTOR_MIN_YIELD_RATIO = 0.5  # 📝 已学习选择器的命中数低于上次的该比例时重新检测
+    
+    # 🗄️ games.ts备份配置
+    BACKUP_DIR = os.path.join(STATE_DIR, 'backups')
+    BACKUP_MAX_COUNT = 20          # 📝 最多保留的快照数量
+    BACKUP_MAX_AGE_DAYS = 30       # 📝 超过该天数的快照会被清理（最新快照始终保留）
+    
+    # 🎨 缩略图配置
+    THUMBNAIL_WORKERS = 0          # 📝 批量生成缩略图的进程数，0 表示CPU核数，1 表示不用多进程
+    THUMBNAIL_VARIANT_WIDTHS = [160, 320, 640]      # 📝 响应式变体的宽度（高度按原图比例），写入 thumbnailVariants
+    THUMBNAIL_VARIANT_FORMATS = ['webp', 'jpeg']  # 📝 变体格式，Pillow不支持的格式自动跳过；可加 'avif'
+                                                  #    （约多180ms/张，是其余编码耗时的3倍多，批量生成会慢很多）
+    THUMBNAIL_QUALITY = {'avif': 50, 'webp': 75, 'jpeg': 80}  # 📝 各格式的编码质量
+    COVER_FETCH_ENABLED = True     # 📝 下载列表页/API结果中的真实封面作为缩略图（--no-covers 关闭）
+    COVER_FETCH_WORKERS = 4        # 📝 同时下载的封面数量（每个域名仍按 PLATFORM_DELAYS 限流）
+    COVER_MAX_BYTES = 5 * 1024 * 1024  # 📝 超过该大小的图片不作为封面
+    COVER_MIN_SIZE = (120, 80)     # 📝 小于该尺寸的图片（图标、占位图）不作为封面
+    COVER_DHASH_DISTANCE = 5       # 📝 dHash汉明距离不超过该值的封面视为同一张，只保存一份
+    
+    # 💾 HTTP缓存配置
+    HTTP_CACHE_ENABLED = True      # 📝 关闭后每次都重新下载（也可用 --no-cache）
+    HTTP_CACHE_FILE = os.path.join(STATE_DIR, 'http_cache.sqlite')
+    HTTP_CACHE_MAX_BYTES = 200 * 1024 * 1024  # 📝 缓存容量上限
+    HTTP_CACHE_TTL = {             # 📝 各类URL在多长时间内直接使用缓存（秒），过期后发条件请求
+        'listing': 30 * 60,        # 平台列表页
+        'detail': 7 * 24 * 3600,   # 平台上的游戏详情页
+        'default': 24 * 3600       # 其他URL（API结果中的外站页面、封面图片等）
+    }
+    
+    # 🔗 URL规范化配置
+    URL_IGNORED_QUERY_PARAMS = {'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content', 'utm_id',
+                                'ref', 'fbclid', 'gclid', 'msclkid', 'gd_sdk_referrer_url'}  # 📝 规范化时去掉的跟踪参数（v/version保留，不同构建只差这个参数）
+    URL_CACHE_SIZE = 50000         # 📝 URL解析/规范化结果的LRU缓存容量
+    
+    # 🔗 近似去重配置
+    DEDUP_NEAR_ENABLED = True      # 📝 在精确去重之外合并标题相近/URL参数不同的同一游戏
+    DEDUP_TITLE_THRESHOLD = 0.8    # 📝 标题3-gram的Jaccard相似度达到该值视为同一游戏
+    DEDUP_NUM_PERM = 32            # 📝 MinHash签名长度
+    DEDUP_LSH_BANDS = 8            # 📝 LSH分段数（DEDUP_NUM_PERM 的约数；越多召回越高、候选越多）
+    DEDUP_TITLE_STOPWORDS = ['game', 'games', 'play', 'online', 'free', 'html5', 'unblocked', 'the']
+    DEDUP_REPORT = True            # 📝 把合并的簇写入 reports/dedup_clusters_<时间>.json
     
     # 🎮 游戏验证配置
     GAME_URL_SCORE_THRESHOLD = 50  # 📝 智能验证的分数阈值
@@ -129,6 +221,15 @@ class Config:
         cls.PROXY_HOST = os.getenv('PROXY_HOST', cls.PROXY_HOST)
         cls.PROXY_PORT = os.getenv('PROXY_PORT', cls.PROXY_PORT)
         cls.STRICT_WHITELIST = os.getenv('STRICT_WHITELIST', str(cls.STRICT_WHITELIST)).lower() == 'true'
+        cls.CRAWL_ENGINE = os.getenv('CRAWL_ENGINE', cls.CRAWL_ENGINE).lower()
+        cls.HTML_PARSER = os.getenv('HTML_PARSER', cls.HTML_PARSER)
+        cls.HTML_PARTIAL_PARSE = os.getenv('HTML_PARTIAL_PARSE', str(cls.HTML_PARTIAL_PARSE)).lower() == 'true'
+        cls.DEDUP_NEAR_ENABLED = os.getenv('DEDUP_NEAR_ENABLED', str(cls.DEDUP_NEAR_ENABLED)).lower() == 'true'
+        cls.HTTP_CACHE_ENABLED = os.getenv('HTTP_CACHE_ENABLED', str(cls.HTTP_CACHE_ENABLED)).lower() == 'true'
+        cls.COVER_FETCH_ENABLED = os.getenv('COVER_FETCH_ENABLED', str(cls.COVER_FETCH_ENABLED)).lower() == 'true'
+        formats = os.getenv('THUMBNAIL_VARIANT_FORMATS')
+        if formats:
+            cls.THUMBNAIL_VARIANT_FORMATS = [fmt.strip().lower() for fmt in formats.split(',') if fmt.strip()]
         
         # API密钥优先从环境变量读取
         cls.SERPAPI_KEY = os.getenv('SERPAPI_KEY', cls.SERPAPI_KEY)
@@ -142,6 +243,13 @@ class Config:
             cls.CRAWL_DELAY_MAX = float(os.getenv('CRAWL_DELAY_MAX', str(cls.CRAWL_DELAY_MAX)))
             cls.REQUEST_TIMEOUT = int(os.getenv('REQUEST_TIMEOUT', str(cls.REQUEST_TIMEOUT)))
             cls.RETRY_ATTEMPTS = int(os.getenv('RETRY_ATTEMPTS', str(cls.RETRY_ATTEMPTS)))
+            cls.ASYNC_MAX_WORKERS = int(os.getenv('ASYNC_MAX_WORKERS', str(cls.ASYNC_MAX_WORKERS)))
+            cls.ASYNC_DOMAIN_CONCURRENCY = int(os.getenv('ASYNC_DOMAIN_CONCURRENCY', str(cls.ASYNC_DOMAIN_CONCURRENCY)))
+            cls.THUMBNAIL_WORKERS = int(os.getenv('THUMBNAIL_WORKERS', str(cls.THUMBNAIL_WORKERS)))
+            cls.COVER_FETCH_WORKERS = int(os.getenv('COVER_FETCH_WORKERS', str(cls.COVER_FETCH_WORKERS)))
+            cls.BACKUP_MAX_COUNT = int(os.getenv('BACKUP_MAX_COUNT', str(cls.BACKUP_MAX_COUNT)))
+            cls.BACKUP_MAX_AGE_DAYS = int(os.getenv('BACKUP_MAX_AGE_DAYS', str(cls.BACKUP_MAX_AGE_DAYS)))
+            cls.DEDUP_TITLE_THRESHOLD = float(os.getenv('DEDUP_TITLE_THRESHOLD', str(cls.DEDUP_TITLE_THRESHOLD)))
             cls.GAME_URL_SCORE_THRESHOLD = int(os.getenv('GAME_URL_SCORE_THRESHOLD', str(cls.GAME_URL_SCORE_THRESHOLD)))
         except ValueError:
             pass  # 使用默认值
@@ -155,6 +263,16 @@ class Config:
             cls.STRICT_WHITELIST = True
         if hasattr(args, 'max_games') and args.max_games:
             cls.MAX_GAMES_DEFAULT = args.max_games
+        if hasattr(args, 'engine') and args.engine:
+            cls.CRAWL_ENGINE = args.engine
+        if hasattr(args, 'no_cache') and args.no_cache:
+            cls.HTTP_CACHE_ENABLED = False
+        if hasattr(args, 'full_rewrite') and args.full_rewrite:
+            cls.INCREMENTAL_WRITE = False
+        if hasattr(args, 'thumbnail_workers') and args.thumbnail_workers is not None:
+            cls.THUMBNAIL_WORKERS = args.thumbnail_workers
+        if hasattr(args, 'no_covers') and args.no_covers:
+            cls.COVER_FETCH_ENABLED = False
     
     @classmethod
     def print_status(cls):
@@ -165,6 +283,10 @@ class Config:
             print(f"  代理地址: {cls.PROXY_HOST}:{cls.PROXY_PORT}")
         print(f"  白名单模式: {'🔒 严格模式' if cls.STRICT_WHITELIST else '🤖 智能模式'}")
         print(f"  默认爬取数量: {cls.MAX_GAMES_DEFAULT}")
+        print(f"  爬虫引擎: {'⚡ 异步并发' if cls.CRAWL_ENGINE == 'async' else '🐢 同步顺序'}")
+        print(f"  HTTP缓存: {'✅ 启用' if cls.HTTP_CACHE_ENABLED else '❌ 禁用'}")
+        print(f"  games.ts备份: 最多{cls.BACKUP_MAX_COUNT}个，保留{cls.BACKUP_MAX_AGE_DAYS}天")
+        print(f"  HTML解析器: {cls.HTML_PARSER}{'（局部解析）' if cls.HTML_PARTIAL_PARSE else ''}")
         print(f"  API配置: SerpAPI={'✅' if cls.SERPAPI_KEY else '❌'}, Google={'✅' if cls.GOOGLE_API_KEY else '❌'}")
         # 检查PIL是否可用
         try:
@@ -172,7 +294,9 @@ class Config:
             pil_available = True
         except ImportError:
             pil_available = False
-        print(f"  缩略图生成: {'✅ 可用' if pil_available else '❌ 不可用'}")
+        print(f"  缩略图生成: {'✅ 可用' if pil_available else '❌ 不可用'}"
+              f"（{cls.THUMBNAIL_WORKERS or os.cpu_count()}个进程）")
+        print(f"  真实封面下载: {'✅ 启用' if cls.COVER_FETCH_ENABLED else '❌ 禁用'}")
 
 # 初始化配置
 Config.load_from_env()
@@ -180,6 +304,7 @@ Config.load_from_env()
 # 项目配置
 PROJECT_ROOT = Config.PROJECT_ROOT
 GAMES_DATA_FILE = Config.GAMES_DATA_FILE
+GAMES_JSON_FILE = Config.GAMES_JSON_FILE
 LOCAL_GAMES_DIR = Config.LOCAL_GAMES_DIR
 THUMBNAILS_DIR = Config.THUMBNAILS_DIR
 
@@ -255,8 +380,17 @@ def setup_global_proxy():
         return proxy_working
     return False
 
-# 初始化全局代理
-PROXY_AVAILABLE = setup_global_proxy() if USE_PROXY else False
+# 全局代理在第一次创建 GameManager 时才设置和测试，而不是在导入时：
+# 缩略图进程池在 spawn/forkserver 方式下每个子进程都会重新导入本模块，不能各自做一遍网络探测
+PROXY_AVAILABLE = None
+
+
+def ensure_global_proxy() -> bool:
+    """设置全局代理（每个进程只测试一次），返回代理是否可用"""
+    global PROXY_AVAILABLE
+    if PROXY_AVAILABLE is None:
+        PROXY_AVAILABLE = setup_global_proxy() if USE_PROXY else False
+    return PROXY_AVAILABLE
 
 # 模拟浏览器头（轮换使用）
 USER_AGENTS = [
@@ -415,206 +549,2250 @@ GAME_SEARCH_QUERIES = [
 ]
 
 # ========================================================================================
-# 🎨 缩略图生成功能 - 集成到GameManager中
+# 🧩 HTML解析 - 可配置的解析器后端和按需构建的局部解析
 # ========================================================================================
 
-class ThumbnailGenerator:
-    """缩略图生成器"""
+class TagStrainer(SoupStrainer):
+    """按标签名和属性决定是否构建元素（命中的元素保留完整子树）
     
-    def __init__(self, thumbnails_dir):
-        self.thumbnails_dir = thumbnails_dir
-        os.makedirs(thumbnails_dir, exist_ok=True)
+    同时实现 bs4 4.13+ 的 allow_tag_creation 和旧版本的 search_tag。
+    """
     
-    def generate_gradient_background(self, width, height, color1, color2):
-        """生成渐变背景"""
-        if not PIL_AVAILABLE:
-            return None
-            
-        image = Image.new('RGB', (width, height))
-        
-        for y in range(height):
-            # 计算渐变比例
-            ratio = y / height
-            
-            # 线性插值
-            r = int(color1[0] * (1 - ratio) + color2[0] * ratio)
-            g = int(color1[1] * (1 - ratio) + color2[1] * ratio)
-            b = int(color1[2] * (1 - ratio) + color2[2] * ratio)
-            
-            # 填充这一行
-            for x in range(width):
-                image.putpixel((x, y), (r, g, b))
-        
-        return image
+    def __init__(self, predicate):
+        super().__init__()
+        self.predicate = predicate
     
-    def generate_geometric_pattern(self, width, height, base_color):
-        """生成几何图案背景"""
-        if not PIL_AVAILABLE:
-            return None
-            
-        image = Image.new('RGB', (width, height), base_color)
-        draw = ImageDraw.Draw(image)
-        
-        # 随机几何图案
-        patterns = ['circles', 'triangles', 'rectangles', 'lines']
-        pattern = random.choice(patterns)
-        
-        # 生成亮色和暗色变体
-        r, g, b = base_color
-        light_color = (min(255, r + 40), min(255, g + 40), min(255, b + 40))
-        dark_color = (max(0, r - 40), max(0, g - 40), max(0, b - 40))
-        
-        if pattern == 'circles':
-            for _ in range(8):
-                x = random.randint(0, width)
-                y = random.randint(0, height)
-                radius = random.randint(20, 60)
-                color = random.choice([light_color, dark_color])
-                draw.ellipse([x-radius, y-radius, x+radius, y+radius], 
-                            fill=color, outline=None)
-        
-        elif pattern == 'triangles':
-            for _ in range(6):
-                points = []
-                for _ in range(3):
-                    points.append((random.randint(0, width), random.randint(0, height)))
-                color = random.choice([light_color, dark_color])
-                draw.polygon(points, fill=color)
-        
-        elif pattern == 'rectangles':
-            for _ in range(10):
-                x1 = random.randint(0, width//2)
-                y1 = random.randint(0, height//2)
-                x2 = x1 + random.randint(30, 80)
-                y2 = y1 + random.randint(20, 60)
-                color = random.choice([light_color, dark_color])
-                draw.rectangle([x1, y1, x2, y2], fill=color)
-        
-        elif pattern == 'lines':
-            for _ in range(15):
-                x1 = random.randint(0, width)
-                y1 = random.randint(0, height)
-                x2 = random.randint(0, width)
-                y2 = random.randint(0, height)
-                color = random.choice([light_color, dark_color])
-                draw.line([x1, y1, x2, y2], fill=color, width=random.randint(2, 8))
-        
-        return image
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        return self.predicate(name, attrs or {})
     
-    def create_game_thumbnail(self, title, style='gradient', width=300, height=200):
-        """创建游戏缩略图"""
-        if not PIL_AVAILABLE:
-            logger.warning("PIL不可用，无法生成缩略图")
-            return None
-            
-        # 预定义的颜色主题
-        color_themes = [
-            {'primary': (52, 152, 219), 'secondary': (155, 89, 182)},
-            {'primary': (46, 204, 113), 'secondary': (52, 152, 219)},
-            {'primary': (230, 126, 34), 'secondary': (231, 76, 60)},
-            {'primary': (155, 89, 182), 'secondary': (52, 73, 94)},
-            {'primary': (231, 76, 60), 'secondary': (192, 57, 43)},
-            {'primary': (26, 188, 156), 'secondary': (22, 160, 133)},
-            {'primary': (241, 196, 15), 'secondary': (230, 126, 34)},
-            {'primary': (52, 73, 94), 'secondary': (44, 62, 80)},
-        ]
-        
-        theme = random.choice(color_themes)
-        
-        if style == 'gradient':
-            image = self.generate_gradient_background(width, height, theme['primary'], theme['secondary'])
+    def search_tag(self, markup_name=None, markup_attrs={}):
+        return markup_name if self.predicate(markup_name, markup_attrs or {}) else None
+
+
+def _is_iframe_candidate_tag(name: str, attrs: Dict) -> bool:
+    """_find_iframe_url 需要的元素：iframe/嵌入标签、链接、data-*游戏地址、embed/player容器"""
+    if name in ('iframe', 'embed', 'object', 'a'):
+        return True
+    if 'data-game-url' in attrs or 'data-embed-url' in attrs or 'data-src' in attrs:
+        return True
+    if 'html' in str(attrs.get('href', '')):
+        return True
+    
+    css_class = attrs.get('class', '')
+    if isinstance(css_class, list):
+        css_class = ' '.join(css_class)
+    marker = f"{css_class} {attrs.get('id', '')}".lower()
+    return 'embed' in marker or 'player' in marker
+
+
+IFRAME_CANDIDATE_STRAINER = TagStrainer(_is_iframe_candidate_tag)
+
+
+def get_html_parser() -> str:
+    """当前使用的解析器（lxml不可用时回退到html.parser）"""
+    if Config.HTML_PARSER == 'lxml' and not LXML_AVAILABLE:
+        return 'html.parser'
+    return Config.HTML_PARSER
+
+
+def layout_fingerprint(soup: BeautifulSoup) -> str:
+    """页面结构指纹：所有 标签+class 组合的集合（与具体内容和数量无关）
+    
+    含数字的class（如 css-1x2y3 这类构建生成的名称）不参与计算，避免每次发布都改变指纹。
+    """
+    signatures = set()
+    for element in soup.find_all(True):
+        css_class = element.get('class') or []
+        if isinstance(css_class, str):
+            css_class = css_class.split()
+        stable_classes = sorted(c for c in css_class if not any(ch.isdigit() for ch in c))
+        signatures.add(element.name + ''.join(f'.{c}' for c in stable_classes))
+    return hashlib.sha1('\n'.join(sorted(signatures)).encode('utf-8')).hexdigest()[:16]
+
+
+def parse_html(markup: str, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    """解析HTML；传入 parse_only 且启用局部解析时只构建需要的元素"""
+    parser = get_html_parser()
+    if parse_only is not None and Config.HTML_PARTIAL_PARSE and parser != 'html5lib':
+        return BeautifulSoup(markup, parser, parse_only=parse_only)
+    return BeautifulSoup(markup, parser)
+
+
+def atomic_write_text(path: str, text: str):
+    """先写同目录下的临时文件再重命名，读取方不会看到写了一半的文件"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_file = f"{path}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_file, path)
+
+
+def atomic_write_json(path: str, data: Any):
+    """原子写入JSON，避免中断时留下损坏的文件"""
+    atomic_write_text(path, json.dumps(data, ensure_ascii=False, indent=2))
+
+
+# ========================================================================================
+# 📄 games.ts解析 - 单遍扫描的字面量分词器，正确处理字符串和转义
+# ========================================================================================
+
+_TS_STRING = r"""'[^'\\\n]*(?:\\.[^'\\\n]*)*'|"[^"\\\n]*(?:\\.[^"\\\n]*)*"|`[^`\\]*(?:\\.[^`\\]*)*`"""
+# "字段: 简单值," 和只含字符串的数组各合并为一个记号，减少每个对象的记号数量
+_TS_TOKEN_RE = re.compile(rf"""
+    \s*
+    (?:
+        (?P<key>[\w$]+|{_TS_STRING})\s*:\s*
+            (?:(?P<str_value>{_TS_STRING})
+              |(?P<word_value>[\w$.+-]+)
+              |(?P<list_value>\[\s*(?:(?:{_TS_STRING})\s*,?\s*)*\])
+            )?\s*,?
+      | (?P<str>{_TS_STRING})\s*,?
+      | (?P<word>[\w$.+-]+)\s*,?
+      | (?P<punct>[{{}}\[\],])
+      | (?P<comment>//[^\n]*|/\*.*?\*/)
+      | (?P<other>\S)
+    )
+""", re.VERBOSE | re.DOTALL)
+_TS_STRING_RE = re.compile(_TS_STRING)
+_TS_ESCAPE_RE = re.compile(r"\\(u\{[0-9a-fA-F]+\}|u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|.)", re.DOTALL)
+_TS_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', 'v': '\v', '0': '\0', '\n': ''}
+_TS_WORDS = {'true': True, 'false': False, 'null': None, 'undefined': None}
+
+
+def _ts_unescape(text: str) -> str:
+    """还原JS字符串字面量中的转义序列"""
+    if '\\' not in text:
+        return text
+    
+    def replace(match):
+        seq = match.group(1)
+        if seq[0] in 'ux' and len(seq) > 1:
+            return chr(int(seq[1:].strip('{}'), 16))
+        return _TS_ESCAPES.get(seq, seq)
+    
+    return _TS_ESCAPE_RE.sub(replace, text)
+
+
+def ts_quote(value: Any, quote: str = "'") -> str:
+    """生成安全的JS字符串字面量（转义引号、反斜杠和换行）"""
+    text = str(value).replace('\\', '\\\\').replace(quote, '\\' + quote)
+    text = text.replace('\n', '\\n').replace('\r', '\\r')
+    text = text.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+    return quote + text + quote
+
+
+def _ts_word(text: str):
+    """true/false/null 和数字字面量"""
+    if text in _TS_WORDS:
+        return _TS_WORDS[text]
+    try:
+        return int(text)
+    except ValueError:
+        try:
+            return float(text)
+        except ValueError:
+            raise ValueError(f"不支持的值: {text}")
+
+
+def _parse_ts_value(tokens, token):
+    while token is not None and token.group('comment'):
+        token = next(tokens, None)
+    if token is None:
+        raise ValueError("缺少值")
+    value = token.group('str')
+    if value is not None:
+        return _ts_unescape(value[1:-1])
+    value = token.group('word')
+    if value is not None:
+        return _ts_word(value)
+    punct = token.group('punct')
+    if punct == '{':
+        return _parse_ts_object(tokens)[0]
+    if punct == '[':
+        items = []
+        for token in tokens:
+            punct = token.group('punct')
+            if punct == ']':
+                return items
+            if punct != ',' and not token.group('comment'):
+                items.append(_parse_ts_value(tokens, token))
+        raise ValueError("数组没有闭合")
+    raise ValueError(f"意外的符号: {token.group().strip()}")
+
+
+def _parse_ts_object(tokens) -> tuple:
+    """解析 '{' 之后的对象内容，返回 (dict, '}' 之后的位置)"""
+    obj = {}
+    for token in tokens:
+        key = token.group('key')
+        if key is None:
+            punct = token.group('punct')
+            if punct == '}':
+                return obj, token.end()
+            if punct == ',' or token.group('comment'):
+                continue
+            raise ValueError(f"意外的符号: {token.group().strip()}")
+        
+        if key[0] in '\'"`':
+            key = _ts_unescape(key[1:-1])
+        value = token.group('str_value')
+        if value is not None:
+            obj[key] = _ts_unescape(value[1:-1])
+            continue
+        value = token.group('word_value')
+        if value is not None:
+            obj[key] = _ts_word(value)
+            continue
+        value = token.group('list_value')
+        if value is not None:
+            obj[key] = [_ts_unescape(item[1:-1]) for item in _TS_STRING_RE.findall(value)]
         else:
-            image = self.generate_geometric_pattern(width, height, theme['primary'])
-        
-        if not image:
+            obj[key] = _parse_ts_value(tokens, next(tokens, None))
+    raise ValueError("对象没有闭合")
+
+
+def _skip_ts_object(content: str, start: int, end: int) -> int:
+    """跳过从 start 处 '{' 开始的整个对象（忽略字符串中的括号），返回其后的位置"""
+    depth = 0
+    for token in _TS_TOKEN_RE.finditer(content, start, end):
+        punct = token.group('punct')
+        if punct == '{':
+            depth += 1
+        elif punct == '}':
+            depth -= 1
+            if depth == 0:
+                return token.end()
+    return end
+
+
+def find_ts_array_end(content: str, start: int) -> int:
+    """从数组 '[' 之后的 start 开始，返回与之匹配的 ']' 的位置（忽略字符串中的括号），找不到返回-1"""
+    depth = 0
+    for token in _TS_TOKEN_RE.finditer(content, start):
+        punct = token.group('punct')
+        if punct in ('[', '{'):
+            depth += 1
+        elif punct in (']', '}'):
+            if depth == 0:
+                return token.end() - 1 if punct == ']' else -1
+            depth -= 1
+    return -1
+
+
+def scan_ts_objects(content: str, start: int, end: int):
+    """单遍扫描 content[start:end]，逐个产出顶层对象的 (起始位置, 结束位置, dict)
+    
+    无法解析的对象会被跳过并记录警告，不影响后面的对象。
+    """
+    tokens = _TS_TOKEN_RE.finditer(content, start, end)
+    while True:
+        token = next(tokens, None)
+        if token is None:
+            return
+        if token.group('punct') != '{':
+            continue
+        
+        obj_start = token.end() - 1
+        try:
+            obj, obj_end = _parse_ts_object(tokens)
+        except ValueError as e:
+            obj_end = _skip_ts_object(content, obj_start, end)
+            logger.warning(f"跳过无法解析的游戏对象（第{content.count(chr(10), 0, obj_start) + 1}行）: {e}")
+            tokens = _TS_TOKEN_RE.finditer(content, obj_end, end)
+            continue
+        yield obj_start, obj_end, obj
+
+
+# ========================================================================================
+# 🔗 URL规范化 - 去重、白名单检查、爬取边界和缓存共用的规范URL，解析结果带LRU缓存
+# ========================================================================================
+
+@lru_cache(maxsize=Config.URL_CACHE_SIZE)
+def parse_url(url: str):
+    """带缓存的 urlparse（返回不可变的 ParseResult，可以安全共享）"""
+    return urlparse(url)
+
+
+# 两级公共后缀的常见第二级（co.uk、com.au 等），用于粗略取可注册域名
+_SECOND_LEVEL_SUFFIXES = {'co', 'com', 'net', 'org', 'ac', 'gov', 'edu'}
+
+
+@lru_cache(maxsize=Config.URL_CACHE_SIZE)
+def rate_limit_key(url: str) -> str:
+    """限流、429退避、并发信号量共用的键：PLATFORM_DELAYS 中的平台名，其他站点取可注册域名
+    
+    itch.io 的详情页在作者子域名（author.itch.io）上，按完整主机名计算时每个子域名都有独立的额度。
+    """
+    host = (parse_url(url).hostname if '//' in url else url.split(':')[0]) or ''
+    host = host.lower().rstrip('.')
+    for platform_name in Config.PLATFORM_DELAYS:
+        if platform_name != 'default' and (host == platform_name or host.endswith('.' + platform_name)):
+            return platform_name
+    
+    labels = host.split('.')
+    if len(labels) <= 2 or labels[-1].isdigit():
+        return host
+    if len(labels[-1]) == 2 and labels[-2] in _SECOND_LEVEL_SUFFIXES:
+        return '.'.join(labels[-3:])
+    return '.'.join(labels[-2:])
+
+
+@lru_cache(maxsize=Config.URL_CACHE_SIZE)
+def resolve_url(base_url: str, url: str) -> str:
+    """带缓存的 urljoin"""
+    return urljoin(base_url, url)
+
+
+@lru_cache(maxsize=Config.URL_CACHE_SIZE)
+def canonical_url(url: str) -> str:
+    """规范化URL：统一为https、主机名小写并去掉www和默认端口、去掉结尾斜杠和片段、
+    去掉 URL_IGNORED_QUERY_PARAMS 中的跟踪参数并对其余参数排序
+    
+    用作爬取边界和已知游戏索引的键；判断是否同一游戏用 game_url_key()。HTTP缓存按原始URL存储。
+    """
+    if not url:
+        return ''
+    parsed = parse_url(url.strip())
+    if parsed.scheme not in ('http', 'https', ''):
+        return url.strip()
+    
+    host = (parsed.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    try:
+        port = parsed.port
+    except ValueError:
+        port = None
+    if port and port not in (80, 443):
+        host = f"{host}:{port}"
+    
+    path = parsed.path.rstrip('/') or '/'
+    params = sorted(param for param in parsed.query.split('&')
+                    if param and param.split('=', 1)[0].lower() not in Config.URL_IGNORED_QUERY_PARAMS)
+    query = f"?{'&'.join(params)}" if params else ''
+    return f"https://{host}{path}{query}"
+
+
+@lru_cache(maxsize=Config.URL_CACHE_SIZE)
+def game_url_key(url: str) -> str:
+    """判断两个URL是否指向同一游戏的键：在 canonical_url 基础上去掉协议和 /embed 后缀
+    （_infer_iframe_from_url 推断的 itch.io 嵌入地址与游戏页面视为同一个）"""
+    key = canonical_url(url)
+    if key.startswith('https://'):
+        key = key[len('https://'):]
+    path, _, query = key.partition('?')
+    if path.endswith('/embed'):
+        path = path[:-len('/embed')]
+    return f"{path}?{query}" if query else path
+
+
+# ========================================================================================
+# 🛡️ 白名单匹配 - 按域名标签倒序构建的后缀树，精确匹配主机名后缀和路径前缀
+# ========================================================================================
+
+class DomainMatcher:
+    """可嵌入域名白名单
+    
+    条目格式为 "host" 或 "host/path"：host 按标签边界匹配自身及其子域名（gamejolt.net 匹配
+    cdn.gamejolt.net，不匹配 notgamejolt.net），path 按路径段匹配前缀（/portal 匹配 /portal/view/1，
+    不匹配 /portalx）。开头的 www. 忽略。查找只走一次主机名标签，与条目数量无关。
+    """
+    
+    _PATHS = ''  # 树节点中保存路径前缀列表的键（不会与域名标签冲突）
+    
+    def __init__(self, entries=()):
+        self._root: Dict[str, Any] = {}
+        self._size = 0
+        for entry in entries:
+            self.add(entry)
+    
+    @classmethod
+    def load(cls, entries, config_file: str = None) -> 'DomainMatcher':
+        """内置条目加上配置文件中的条目（每行一个，# 开头为注释）"""
+        matcher = cls(entries)
+        if config_file and os.path.exists(config_file):
+            with open(config_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.split('#', 1)[0].strip()
+                    if line:
+                        matcher.add(line)
+        return matcher
+    
+    @staticmethod
+    def _host_labels(host: str) -> List[str]:
+        host = host.lower().rstrip('.')
+        if host.startswith('www.'):
+            host = host[4:]
+        return host.split('.')[::-1]
+    
+    def add(self, entry: str):
+        entry = entry.strip().lower()
+        entry = entry.split('://', 1)[-1]
+        host, _, path = entry.partition('/')
+        if not host:
+            return
+        
+        node = self._root
+        for label in self._host_labels(host):
+            node = node.setdefault(label, {})
+        prefix = '/' + path.strip('/') if path.strip('/') else ''
+        paths = node.setdefault(self._PATHS, [])
+        if prefix not in paths:
+            paths.append(prefix)
+            self._size += 1
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def match(self, url: str) -> Optional[str]:
+        """返回命中的白名单条目（host或host/path），未命中返回None"""
+        if not url:
+            return None
+        parsed = parse_url(url if '//' in url else f'//{url}')
+        if not parsed.hostname:
             return None
-            
-        draw = ImageDraw.Draw(image)
         
-        # 尝试加载字体
-        try:
-            # Windows系统字体
-            font_large = ImageFont.truetype("arial.ttf", 24)
-        except:
+        path = parsed.path.lower().rstrip('/')
+        labels = self._host_labels(parsed.hostname)
+        node = self._root
+        for depth, label in enumerate(labels, 1):
+            node = node.get(label)
+            if node is None:
+                return None
+            for prefix in node.get(self._PATHS, ()):
+                if not prefix or path == prefix or path.startswith(prefix + '/'):
+                    return '.'.join(reversed(labels[:depth])) + prefix
+        return None
+    
+    def __contains__(self, url: str) -> bool:
+        return self.match(url) is not None
+
+
+EMBEDDABLE_MATCHER = DomainMatcher.load(EMBEDDABLE_DOMAINS, Config.EMBEDDABLE_DOMAINS_FILE)
+
+
+# ========================================================================================
+# 🔤 关键词规则 - 所有关键词表在加载时编译成合并正则，一次扫描得到全部命中，可从配置文件调整
+# ========================================================================================
+
+DEFAULT_KEYWORD_RULES: Dict[str, Any] = {
+    # iframe URL基础过滤
+    'url_exclude': [
+        'ads', 'analytics', 'tracking', 'social', 'comment', 'chat',
+        'youtube', 'vimeo', 'twitter', 'facebook', 'instagram',
+        'discord', 'reddit', 'forum', 'feedback', 'survey',
+        'advertisement', 'banner', 'popup', 'cookie', 'gdpr',
+        'newsletter', 'signup', 'login', 'register', 'captcha',
+        'recaptcha', 'cloudflare', 'error', '404', '403'
+    ],
+    'suspicious_tlds': ['.tk', '.ml', '.ga', '.cf', '.click', '.download'],
+    'private_hosts': ['localhost', '127.0.0.1', '192.168.', '10.0.', '172.16.'],
+    # iframe URL评分：field 为 path/domain/query；默认整组命中只加一次分，per_keyword 为每个命中的关键词各计一次
+    'url_score': [
+        {'field': 'path', 'weight': 25, 'keywords': [
+            '/game/', '/games/', '/play/', '/embed/', '/player/', '/html5/',
+            '/swf/', '/flash/', '/unity/', '/webgl/', '/canvas/']},
+        {'field': 'path', 'weight': 20, 'keywords': [
+            'game.html', 'index.html', 'main.html', 'play.html',
+            'game.js', 'main.js', 'app.js', 'bundle.js']},
+        {'field': 'domain', 'weight': 15, 'keywords': [
+            'game', 'play', 'arcade', 'html5', 'flash', 'unity',
+            'embed', 'cdn', 'assets', 'static', 'media']},
+        {'field': 'domain', 'weight': 30, 'keywords': [  # 知名游戏CDN和托管服务
+            '.itch.zone', '.hwcdn.net', '.gamedistribution.com',
+            '.armorgames.com', '.kongregate.com', '.newgrounds.com',
+            '.crazygames.com', '.poki.com', '.y8.com',
+            'cloudfront.net', 'amazonaws.com', 'github.io']},
+        {'field': 'query', 'weight': 10, 'keywords': ['game', 'play', 'embed', 'id=']},
+        {'field': 'domain', 'weight': -20, 'per_keyword': True, 'keywords': [
+            'redirect', 'proxy', 'mirror', 'fake', 'spam',
+            'ad', 'ads', 'banner', 'popup']},
+    ],
+    # 列表页中的游戏标题
+    'title_invalid': [
+        'menu', 'navigation', 'header', 'footer', 'sidebar',
+        'advertisement', 'ad', 'sponsor', 'login', 'register',
+        'search', 'filter', 'sort', 'category', 'tag',
+        'more', 'view all', 'load more', 'next', 'previous',
+        'home', 'about', 'contact', 'privacy', 'terms'
+    ],
+    'title_game': ['game', 'play', 'adventure', 'puzzle', 'action', 'fun'],
+    # 搜索API结果（标题+摘要）
+    'result_game': [
+        'game', 'play', 'html5', 'browser', 'online',
+        'arcade', 'puzzle', 'action', 'adventure', 'strategy', 'casual',
+        '游戏', '玩', '在线'
+    ],
+    'result_playable': [
+        'play now', 'play online', 'in browser', 'play free',
+        'no download', 'instant play', 'web game', 'browser game',
+        'click to play', 'start playing', 'play instantly',
+        'itch.io', 'gamejolt'  # 游戏平台上的结果不要求可玩关键词
+    ],
+    'result_exclude': [
+        'forum', 'discussion', 'review', 'news', 'blog', 'tutorial',
+        'guide', 'download', 'wiki', 'community', 'devlog', 'discord',
+        'reddit', 'youtube', 'steam', 'app store', 'google play',
+        'walkthrough', 'cheats', 'tips', 'trailer', 'preview'
+    ],
+    # 按顺序取第一个命中的分类，都不命中时为 default_category
+    'categories': [
+        {'name': '益智', 'id': '2', 'keywords': ['puzzle', 'brain', 'logic', 'match', '益智', '谜题']},
+        {'name': '动作', 'id': '3', 'keywords': ['action', 'shoot', 'fight', 'run', '动作', '射击']},
+        {'name': '卡牌', 'id': '4', 'keywords': ['card', 'poker', 'solitaire', '卡牌', '纸牌']},
+        {'name': '体育', 'id': '5', 'keywords': ['sport', 'football', 'soccer', 'basketball', '体育', '足球']},
+        {'name': '棋盘', 'id': '6', 'keywords': ['board', 'chess', 'checkers', '棋盘', '象棋']},
+    ],
+    'default_category': {'name': '休闲', 'id': '1'},
+}
+
+
+_LONG_DIGITS_RE = re.compile(r'\d{4,}')
+
+
+def _keyword_trie_pattern(keywords: Iterable[str]) -> str:
+    """关键词按公共前缀合并成正则（'ad'、'ads' → 'ads?'），在同一位置总是匹配最长的关键词"""
+    trie: Dict[str, Any] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    
+    def build(node: Dict[str, Any]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        if '' in node:
+            return f"(?:{body})?" if len(branches) == 1 and len(body) > 1 else f"{body}?"
+        return body
+    
+    return build(trie) or r'(?!)'
+
+
+class KeywordMatcher:
+    """一组关键词编译成的单个正则（子串匹配，文本需已转小写）
+    
+    search 只关心有没有命中；hits 需要文本中出现的全部关键词：正则在每个位置只报告最长的命中，
+    同一位置上更短的命中必然是它的前缀，所以预先算好每个关键词的"前缀闭包"，
+    结果与逐个 `keyword in text` 完全一致。
+    """
+    
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = frozenset(keyword.lower() for keyword in keywords if keyword)
+        pattern = _keyword_trie_pattern(sorted(self.keywords))
+        self._search = re.compile(pattern).search
+        self._scan = re.compile(f'(?=({pattern}))').finditer
+        self._closure = {keyword: frozenset(prefix for prefix in self.keywords if keyword.startswith(prefix))
+                         for keyword in self.keywords}
+    
+    def search(self, text: str) -> Optional[str]:
+        """第一个命中的关键词，无命中返回None"""
+        match = self._search(text)
+        return match.group(0) if match else None
+    
+    def hits(self, text: str) -> Set[str]:
+        """文本中出现的全部关键词"""
+        found: Set[str] = set()
+        for match in self._scan(text):
+            keyword = match.group(1)
+            if keyword not in found:
+                found |= self._closure[keyword]
+        return found
+
+
+class KeywordRules:
+    """URL/标题/搜索结果启发式规则的编译结果，单个和批量判断共用"""
+    
+    def __init__(self, rules: Dict[str, Any]):
+        self.rules = rules
+        self.url_exclude = KeywordMatcher(rules['url_exclude'])
+        self.suspicious_tlds = tuple(tld.lower() for tld in rules['suspicious_tlds'])
+        self.private_hosts = KeywordMatcher(rules['private_hosts'])
+        self.url_score = [(rule['field'], rule['weight'], bool(rule.get('per_keyword')), KeywordMatcher(rule['keywords']))
+                          for rule in rules['url_score']]
+        
+        self.title_invalid = KeywordMatcher(rules['title_invalid'])
+        self.title_game = KeywordMatcher(rules['title_game'])
+        
+        self.result_game = KeywordMatcher(rules['result_game'])
+        self.result_playable = KeywordMatcher(rules['result_playable'])
+        self.result_exclude = KeywordMatcher(rules['result_exclude'])
+        self.categories = [(category['name'], category['id'], KeywordMatcher(category['keywords']))
+                           for category in rules['categories']]
+        self.default_category = (rules['default_category']['name'], rules['default_category']['id'])
+    
+    @classmethod
+    def load(cls, config_file: str = None) -> 'KeywordRules':
+        """内置规则，配置文件（JSON）中出现的表整体替换对应的内置表"""
+        if config_file and os.path.exists(config_file):
             try:
-                # Linux系统字体
-                font_large = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 24)
-            except:
-                # 默认字体
-                font_large = ImageFont.load_default()
-        
-        # 添加半透明覆盖层
-        overlay = Image.new('RGBA', (width, height), (0, 0, 0, 80))
-        image = Image.alpha_composite(image.convert('RGBA'), overlay).convert('RGB')
-        draw = ImageDraw.Draw(image)
-        
-        # 处理标题文字
-        if len(title) > 20:
-            title = title[:17] + "..."
-        
-        # 获取文字颜色
-        text_color = (255, 255, 255)  # 白色文字在深色覆盖层上
-        
-        # 计算文字位置（居中）
-        bbox = draw.textbbox((0, 0), title, font=font_large)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
-        
-        text_x = (width - text_width) // 2
-        text_y = (height - text_height) // 2
-        
-        # 添加文字阴影
-        shadow_offset = 2
-        draw.text((text_x + shadow_offset, text_y + shadow_offset), title, 
-                 fill=(0, 0, 0), font=font_large)
+                with open(config_file, 'r', encoding='utf-8') as f:
+                    overrides = json.load(f)
+                unknown = [key for key in overrides if key not in DEFAULT_KEYWORD_RULES and not key.startswith('//')]
+                if unknown:
+                    logger.warning(f"⚠️ 关键词规则文件中有未知的表: {', '.join(unknown)}")
+                rules = dict(DEFAULT_KEYWORD_RULES)
+                rules.update({key: value for key, value in overrides.items() if key in DEFAULT_KEYWORD_RULES})
+                return cls(rules)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.warning(f"⚠️ 关键词规则文件无效，使用内置规则 {config_file}: {e}")
+        return cls(DEFAULT_KEYWORD_RULES)
+    
+    # ---- iframe URL ----
+    
+    def url_rejection(self, full_url: str, parsed) -> Optional[str]:
+        """基础过滤不通过的原因，通过返回None"""
+        if parsed.scheme not in ('http', 'https'):
+            return f"协议无效: {parsed.scheme}"
+        pattern = self.url_exclude.search(full_url.lower())
+        if pattern:
+            return f"包含排除模式 '{pattern}': {full_url}"
+        netloc = parsed.netloc.lower()
+        if netloc.endswith(self.suspicious_tlds):
+            return f"可疑域名后缀: {parsed.netloc}"
+        if len(full_url) > 500:
+            return f"URL过长 ({len(full_url)} 字符): {full_url[:100]}..."
+        if len(netloc) > 80 or len(netloc) < 4:
+            return f"域名长度异常: {parsed.netloc}"
+        if self.private_hosts.search(netloc):
+            return f"本地/内网地址: {parsed.netloc}"
+        return None
+    
+    def score_url(self, full_url: str, parsed) -> int:
+        """游戏URL的可信度评分（不依赖白名单）"""
+        domain = parsed.netloc.lower()
+        fields = {'path': parsed.path.lower(), 'domain': domain, 'query': parsed.query.lower()}
         
-        # 添加主文字
-        draw.text((text_x, text_y), title, fill=text_color, font=font_large)
+        score = 0
+        for field, weight, per_keyword, matcher in self.url_score:
+            text = fields[field]
+            if not text:
+                continue
+            if per_keyword:
+                score += weight * len(matcher.hits(text))
+            elif matcher.search(text):
+                score += weight
         
-        # 添加装饰元素
-        if random.choice([True, False]):
-            # 添加小图标或装饰
-            icon_size = 20
-            icon_x = width - icon_size - 10
-            icon_y = 10
-            
-            # 简单的游戏手柄图标
-            draw.ellipse([icon_x, icon_y, icon_x + icon_size, icon_y + icon_size], 
-                        fill=text_color, outline=None)
-            draw.ellipse([icon_x + 4, icon_y + 4, icon_x + icon_size - 4, icon_y + icon_size - 4], 
-                        fill=theme['primary'], outline=None)
+        if parsed.scheme == 'https':
+            score += 10
+        # 非常见端口减分
+        try:
+            port = parsed.port
+        except ValueError:
+            port = None
+        if port and port not in (80, 443, 8080, 3000):
+            score -= 10
+        # 过长的域名、包含多个连续数字的域名（可能是临时域名）
+        if len(domain) > 50:
+            score -= 15
+        if _LONG_DIGITS_RE.search(domain):
+            score -= 10
         
-        return image
+        return max(0, score)
     
-    def save_thumbnail(self, image, filename):
-        """保存缩略图"""
-        if not image:
+    def score_urls(self, urls: Iterable[str]) -> List[int]:
+        """批量评分，未通过基础过滤的URL为0分"""
+        scores = []
+        for url in urls:
+            parsed = parse_url(url)
+            scores.append(0 if self.url_rejection(url, parsed) else self.score_url(url, parsed))
+        return scores
+    
+    # ---- 列表页标题 ----
+    
+    def is_valid_title(self, title: str) -> bool:
+        """是否像一个游戏标题（而不是菜单、分页、广告等）"""
+        stripped = title.strip() if title else ''
+        if len(stripped) < 2:
             return False
-            
-        filepath = os.path.join(self.thumbnails_dir, filename)
-        try:
-            image.save(filepath, 'JPEG', quality=90, optimize=True)
-            return True
-        except Exception as e:
-            logger.error(f"保存缩略图失败 {filename}: {e}")
+        title_lower = title.lower()
+        if self.title_invalid.search(title_lower) or len(title) > 100:
             return False
+        if self.title_game.search(title_lower):
+            return True
+        return len(stripped) >= 3 and any(c.isalpha() for c in title)
     
-    def generate_for_game(self, game_title, game_id):
-        """为特定游戏生成缩略图"""
-        style = random.choice(['gradient', 'geometric'])
-        image = self.create_game_thumbnail(game_title, style)
-        
-        if image:
-            filename = f"{game_id}.jpg"
-            if self.save_thumbnail(image, filename):
-                return f'/games/thumbnails/{filename}'
-        
-        return '/games/thumbnails/default.jpg'
+    def validate_titles(self, titles: Iterable[str]) -> List[bool]:
+        return [self.is_valid_title(title) for title in titles]
+    
+    # ---- 搜索API结果 ----
+    
+    def classify_result(self, title: str, snippet: str) -> Dict[str, Any]:
+        """判断标题+摘要是否游戏相关且可在线玩，并给出分类名和分类ID"""
+        text = f"{title} {snippet}".lower()
+        related = bool(self.result_game.search(text) and self.result_playable.search(text)
+                       and not self.result_exclude.search(text))
+        name, category_id = self.default_category
+        for candidate_name, candidate_id, matcher in self.categories:
+            if matcher.search(text):
+                name, category_id = candidate_name, candidate_id
+                break
+        return {'related': related, 'category': name, 'categoryId': category_id}
+    
+    def classify_results(self, items: Iterable[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        return [self.classify_result(title, snippet) for title, snippet in items]
+
+
+KEYWORD_RULES = KeywordRules.load(Config.KEYWORD_RULES_FILE)
+
+
+# ========================================================================================
+# 🚦 请求限流 - 每个域名独立的令牌桶
+# ========================================================================================
+
+class TokenBucket:
+    """单个域名的令牌桶：按 rate 补充令牌，最多积攒 burst 个"""
+    
+    def __init__(self, rate: float, burst: int, jitter: float):
+        self.rate = rate
+        self.burst = burst
+        self.jitter = jitter
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def reserve(self, penalty: float = 1.0) -> float:
+        """预订一个令牌，返回调用方需要等待的秒数（不在锁内睡眠）"""
+        with self.lock:
+            now = time.monotonic()
+            rate = self.rate / max(penalty, 1.0)
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * rate)
+            self.updated_at = now
+            
+            # 令牌可以透支：排队中的请求依次获得后续的时间片
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            # 随机抖动也计入透支，后面排队的请求顺延，不会插到本次请求之前
+            self.tokens -= random.uniform(0, self.jitter) * rate
+            return -self.tokens / rate
+
+
+class DomainRateLimiter:
+    """按域名限流，只让被限流的域名等待，其他域名继续请求（域名键由 rate_limit_key() 给出）"""
+    
+    def __init__(self):
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def resolve_platform(domain: str) -> str:
+        """把域名映射到 PLATFORM_DELAYS 中的平台配置"""
+        key = rate_limit_key(domain)
+        return key if key in Config.PLATFORM_DELAYS else 'default'
+    
+    def _get_bucket(self, domain: str) -> TokenBucket:
+        with self._lock:
+            if domain not in self._buckets:
+                platform = self.resolve_platform(domain)
+                min_delay, max_delay = Config.PLATFORM_DELAYS[platform]
+                burst = Config.PLATFORM_BURST.get(platform, Config.PLATFORM_BURST['default'])
+                # 平均间隔 = min_delay + jitter/2，与原来的延迟区间保持一致
+                self._buckets[domain] = TokenBucket(1.0 / min_delay, burst, max_delay - min_delay)
+                self._stats[domain] = {'requests': 0, 'waited': 0.0, 'first': time.time(), 'last': time.time()}
+                logger.debug(f"🚦 [{platform}] {domain}: 间隔 {min_delay}-{max_delay}s, 突发 {burst}")
+            return self._buckets[domain]
+    
+    def reserve(self, domain: str, penalty: float = 1.0) -> float:
+        """为一次请求预订时间片，返回需要等待的秒数"""
+        wait = self._get_bucket(domain).reserve(penalty)
+        with self._lock:
+            stats = self._stats[domain]
+            stats['requests'] += 1
+            stats['waited'] += wait
+            stats['last'] = time.time() + wait
+        return wait
+    
+    def acquire(self, domain: str, penalty: float = 1.0) -> float:
+        """阻塞当前线程直到可以请求该域名（其他线程不受影响）"""
+        wait = self.reserve(domain, penalty)
+        if wait > 0:
+            logger.debug(f"🚦 [{domain}] 等待 {wait:.1f}s")
+            time.sleep(wait)
+        return wait
+    
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """每个域名的实际请求数、累计等待时间和请求速率（requests/sec）"""
+        with self._lock:
+            result = {}
+            for domain, stats in self._stats.items():
+                elapsed = stats['last'] - stats['first']
+                rps = stats['requests'] / elapsed if elapsed > 0 else float(stats['requests'])
+                result[domain] = {
+                    'requests': stats['requests'],
+                    'waited': round(stats['waited'], 2),
+                    'rps': round(rps, 3)
+                }
+            return result
+    
+    def log_stats(self):
+        """输出每个域名的实际请求速率"""
+        for domain, stats in sorted(self.get_stats().items()):
+            logger.info(f"🚦 {domain}: {stats['requests']} 次请求, "
+                        f"{stats['rps']:.3f} req/s, 累计等待 {stats['waited']:.1f}s")
+
+class AdaptiveBackoff:
+    """按域名的429自适应退避：遵循 Retry-After，重复429时加倍降速，连续成功后逐步恢复
+    
+    状态保存到 BACKOFF_STATE_FILE，下一次运行（如cron）会沿用上次的降速倍数。
+    """
+    
+    def __init__(self, state_file: str = None):
+        self.state_file = state_file or Config.BACKOFF_STATE_FILE
+        self._lock = threading.Lock()
+        self._state: Dict[str, Dict[str, float]] = self._load()
+    
+    def _load(self) -> Dict[str, Dict[str, float]]:
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state:
+                logger.info(f"🔁 已加载 {len(state)} 个域名的退避状态")
+            return state
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"读取退避状态失败，将重新开始: {e}")
+            return {}
+    
+    def _save(self):
+        """保存状态（调用方需持有锁）"""
+        try:
+            atomic_write_json(self.state_file, self._state)
+        except Exception as e:
+            logger.warning(f"保存退避状态失败: {e}")
+    
+    def _domain_state(self, domain: str) -> Dict[str, float]:
+        if domain not in self._state:
+            self._state[domain] = {'penalty': 1.0, 'blocked_until': 0.0, 'successes': 0}
+        return self._state[domain]
+    
+    @staticmethod
+    def parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """解析 Retry-After（秒数或HTTP日期）"""
+        if not value:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            retry_at = parsedate_to_datetime(value)
+            return max(0.0, retry_at.timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+    
+    def get_penalty(self, domain: str) -> float:
+        with self._lock:
+            return self._state.get(domain, {}).get('penalty', 1.0)
+    
+    def wait_time(self, domain: str) -> float:
+        """距离该域名解除封锁还需等待的秒数"""
+        with self._lock:
+            blocked_until = self._state.get(domain, {}).get('blocked_until', 0.0)
+        return max(0.0, blocked_until - time.time())
+    
+    def record_rate_limited(self, domain: str, retry_after: Optional[str] = None) -> float:
+        """记录一次429，返回该域名需要暂停的秒数"""
+        with self._lock:
+            state = self._domain_state(domain)
+            delay = self.parse_retry_after(retry_after)
+            if delay is None:
+                delay = Config.BACKOFF_BASE_DELAY * state['penalty']
+            delay = min(delay, Config.BACKOFF_MAX_DELAY)
+            
+            state['penalty'] = min(state['penalty'] * 2, Config.BACKOFF_MAX_PENALTY)
+            state['blocked_until'] = max(state['blocked_until'], time.time() + delay)
+            state['successes'] = 0
+            self._save()
+            return delay
+    
+    def record_success(self, domain: str):
+        """记录一次成功请求，连续成功足够多次后放宽限速"""
+        with self._lock:
+            state = self._state.get(domain)
+            if not state or state['penalty'] <= 1.0:
+                return
+            state['successes'] += 1
+            if state['successes'] >= Config.BACKOFF_RELAX_AFTER:
+                state['penalty'] = max(1.0, state['penalty'] / 2)
+                state['successes'] = 0
+                logger.info(f"🔁 [{domain}] 连续成功，降速倍数恢复到 ×{state['penalty']:g}")
+                self._save()
+
+
+# ========================================================================================
+# 💾 HTTP响应缓存 - SQLite持久化，支持ETag/Last-Modified条件请求
+# ========================================================================================
+
+class HttpCache:
+    """磁盘HTTP缓存：TTL内直接返回，过期后用条件请求重新验证，超出容量按最近访问时间淘汰"""
+    
+    def __init__(self, db_file: str = None, max_bytes: int = None):
+        self.db_file = db_file or Config.HTTP_CACHE_FILE
+        self.max_bytes = max_bytes or Config.HTTP_CACHE_MAX_BYTES
+        self.stats = {'hit': 0, 'revalidated': 0, 'miss': 0, 'stored': 0, 'evicted': 0}
+        self._lock = threading.Lock()
+        
+        os.makedirs(os.path.dirname(self.db_file), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                encoding TEXT,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+        self._conn.commit()
+    
+    @staticmethod
+    def classify_url(url: str) -> str:
+        """把URL归类，用于选择TTL：平台列表页、平台上的详情页、其他"""
+        if any(url == site['search_url'] for site in PREMIUM_GAME_SITES):
+            return 'listing'
+        host = parse_url(url).hostname or ''
+        for site in PREMIUM_GAME_SITES:
+            site_host = parse_url(site['base_url']).hostname or ''
+            if host == site_host or host.endswith('.' + site_host):
+                return 'detail'
+        return 'default'
+    
+    @staticmethod
+    def cache_key(url: str) -> str:
+        """缓存键是实际请求的URL（只去掉不会发送给服务器的片段），参数不同的页面各自缓存"""
+        return url.strip().split('#', 1)[0]
+    
+    def get_ttl(self, url: str) -> float:
+        return Config.HTTP_CACHE_TTL.get(self.classify_url(url), Config.HTTP_CACHE_TTL['default'])
+    
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.stats[name] += amount
+    
+    def lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        """查找缓存条目，附带是否仍在TTL内"""
+        key = self.cache_key(url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, headers, encoding, body, etag, last_modified, fetched_at "
+                "FROM responses WHERE url = ?", (key,)).fetchone()
+        if not row:
+            self._count('miss')
+            return None
+        
+        status, headers, encoding, body, etag, last_modified, fetched_at = row
+        entry = {
+            'url': url, 'key': key, 'status': status, 'headers': json.loads(headers), 'encoding': encoding,
+            'body': body, 'etag': etag, 'last_modified': last_modified,
+            'fresh': time.time() - fetched_at < self.get_ttl(url)
+        }
+        if entry['fresh']:
+            self._count('hit')
+            self._touch(key, refresh=False)
+        return entry
+    
+    @staticmethod
+    def conditional_headers(entry: Dict[str, Any]) -> Dict[str, str]:
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+    
+    def revalidated(self, entry: Dict[str, Any]) -> requests.Response:
+        """服务器返回304：刷新获取时间并返回缓存内容"""
+        self._count('revalidated')
+        self._touch(entry['key'], refresh=True)
+        return self.to_response(entry)
+    
+    def _touch(self, key: str, refresh: bool):
+        now = time.time()
+        with self._lock:
+            if refresh:
+                self._conn.execute("UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE url = ?",
+                                   (now, now, key))
+            else:
+                self._conn.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (now, key))
+            self._conn.commit()
+    
+    def store(self, url: str, response: requests.Response):
+        """保存200响应（遵循 Cache-Control: no-store）"""
+        if response.status_code != 200:
+            return
+        if 'no-store' in response.headers.get('Cache-Control', '').lower():
+            return
+        
+        body = response.content
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(url, status, headers, encoding, body, etag, last_modified, size, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.cache_key(url), response.status_code, json.dumps(dict(response.headers)), response.encoding,
+                 body, response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                 len(body), now, now))
+            self._conn.commit()
+            self.stats['stored'] += 1
+            self._evict()
+    
+    def _evict(self):
+        """超出容量时按最近访问时间淘汰到容量的90%（调用方需持有锁）"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        
+        target = self.max_bytes * 0.9
+        evicted = []
+        for url, size in self._conn.execute("SELECT url, size FROM responses ORDER BY accessed_at"):
+            if total <= target:
+                break
+            evicted.append((url,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE url = ?", evicted)
+        self._conn.commit()
+        self.stats['evicted'] += len(evicted)
+        logger.debug(f"💾 缓存淘汰 {len(evicted)} 条")
+    
+    @staticmethod
+    def to_response(entry: Dict[str, Any]) -> requests.Response:
+        """把缓存条目还原为 requests.Response"""
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.headers = requests.structures.CaseInsensitiveDict(entry['headers'])
+        response.encoding = entry['encoding']
+        response.url = entry['url']
+        response._content = entry['body']
+        response.from_cache = True
+        return response
+    
+    def log_stats(self):
+        with self._lock:
+            s = dict(self.stats)
+        logger.info(f"💾 HTTP缓存: 命中 {s['hit']}, 304重新验证 {s['revalidated']}, "
+                    f"未命中 {s['miss']}, 写入 {s['stored']}, 淘汰 {s['evicted']}")
+
+
+# ========================================================================================
+# 🧭 爬取边界 - 持久化每个候选URL的处理状态，支持断点续爬
+# ========================================================================================
+
+class CrawlFrontier:
+    """记录候选游戏页面的状态：pending → fetched → verified / rejected → written
+    
+    页面URL按 canonical_url() 规范化后作为键。每处理完一个游戏就写入一次检查点；已拒绝或已写入的URL在之后的运行中直接跳过，
+    已验证的游戏直接复用保存的数据，不再重复查找和验证iframe。
+    """
+    
+    PENDING = 'pending'      # 已在列表页发现，尚未处理
+    FETCHED = 'fetched'      # 已找到iframe，尚未验证
+    VERIFIED = 'verified'    # 验证通过，等待写入games.ts
+    REJECTED = 'rejected'    # 没有可用的iframe
+    WRITTEN = 'written'      # 已写入games.ts
+    
+    def __init__(self, db_file: str = None):
+        self.db_file = db_file or Config.FRONTIER_FILE
+        self._lock = threading.Lock()
+        
+        os.makedirs(os.path.dirname(self.db_file), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS frontier (
+                url TEXT PRIMARY KEY,
+                site TEXT,
+                title TEXT,
+                status TEXT NOT NULL,
+                iframe_url TEXT,
+                game_id TEXT,
+                game_json TEXT,
+                reason TEXT,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_frontier_status ON frontier(status)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_frontier_game_id ON frontier(game_id)")
+        self._conn.commit()
+    
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, iframe_url, game_json, reason FROM frontier WHERE url = ?",
+                (canonical_url(url),)).fetchone()
+        if not row:
+            return None
+        status, iframe_url, game_json, reason = row
+        return {
+            'status': status,
+            'iframe_url': iframe_url,
+            'game': json.loads(game_json) if game_json else None,
+            'reason': reason
+        }
+    
+    def is_finished(self, url: str) -> bool:
+        """已经有结论（拒绝或已写入）的URL，不需要再请求"""
+        entry = self.get(url)
+        return bool(entry) and entry['status'] in (self.REJECTED, self.WRITTEN)
+    
+    def enqueue(self, site_name: str, candidates: List[Dict]) -> List[Dict]:
+        """登记列表页候选，返回仍需处理的候选（跳过已拒绝/已写入的）"""
+        pending = []
+        now = time.time()
+        with self._lock:
+            for candidate in candidates:
+                key = canonical_url(candidate['url'])
+                row = self._conn.execute(
+                    "SELECT status, iframe_url FROM frontier WHERE url = ?", (key,)).fetchone()
+                if row is None:
+                    self._conn.execute(
+                        "INSERT INTO frontier (url, site, title, status, updated_at) VALUES (?, ?, ?, ?, ?)",
+                        (key, site_name, candidate['title'], self.PENDING, now))
+                elif row[0] in (self.REJECTED, self.WRITTEN):
+                    continue
+                elif row[0] == self.FETCHED and row[1]:
+                    candidate = {**candidate, 'iframe_url': row[1]}
+                pending.append(candidate)
+            self._conn.commit()
+        
+        skipped = len(candidates) - len(pending)
+        if skipped:
+            logger.info(f"🧭 {site_name}: 跳过 {skipped} 个已处理过的URL")
+        return pending
+    
+    def _update(self, url: str, status: str, **fields):
+        url = canonical_url(url)
+        columns = ['status = ?', 'updated_at = ?']
+        values = [status, time.time()]
+        for column, value in fields.items():
+            columns.append(f"{column} = ?")
+            values.append(value)
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE frontier SET {', '.join(columns)} WHERE url = ?", (*values, url))
+            if cursor.rowcount == 0:
+                self._conn.execute(
+                    "INSERT INTO frontier (url, status, updated_at) VALUES (?, ?, ?)", (url, status, time.time()))
+                self._conn.execute(
+                    f"UPDATE frontier SET {', '.join(columns)} WHERE url = ?", (*values, url))
+            self._conn.commit()
+    
+    def mark_fetched(self, url: str, iframe_url: str):
+        self._update(url, self.FETCHED, iframe_url=iframe_url)
+    
+    def mark_verified(self, url: str, game: Dict):
+        self._update(url, self.VERIFIED, iframe_url=game.get('iframeUrl'), game_id=game['id'],
+                     game_json=json.dumps(game, ensure_ascii=False))
+    
+    def mark_rejected(self, url: str, reason: str):
+        self._update(url, self.REJECTED, reason=reason)
+    
+    def mark_written(self, game_ids: List[str]):
+        """games.ts写入成功后调用，之后这些URL不再处理"""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE frontier SET status = ?, updated_at = ? WHERE game_id = ? AND status = ?",
+                [(self.WRITTEN, time.time(), game_id, self.VERIFIED) for game_id in game_ids])
+            self._conn.commit()
+    
+    def load_checkpoint(self) -> List[Dict]:
+        """上次运行已验证但还没写入的游戏"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT game_json FROM frontier WHERE status = ? ORDER BY updated_at", (self.VERIFIED,)).fetchall()
+        return [json.loads(row[0]) for row in rows if row[0]]
+    
+    def known_urls(self):
+        """已有结论的页面URL，以及已验证/已写入游戏的iframe URL"""
+        with self._lock:
+            pages = [row[0] for row in self._conn.execute(
+                "SELECT url FROM frontier WHERE status IN (?, ?)", (self.REJECTED, self.WRITTEN))]
+            iframes = [row[0] for row in self._conn.execute(
+                "SELECT iframe_url FROM frontier WHERE status IN (?, ?) AND iframe_url IS NOT NULL",
+                (self.VERIFIED, self.WRITTEN))]
+        return pages, iframes
+    
+    def summary(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM frontier GROUP BY status").fetchall())
+
+
+# ========================================================================================
+# 📇 已知游戏索引 - 在发起网络请求前跳过已收录或已拒绝的游戏
+# ========================================================================================
+
+class KnownGameIndex:
+    """已知的游戏页面URL、iframe URL和规范化标题（来自games.ts和爬取边界）"""
+    
+    TITLE_SUFFIXES = (' - play online', ' | free game', ' - browser game', ' online', ' - itch.io')
+    
+    def __init__(self):
+        self.page_urls = set()
+        self.iframe_urls = set()
+        self.titles = set()
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def normalize_title(cls, title: str) -> str:
+        """小写、去掉常见后缀和标点，用于标题比对"""
+        title = title.lower().strip()
+        for suffix in cls.TITLE_SUFFIXES:
+            if title.endswith(suffix):
+                title = title[:-len(suffix)]
+        return ' '.join(re.findall(r'\w+', title))
+    
+    @classmethod
+    def build(cls, games: List[Dict], frontier: 'CrawlFrontier') -> 'KnownGameIndex':
+        index = cls()
+        for game in games:
+            index.add_game(game)
+        
+        known_pages, known_iframes = frontier.known_urls()
+        index.page_urls.update(canonical_url(url) for url in known_pages)
+        index.iframe_urls.update(game_url_key(url) for url in known_iframes)
+        
+        logger.info(f"📇 已知游戏索引: {len(index.titles)} 个标题, {len(index.iframe_urls)} 个iframe, "
+                    f"{len(index.page_urls)} 个页面URL")
+        return index
+    
+    def add_game(self, game: Dict, page_url: str = None):
+        with self._lock:
+            if game.get('title'):
+                self.titles.add(self.normalize_title(game['title']))
+            if game.get('iframeUrl'):
+                self.iframe_urls.add(game_url_key(game['iframeUrl']))
+            if page_url:
+                self.page_urls.add(canonical_url(page_url))
+    
+    def match(self, page_url: str = None, title: str = None, iframe_url: str = None) -> Optional[str]:
+        """返回命中的原因（'page'/'title'/'iframe'），未命中返回None"""
+        with self._lock:
+            if page_url and canonical_url(page_url) in self.page_urls:
+                return 'page'
+            if title and self.normalize_title(title) in self.titles:
+                return 'title'
+            if iframe_url and game_url_key(iframe_url) in self.iframe_urls:
+                return 'iframe'
+        return None
+
+
+# ========================================================================================
+# 🗃️ 游戏目录 - games.json的SQLite索引，按ID、规范化标题、iframe域名和分类查询
+# ========================================================================================
+
+class GameCatalog:
+    """games.json 的SQLite镜像
+    
+    合并新游戏和写入前都与当前的完整列表同步（只写入有变化的行），手动编辑或 addGame.ts 的修改随之导入。
+    去重、分类计数等查询走索引，不需要每次遍历整个游戏列表。
+    """
+    
+    def __init__(self, db_file: str = None):
+        self.db_file = db_file or Config.CATALOG_FILE
+        self._lock = threading.Lock()
+        
+        os.makedirs(os.path.dirname(self.db_file), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS games (
+                id TEXT PRIMARY KEY,
+                position INTEGER NOT NULL,
+                title_norm TEXT NOT NULL,
+                iframe_url TEXT,
+                iframe_host TEXT,
+                category_id TEXT,
+                game_json TEXT NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_games_title_norm ON games(title_norm)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_games_iframe_url ON games(iframe_url)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_games_iframe_host ON games(iframe_host)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_games_category ON games(category_id)")
+        self._conn.commit()
+    
+    @staticmethod
+    def _row(game: Dict, position: int, game_json: str = None) -> tuple:
+        iframe_url = game_url_key(game['iframeUrl']) if game.get('iframeUrl') else None
+        iframe_host = parse_url(game['iframeUrl']).netloc.lower() if iframe_url else None
+        return (game['id'], position, KnownGameIndex.normalize_title(game.get('title', '')),
+                iframe_url, iframe_host, game.get('categoryId', '1'),
+                game_json or json.dumps(game, ensure_ascii=False))
+    
+    def sync(self, games: List[Dict]):
+        """让目录内容与完整列表一致：只写入有变化的游戏，删除列表中已没有的游戏（单个事务）
+        
+        未变化的游戏保留原来的 position，删除造成的空位不影响相对顺序。
+        """
+        with self._lock:
+            stored = dict(self._conn.execute("SELECT id, game_json FROM games"))
+            changed = []
+            for position, game in enumerate(games):
+                game_json = json.dumps(game, ensure_ascii=False)
+                if stored.pop(game['id'], None) != game_json:
+                    changed.append(self._row(game, position, game_json))
+            
+            self._conn.executemany("DELETE FROM games WHERE id = ?", ((game_id,) for game_id in stored))
+            self._conn.executemany("INSERT OR REPLACE INTO games VALUES (?, ?, ?, ?, ?, ?, ?)", changed)
+            self._conn.commit()
+    
+    def upsert_many(self, games: List[Dict]):
+        """批量插入或更新；新游戏排在最后，已有游戏保持原位置"""
+        with self._lock:
+            next_position = self._conn.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM games").fetchone()[0]
+            self._conn.executemany("""
+                INSERT INTO games VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    title_norm = excluded.title_norm, iframe_url = excluded.iframe_url,
+                    iframe_host = excluded.iframe_host, category_id = excluded.category_id,
+                    game_json = excluded.game_json
+            """, (self._row(game, next_position + i) for i, game in enumerate(games)))
+            self._conn.commit()
+    
+    def find_duplicate(self, game: Dict) -> Optional[str]:
+        """按ID、规范化标题、iframe URL查找已收录的游戏，返回命中原因（'id'/'title'/'iframe'）"""
+        _, _, title_norm, iframe_url, _, _, _ = self._row(game, 0)
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM games WHERE id = ?", (game['id'],)).fetchone():
+                return 'id'
+            if title_norm and self._conn.execute(
+                    "SELECT 1 FROM games WHERE title_norm = ? LIMIT 1", (title_norm,)).fetchone():
+                return 'title'
+            if iframe_url and self._conn.execute(
+                    "SELECT 1 FROM games WHERE iframe_url = ? LIMIT 1", (iframe_url,)).fetchone():
+                return 'iframe'
+        return None
+    
+    def add_new_games(self, games: List[Dict]) -> List[Dict]:
+        """过滤掉目录中已有或本批次内重复的游戏，其余一次性批量写入目录，返回新增的游戏"""
+        accepted = []
+        batch_keys = set()
+        for game in games:
+            _, _, title_norm, iframe_url, _, _, _ = self._row(game, 0)
+            keys = {('id', game['id']), ('title', title_norm), ('iframe', iframe_url)}
+            reason = self.find_duplicate(game) or next((kind for kind, value in keys if (kind, value) in batch_keys), None)
+            if reason:
+                logger.info(f"🗃️ 跳过已收录的游戏（{reason}）: {game['title']}")
+                continue
+            batch_keys.update((kind, value) for kind, value in keys if value)
+            accepted.append(game)
+        
+        if accepted:
+            self.upsert_many(accepted)
+        logger.info(f"🗃️ 新增 {len(accepted)}/{len(games)} 个游戏，目录共 {self.count()} 个")
+        return accepted
+    
+    def category_counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT category_id, COUNT(*) FROM games GROUP BY category_id").fetchall()
+        return dict(rows)
+    
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+
+# ========================================================================================
+# 🔗 近似去重 - 规范化URL + 标题MinHash/LSH，找出标题写法不同或URL参数不同的同一游戏
+# ========================================================================================
+
+class NearDuplicateDetector:
+    """把疑似同一游戏的条目聚成簇
+    
+    1. game_url_key() 相同的iframe URL或去掉通用词的标题完全相同 → 直接合并
+    2. 标题字符3-gram的MinHash签名按LSH分桶，同桶的候选再用精确Jaccard相似度确认
+    签名只在同桶内比较，整体是近线性的，不做两两比较。
+    """
+    
+    _MERSENNE_PRIME = (1 << 61) - 1
+    
+    def __init__(self, threshold: float = None, num_perm: int = None, bands: int = None):
+        self.threshold = threshold if threshold is not None else Config.DEDUP_TITLE_THRESHOLD
+        self.num_perm = num_perm or Config.DEDUP_NUM_PERM
+        self.bands = bands or Config.DEDUP_LSH_BANDS
+        if self.num_perm % self.bands:
+            raise ValueError(f"DEDUP_NUM_PERM ({self.num_perm}) 必须是 DEDUP_LSH_BANDS ({self.bands}) 的整数倍")
+        self.rows = self.num_perm // self.bands
+        self.stopwords = set(Config.DEDUP_TITLE_STOPWORDS)
+        
+        rng = random.Random(1)  # 固定种子，签名在多次运行间保持一致
+        self._perms = [(rng.randrange(1, self._MERSENNE_PRIME), rng.randrange(0, self._MERSENNE_PRIME))
+                       for _ in range(self.num_perm)]
+        self._shingle_cache: Dict[str, tuple] = {}
+    
+    def title_key(self, title: str) -> str:
+        """规范化标题并去掉 game/play/online 这类通用词"""
+        words = KnownGameIndex.normalize_title(title or '').split()
+        kept = [word for word in words if word not in self.stopwords]
+        return ' '.join(kept or words)
+    
+    @staticmethod
+    def shingles(text: str) -> set:
+        padded = f" {text} "
+        return {padded[i:i + 3] for i in range(max(1, len(padded) - 2))}
+    
+    def _permuted(self, shingle: str) -> tuple:
+        """每个3-gram在所有排列下的哈希值（3-gram数量有限，缓存后复用）"""
+        values = self._shingle_cache.get(shingle)
+        if values is None:
+            h = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+            values = tuple((a * h + b) % self._MERSENNE_PRIME for a, b in self._perms)
+            self._shingle_cache[shingle] = values
+        return values
+    
+    def signature(self, shingles: set) -> tuple:
+        return tuple(map(min, zip(*(self._permuted(shingle) for shingle in shingles))))
+    
+    @staticmethod
+    def jaccard(a: set, b: set) -> float:
+        return len(a & b) / len(a | b) if a and b else 0.0
+    
+    def find_clusters(self, games: List[Dict]) -> List[Dict[str, Any]]:
+        """返回合并的簇：{'keep': 索引, 'merged': [(索引, 原因, 标题相似度), ...]}，保留每簇最靠前的游戏"""
+        parent = list(range(len(games)))
+        link_reason: Dict[int, str] = {}
+        
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+        
+        def union(i, j, reason):
+            root_i, root_j = find(i), find(j)
+            if root_i == root_j:
+                return
+            if root_j < root_i:
+                root_i, root_j = root_j, root_i
+            parent[root_j] = root_i
+            link_reason.setdefault(max(i, j), reason)
+        
+        # 第一步：规范化URL和标题完全相同
+        title_keys = [self.title_key(game.get('title', '')) for game in games]
+        first_by_key: Dict[tuple, int] = {}
+        for i, game in enumerate(games):
+            url = game.get('iframeUrl') or game.get('staticPath', '')
+            for key in (('url', game_url_key(url)), ('title', title_keys[i])):
+                if not key[1]:
+                    continue
+                if key in first_by_key:
+                    union(first_by_key[key], i, key[0])
+                else:
+                    first_by_key[key] = i
+        
+        # 第二步：MinHash/LSH找相近标题，候选用精确Jaccard确认
+        # 标题中的数字也作为分桶键的一部分，数字不同（续作）的标题不会成为候选
+        shingle_sets = [self.shingles(key) for key in title_keys]
+        buckets: Dict[tuple, List[int]] = {}
+        for i, shingles in enumerate(shingle_sets):
+            if not title_keys[i]:
+                continue
+            signature = self.signature(shingles)
+            numbers = tuple(re.findall(r'\d+', title_keys[i]))
+            for band in range(self.bands):
+                band_key = (band, numbers, signature[band * self.rows:(band + 1) * self.rows])
+                buckets.setdefault(band_key, []).append(i)
+        
+        checked = set()
+        for members in buckets.values():
+            for position, i in enumerate(members):
+                for j in members[position + 1:]:
+                    if (i, j) in checked or find(i) == find(j):
+                        continue
+                    checked.add((i, j))
+                    if self.jaccard(shingle_sets[i], shingle_sets[j]) >= self.threshold:
+                        union(i, j, 'similar_title')
+        
+        groups: Dict[int, List[int]] = {}
+        for i in range(len(games)):
+            groups.setdefault(find(i), []).append(i)
+        
+        clusters = []
+        for root, members in groups.items():
+            if len(members) < 2:
+                continue
+            clusters.append({
+                'keep': root,
+                'merged': [(i, link_reason.get(i, 'similar_title'),
+                            round(self.jaccard(shingle_sets[root], shingle_sets[i]), 3))
+                           for i in members if i != root]
+            })
+        return clusters
+
+
+# ========================================================================================
+# 🧠 选择器学习 - 持久化每个站点检测到的CSS选择器，结构变化时重新检测
+# ========================================================================================
+
+class LearnedSelectorStore:
+    """保存自动检测到的 game_selector/title_selector，以及页面结构指纹和命中数量
+    
+    下次运行时结构指纹一致且命中数量没有明显下降就直接复用，否则重新检测。
+    """
+    
+    def __init__(self, store_file: str = None):
+        self.store_file = store_file or Config.LEARNED_SELECTORS_FILE
+        self._lock = threading.Lock()
+        try:
+            with open(self.store_file, 'r', encoding='utf-8') as f:
+                self._entries: Dict[str, Dict[str, Any]] = json.load(f)
+        except FileNotFoundError:
+            self._entries = {}
+        except Exception as e:
+            logger.warning(f"读取选择器记录失败，将重新检测: {e}")
+            self._entries = {}
+    
+    def lookup(self, site_name: str, soup: BeautifulSoup, fingerprint: str) -> Optional[Dict[str, str]]:
+        """返回仍然有效的选择器；结构指纹变化或命中数量下降时返回None"""
+        with self._lock:
+            entry = self._entries.get(site_name)
+        if not entry:
+            return None
+        
+        if entry['fingerprint'] != fingerprint:
+            logger.info(f"🧠 {site_name} 页面结构已变化，重新检测选择器")
+            return None
+        
+        current_yield = len(soup.select(entry['game_selector']))
+        if current_yield < max(3, entry['yield'] * Config.SELECTOR_MIN_YIELD_RATIO):
+            logger.info(f"🧠 {site_name} 选择器命中数下降 ({entry['yield']} → {current_yield})，重新检测")
+            return None
+        
+        logger.info(f"🧠 复用 {site_name} 已学习的选择器: game='{entry['game_selector']}', "
+                    f"title='{entry['title_selector']}'")
+        return {'game_selector': entry['game_selector'], 'title_selector': entry['title_selector']}
+    
+    def save(self, site_name: str, soup: BeautifulSoup, fingerprint: str, selectors: Dict[str, str]):
+        """记录检测结果"""
+        with self._lock:
+            self._entries[site_name] = {
+                'game_selector': selectors['game_selector'],
+                'title_selector': selectors['title_selector'],
+                'fingerprint': fingerprint,
+                'yield': len(soup.select(selectors['game_selector'])),
+                'updated_at': datetime.now().isoformat(timespec='seconds')
+            }
+            try:
+                atomic_write_json(self.store_file, self._entries)
+            except Exception as e:
+                logger.warning(f"保存选择器记录失败: {e}")
+
+
+# ========================================================================================
+# 🗄️ games.ts备份 - 按内容去重的压缩快照，按数量和时间清理
+# ========================================================================================
+
+class BackupStore:
+    """games.json / games.ts 的快照仓库
+    
+    快照以内容哈希命名并 gzip 压缩，内容相同的快照只保存一份；
+    index.json 按时间顺序记录快照，超过 BACKUP_MAX_COUNT 个或早于 BACKUP_MAX_AGE_DAYS 的旧快照会被清理
+    （最新的快照始终保留；从旧版备份文件导入的快照不按时间清理，否则导入后立刻就会被删掉）。
+    """
+    
+    def __init__(self, backup_dir: str = None):
+        self.backup_dir = backup_dir or Config.BACKUP_DIR
+        self.index_file = os.path.join(self.backup_dir, 'index.json')
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                self._entries: List[Dict[str, Any]] = json.load(f)
+        except FileNotFoundError:
+            self._entries = []
+        except Exception as e:
+            logger.warning(f"读取备份索引失败，将重新建立: {e}")
+            self._entries = []
+    
+    def _object_path(self, backup_id: str) -> str:
+        return os.path.join(self.backup_dir, f"{backup_id}.ts.gz")
+    
+    def snapshot(self, source_file: str, created_at: float = None) -> Optional[str]:
+        """保存文件当前内容，返回快照ID；与最新快照相同时不重复保存"""
+        try:
+            with open(source_file, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        
+        backup_id = hashlib.sha256(data).hexdigest()[:16]
+        if self._entries and self._entries[-1]['id'] == backup_id:
+            return backup_id
+        
+        # 内容曾经出现过（例如回滚后）时移动到最新位置
+        self._entries = [entry for entry in self._entries if entry['id'] != backup_id]
+        self._entries.append(self._store(backup_id, data, os.path.basename(source_file),
+                                         created_at if created_at is not None else time.time()))
+        self._prune()
+        atomic_write_json(self.index_file, self._entries)
+        return backup_id
+    
+    def _store(self, backup_id: str, data: bytes, file: str, created_at: float) -> Dict[str, Any]:
+        """写入压缩后的快照内容（已存在时跳过），返回索引记录"""
+        object_path = self._object_path(backup_id)
+        if not os.path.exists(object_path):
+            os.makedirs(self.backup_dir, exist_ok=True)
+            tmp_file = f"{object_path}.tmp"
+            with gzip.open(tmp_file, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_file, object_path)
+        return {
+            'id': backup_id,
+            'file': file,
+            'created_at': created_at,
+            'size': len(data),
+            'stored_size': os.path.getsize(object_path)
+        }
+    
+    def _prune(self):
+        """按数量和时间清理旧快照，删除不再被引用的文件"""
+        cutoff = time.time() - Config.BACKUP_MAX_AGE_DAYS * 24 * 3600
+        latest = self._entries[-1:]
+        kept = [entry for entry in self._entries[:-1] if entry['created_at'] >= cutoff or entry.get('legacy')]
+        kept = kept[-(Config.BACKUP_MAX_COUNT - 1):] if Config.BACKUP_MAX_COUNT > 1 else []
+        kept += latest
+        
+        kept_ids = {entry['id'] for entry in kept}
+        for entry in self._entries:
+            if entry['id'] not in kept_ids:
+                try:
+                    os.remove(self._object_path(entry['id']))
+                except FileNotFoundError:
+                    pass
+        self._entries = kept
+    
+    def list(self) -> List[Dict[str, Any]]:
+        """按时间从新到旧返回快照记录"""
+        return list(reversed(self._entries))
+    
+    def resolve(self, backup_id: str) -> Optional[Dict[str, Any]]:
+        """支持ID前缀，唯一匹配时返回快照记录"""
+        matches = [entry for entry in self._entries if entry['id'].startswith(backup_id)]
+        return matches[0] if len(matches) == 1 else None
+    
+    def restore(self, backup_id: str, target_dir: str) -> Optional[str]:
+        """把快照恢复到 target_dir 下的原文件名，返回恢复的文件路径；恢复前先保存当前内容，方便再次回滚"""
+        entry = self.resolve(backup_id)
+        if not entry:
+            logger.error(f"找不到唯一匹配的备份: {backup_id}")
+            return None
+        full_id = entry['id']
+        # 旧版本导入时记录的是 games.ts.backup.<时间戳>，恢复目标仍是 games.ts
+        target_name = re.sub(r'\.backup\.\d+$', '', entry.get('file', 'games.ts'))
+        target_file = os.path.join(target_dir, target_name)
+        
+        with gzip.open(self._object_path(full_id), 'rb') as f:
+            data = f.read()
+        if hashlib.sha256(data).hexdigest()[:16] != full_id:
+            logger.error(f"备份 {full_id} 内容校验失败")
+            return None
+        
+        current_id = self.snapshot(target_file)
+        atomic_write_text(target_file, data.decode('utf-8'))
+        logger.info(f"♻️ 已恢复备份 {full_id} 到 {os.path.basename(target_file)}（恢复前的内容保存为 {current_id}）")
+        return target_file
+    
+    def import_legacy(self, source_file: str) -> int:
+        """把旧版 games.ts.backup.<时间戳> 文件导入快照仓库，返回导入数量
+        
+        先全部导入再统一清理一次；只删除快照仍保留在索引中的旧文件（超出 BACKUP_MAX_COUNT 被清理的保留原文件）。
+        """
+        pattern = re.compile(re.escape(os.path.basename(source_file)) + r'\.backup\.(\d+)$')
+        directory = os.path.dirname(source_file)
+        legacy = []
+        for name in os.listdir(directory):
+            match = pattern.match(name)
+            if match:
+                legacy.append((int(match.group(1)), os.path.join(directory, name)))
+        
+        imported = {}
+        known_ids = {entry['id'] for entry in self._entries}
+        for timestamp, path in sorted(legacy):
+            with open(path, 'rb') as f:
+                data = f.read()
+            backup_id = hashlib.sha256(data).hexdigest()[:16]
+            imported[path] = backup_id
+            if backup_id in known_ids:
+                continue
+            entry = self._store(backup_id, data, os.path.basename(source_file), timestamp)
+            entry['legacy'] = True
+            self._entries.append(entry)
+            known_ids.add(backup_id)
+        
+        # 导入的旧快照排在最新快照之前
+        self._entries.sort(key=lambda entry: entry['created_at'])
+        self._prune()
+        atomic_write_json(self.index_file, self._entries)
+        
+        kept_ids = {entry['id'] for entry in self._entries}
+        removed = 0
+        for path, backup_id in imported.items():
+            if backup_id in kept_ids:
+                os.remove(path)
+                removed += 1
+            else:
+                logger.warning(f"⚠️ {os.path.basename(path)} 超出 BACKUP_MAX_COUNT 未保留，原文件不删除")
+        return removed
+
+
+# ========================================================================================
+# 🎨 缩略图生成功能 - 集成到GameManager中
+# ========================================================================================
+
+# 变体格式 → (PIL格式名, 扩展名, 编码参数)
+THUMBNAIL_ENCODERS = {
+    'avif': ('AVIF', 'avif', {'speed': 6}),
+    'webp': ('WEBP', 'webp', {'method': 6}),
+    'jpeg': ('JPEG', 'jpg', {'optimize': True, 'progressive': True}),
+}
+# 变体文件名：<原文件名>-<宽度>w.<扩展名>
+THUMBNAIL_VARIANT_RE = re.compile(r'-\d+w\.(?:avif|webp|jpg)$')
+
+# 标题下的半透明黑色覆盖层（alpha 80）等价于每个通道乘以 175/255，用查找表一次完成
+THUMBNAIL_OVERLAY_ALPHA = 80
+_THUMBNAIL_OVERLAY_LUT = [(value * (255 - THUMBNAIL_OVERLAY_ALPHA) + 127) // 255 for value in range(256)] * 3
+
+
+class ThumbnailGenerator:
+    """缩略图生成器"""
+    
+    GRADIENT_DIRECTIONS = ('vertical', 'horizontal', 'diagonal', 'radial')
+    
+    # 绘制逻辑或主题变化时加1，之前生成的缩略图会在下次 fix-thumbnails 时重新生成
+    RENDER_VERSION = 2
+    
+    # thumbnail 字段指向的基础缩略图尺寸（绘制时的字号、装饰尺寸都以它为基准缩放）
+    BASE_WIDTH = 300
+    BASE_HEIGHT = 200
+    
+    # 预定义的颜色主题
+    COLOR_THEMES = [
+        {'primary': (52, 152, 219), 'secondary': (155, 89, 182)},
+        {'primary': (46, 204, 113), 'secondary': (52, 152, 219)},
+        {'primary': (230, 126, 34), 'secondary': (231, 76, 60)},
+        {'primary': (155, 89, 182), 'secondary': (52, 73, 94)},
+        {'primary': (231, 76, 60), 'secondary': (192, 57, 43)},
+        {'primary': (26, 188, 156), 'secondary': (22, 160, 133)},
+        {'primary': (241, 196, 15), 'secondary': (230, 126, 34)},
+        {'primary': (52, 73, 94), 'secondary': (44, 62, 80)},
+    ]
+    
+    # 依次尝试的字体：Windows系统字体、Linux系统字体，都没有时用PIL默认字体
+    FONT_CANDIDATES = ('arial.ttf', '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf')
+    
+    def __init__(self, thumbnails_dir):
+        self.thumbnails_dir = thumbnails_dir
+        self._gradient_masks = {}
+        self._gradient_templates = {}
+        self._fonts = {}
+        os.makedirs(thumbnails_dir, exist_ok=True)
+    
+    def _font(self, size):
+        """按字号缓存的字体，只在第一次使用该字号时查找字体文件"""
+        font = self._fonts.get(size)
+        if font is None:
+            for candidate in self.FONT_CANDIDATES:
+                try:
+                    font = ImageFont.truetype(candidate, size)
+                    break
+                except OSError:
+                    continue
+            else:
+                font = ImageFont.load_default()
+            self._fonts[size] = font
+        return font
+    
+    def _gradient_template(self, theme_index, width, height, direction):
+        """已叠加覆盖层的主题渐变底图，按主题、尺寸和方向缓存（使用时需copy）"""
+        key = (theme_index, width, height, direction)
+        template = self._gradient_templates.get(key)
+        if template is None:
+            theme = self.COLOR_THEMES[theme_index]
+            template = self.generate_gradient_background(width, height, theme['primary'], theme['secondary'], direction)
+            template = template.point(_THUMBNAIL_OVERLAY_LUT)
+            self._gradient_templates[key] = template
+        return template
+    
+    def generate_gradient_background(self, width, height, color1, color2, direction='vertical'):
+        """生成渐变背景（vertical/horizontal/diagonal/radial），color1 在起点（上/左/左上/中心）"""
+        if not PIL_AVAILABLE:
+            return None
+        
+        mask = self._gradient_mask(width, height, direction)
+        size = (width, height)
+        return Image.composite(Image.new('RGB', size, color2), Image.new('RGB', size, color1), mask)
+    
+    def _gradient_mask(self, width, height, direction):
+        """0→255 的灰度渐变蒙版，由PIL内置的256x256渐变缩放得到，按尺寸和方向缓存"""
+        key = (width, height, direction)
+        mask = self._gradient_masks.get(key)
+        if mask is not None:
+            return mask
+        
+        size = (width, height)
+        if direction == 'horizontal':
+            mask = Image.linear_gradient('L').transpose(Image.Transpose.TRANSPOSE).resize(size, Image.BILINEAR)
+        elif direction == 'diagonal':
+            # 垂直和水平渐变取平均：左上角0，右下角255
+            mask = ImageChops.add(self._gradient_mask(width, height, 'vertical'),
+                                  self._gradient_mask(width, height, 'horizontal'), scale=2)
+        elif direction == 'radial':
+            # PIL的径向渐变在四个角正好到255，拉伸后成为贴合画布的椭圆
+            mask = Image.radial_gradient('L').resize(size, Image.BILINEAR)
+        elif direction == 'vertical':
+            mask = Image.linear_gradient('L').resize(size, Image.BILINEAR)
+        else:
+            raise ValueError(f"未知的渐变方向: {direction}")
+        
+        self._gradient_masks[key] = mask
+        return mask
+    
+    def generate_geometric_pattern(self, width, height, base_color, rng=None):
+        """生成几何图案背景（rng 为随机数来源，默认使用全局 random）"""
+        if not PIL_AVAILABLE:
+            return None
+        rng = rng or random
+            
+        image = Image.new('RGB', (width, height), base_color)
+        draw = ImageDraw.Draw(image)
+        scale = width / self.BASE_WIDTH
+        size = lambda value: max(1, round(value * scale))
+        
+        # 随机几何图案
+        patterns = ['circles', 'triangles', 'rectangles', 'lines']
+        pattern = rng.choice(patterns)
+        
+        # 生成亮色和暗色变体
+        r, g, b = base_color
+        light_color = (min(255, r + 40), min(255, g + 40), min(255, b + 40))
+        dark_color = (max(0, r - 40), max(0, g - 40), max(0, b - 40))
+        
+        if pattern == 'circles':
+            for _ in range(8):
+                x = rng.randint(0, width)
+                y = rng.randint(0, height)
+                radius = rng.randint(size(20), size(60))
+                color = rng.choice([light_color, dark_color])
+                draw.ellipse([x-radius, y-radius, x+radius, y+radius], 
+                            fill=color, outline=None)
+        
+        elif pattern == 'triangles':
+            for _ in range(6):
+                points = []
+                for _ in range(3):
+                    points.append((rng.randint(0, width), rng.randint(0, height)))
+                color = rng.choice([light_color, dark_color])
+                draw.polygon(points, fill=color)
+        
+        elif pattern == 'rectangles':
+            for _ in range(10):
+                x1 = rng.randint(0, width//2)
+                y1 = rng.randint(0, height//2)
+                x2 = x1 + rng.randint(size(30), size(80))
+                y2 = y1 + rng.randint(size(20), size(60))
+                color = rng.choice([light_color, dark_color])
+                draw.rectangle([x1, y1, x2, y2], fill=color)
+        
+        elif pattern == 'lines':
+            for _ in range(15):
+                x1 = rng.randint(0, width)
+                y1 = rng.randint(0, height)
+                x2 = rng.randint(0, width)
+                y2 = rng.randint(0, height)
+                color = rng.choice([light_color, dark_color])
+                draw.line([x1, y1, x2, y2], fill=color, width=rng.randint(size(2), size(8)))
+        
+        return image
+    
+    def create_game_thumbnail(self, title, style='gradient', width=300, height=200, direction='vertical', rng=None):
+        """创建游戏缩略图（rng 为随机数来源，默认使用全局 random）"""
+        if not PIL_AVAILABLE:
+            logger.warning("PIL不可用，无法生成缩略图")
+            return None
+        rng = rng or random
+        
+        theme_index = rng.randrange(len(self.COLOR_THEMES))
+        theme = self.COLOR_THEMES[theme_index]
+        
+        if style == 'gradient':
+            image = self._gradient_template(theme_index, width, height, direction).copy()
+        else:
+            image = self.generate_geometric_pattern(width, height, theme['primary'], rng)
+            if image:
+                image = image.point(_THUMBNAIL_OVERLAY_LUT)
+        
+        if not image:
+            return None
+        
+        draw = ImageDraw.Draw(image)
+        scale = width / self.BASE_WIDTH
+        font_large = self._font(round(24 * scale))
+        
+        # 处理标题文字
+        if len(title) > 20:
+            title = title[:17] + "..."
+        
+        # 获取文字颜色
+        text_color = (255, 255, 255)  # 白色文字在深色覆盖层上
+        
+        # 计算文字位置（居中）
+        bbox = draw.textbbox((0, 0), title, font=font_large)
+        text_width = bbox[2] - bbox[0]
+        text_height = bbox[3] - bbox[1]
+        
+        text_x = (width - text_width) // 2
+        text_y = (height - text_height) // 2
+        
+        # 添加文字阴影
+        shadow_offset = max(1, round(2 * scale))
+        draw.text((text_x + shadow_offset, text_y + shadow_offset), title, 
+                 fill=(0, 0, 0), font=font_large)
+        
+        # 添加主文字
+        draw.text((text_x, text_y), title, fill=text_color, font=font_large)
+        
+        # 添加装饰元素
+        if rng.choice([True, False]):
+            # 添加小图标或装饰
+            icon_size = round(20 * scale)
+            icon_margin = round(10 * scale)
+            icon_inset = round(4 * scale)
+            icon_x = width - icon_size - icon_margin
+            icon_y = icon_margin
+            
+            # 简单的游戏手柄图标
+            draw.ellipse([icon_x, icon_y, icon_x + icon_size, icon_y + icon_size], 
+                        fill=text_color, outline=None)
+            draw.ellipse([icon_x + icon_inset, icon_y + icon_inset,
+                          icon_x + icon_size - icon_inset, icon_y + icon_size - icon_inset], 
+                        fill=theme['primary'], outline=None)
+        
+        return image
+    
+    def save_thumbnail(self, image, filename):
+        """保存缩略图"""
+        if not image:
+            return False
+            
+        filepath = os.path.join(self.thumbnails_dir, filename)
+        try:
+            image.save(filepath, 'JPEG', quality=90, optimize=True)
+            return True
+        except Exception as e:
+            logger.error(f"保存缩略图失败 {filename}: {e}")
+            return False
+    
+    def variant_formats(self) -> List[str]:
+        """配置的变体格式中当前Pillow能编码的"""
+        Image.init()
+        return [fmt for fmt in Config.THUMBNAIL_VARIANT_FORMATS
+                if fmt in THUMBNAIL_ENCODERS and THUMBNAIL_ENCODERS[fmt][0] in Image.SAVE]
+    
+    def variant_widths(self, source_width: int) -> List[int]:
+        """不超过原图宽度的变体宽度（不放大），再加上原图宽度本身（不超过最大配置宽度）作为最大的一档
+        
+        例如已有的300px缩略图得到 160w 和 300w 两档，而不是只有 160w（桌面端卡片会显示模糊的小图）。
+        """
+        widths = {w for w in Config.THUMBNAIL_VARIANT_WIDTHS if w <= source_width}
+        widths.add(min(source_width, max(Config.THUMBNAIL_VARIANT_WIDTHS)))
+        return sorted(widths)
+    
+    def save_variants(self, image, stem: str) -> Dict[str, str]:
+        """把图片缩放成各个变体宽度、按各个格式编码保存，返回 {格式: srcset}"""
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        
+        formats = self.variant_formats()
+        entries: Dict[str, List[str]] = {fmt: [] for fmt in formats}
+        for width in self.variant_widths(image.width):
+            height = max(1, round(image.height * width / image.width))
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS, reducing_gap=3.0)
+            for fmt in formats:
+                pil_format, extension, options = THUMBNAIL_ENCODERS[fmt]
+                options = dict(options, quality=Config.THUMBNAIL_QUALITY.get(fmt, 80))
+                if fmt == 'jpeg' and width <= 320:
+                    options['subsampling'] = 0  # 小图不做色度抽样，彩色文字边缘更清晰
+                filename = f"{stem}-{width}w.{extension}"
+                resized.save(os.path.join(self.thumbnails_dir, filename), pil_format, **options)
+                entries[fmt].append(f"/games/thumbnails/{filename} {width}w")
+        return {fmt: ', '.join(srcset) for fmt, srcset in entries.items()}
+    
+    def encode_file(self, filename: str, force: bool = False) -> Optional[Dict[str, str]]:
+        """为 thumbnails 目录中已有的图片生成变体；变体都比原图新时不重新编码，只返回 srcset"""
+        source = os.path.join(self.thumbnails_dir, filename)
+        stem = os.path.splitext(filename)[0]
+        try:
+            with Image.open(source) as image:
+                if not force:
+                    variants = self._existing_variants(stem, image.width, os.path.getmtime(source))
+                    if variants:
+                        return variants
+                image.load()
+                return self.save_variants(image, stem)
+        except Exception as e:
+            logger.warning(f"⚠️ 缩略图变体编码失败 {filename}: {e}")
+            return None
+    
+    def _existing_variants(self, stem: str, source_width: int, source_mtime: float) -> Optional[Dict[str, str]]:
+        variants = {}
+        for fmt in self.variant_formats():
+            extension = THUMBNAIL_ENCODERS[fmt][1]
+            srcset = []
+            for width in self.variant_widths(source_width):
+                filename = f"{stem}-{width}w.{extension}"
+                path = os.path.join(self.thumbnails_dir, filename)
+                if not os.path.exists(path) or os.path.getmtime(path) < source_mtime:
+                    return None
+                srcset.append(f"/games/thumbnails/{filename} {width}w")
+            variants[fmt] = ', '.join(srcset)
+        return variants
+    
+    @classmethod
+    def render_key(cls, game_id, game_title) -> str:
+        """决定缩略图内容的全部参数的哈希；相同则重新生成的图片完全一样，可以跳过"""
+        params = json.dumps([cls.RENDER_VERSION, game_id, game_title, cls.BASE_WIDTH, cls.BASE_HEIGHT,
+                             sorted(Config.THUMBNAIL_VARIANT_WIDTHS), Config.THUMBNAIL_VARIANT_FORMATS,
+                             Config.THUMBNAIL_QUALITY], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(params.encode('utf-8')).hexdigest()[:16]
+    
+    @staticmethod
+    def game_rng(game_id, game_title) -> random.Random:
+        """由游戏ID和标题播种的随机数，同一个游戏每次得到相同的主题、样式和装饰"""
+        digest = hashlib.sha256(f"{game_id}\n{game_title}".encode('utf-8')).digest()
+        return random.Random(int.from_bytes(digest[:8], 'big'))
+    
+    def generate_for_game(self, game_title, game_id) -> Dict[str, Any]:
+        """为特定游戏生成缩略图，返回 {'thumbnail': 路径, 'thumbnailVariants': {格式: srcset}}
+        
+        按最大的变体宽度绘制一次，基础缩略图和各个变体都由它缩小得到。
+        """
+        rng = self.game_rng(game_id, game_title)
+        style = rng.choice(['gradient', 'geometric'])
+        direction = rng.choice(self.GRADIENT_DIRECTIONS)
+        width = max([self.BASE_WIDTH] + list(Config.THUMBNAIL_VARIANT_WIDTHS))
+        height = round(width * self.BASE_HEIGHT / self.BASE_WIDTH)
+        image = self.create_game_thumbnail(game_title, style, width, height, direction=direction, rng=rng)
+        
+        if image:
+            result = self._save_with_variants(image, game_id)
+            if result:
+                return result
+        
+        return {'thumbnail': '/games/thumbnails/default.jpg'}
+    
+    def save_cover(self, image, stem: str) -> Optional[Dict[str, Any]]:
+        """把下载的封面居中裁剪成缩略图比例，保存基础缩略图和变体，返回格式同 generate_for_game"""
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        width = min(image.width, max([self.BASE_WIDTH] + list(Config.THUMBNAIL_VARIANT_WIDTHS)))
+        height = round(width * self.BASE_HEIGHT / self.BASE_WIDTH)
+        return self._save_with_variants(ImageOps.fit(image, (width, height), Image.LANCZOS), stem)
+    
+    def _save_with_variants(self, image, stem: str) -> Optional[Dict[str, Any]]:
+        """由同一张大图缩放出 thumbnail 指向的基础缩略图和各个变体"""
+        filename = f"{stem}.jpg"
+        base = image
+        if image.size != (self.BASE_WIDTH, self.BASE_HEIGHT):
+            base = image.resize((self.BASE_WIDTH, self.BASE_HEIGHT), Image.LANCZOS, reducing_gap=3.0)
+        if not self.save_thumbnail(base, filename):
+            return None
+        
+        result = {'thumbnail': f'/games/thumbnails/{filename}'}
+        try:
+            result['thumbnailVariants'] = self.save_variants(image, stem)
+        except Exception as e:
+            logger.warning(f"⚠️ 缩略图变体保存失败 {stem}: {e}")
+        return result
+    
+    def generate_batch(self, jobs: List[Tuple[str, str]], workers: int = 0) -> Dict[str, Dict[str, Any]]:
+        """批量生成缩略图，jobs 为 [(game_id, title)]，返回 {game_id: generate_for_game 的结果}"""
+        return self._run_batch('generate_for_game', [(game_id, (title, game_id)) for game_id, title in jobs],
+                               workers, '缩略图')
+    
+    def encode_batch(self, filenames: List[str], workers: int = 0, force: bool = False) -> Dict[str, Optional[Dict[str, str]]]:
+        """批量为已有图片生成变体，返回 {文件名: {格式: srcset}}（失败为None）"""
+        return self._run_batch('encode_file', [(filename, (filename, force)) for filename in filenames],
+                               workers, '变体编码')
+    
+    def _run_batch(self, method: str, jobs: List[Tuple[str, tuple]], workers: int, label: str) -> Dict[str, Any]:
+        """对每个 (key, args) 调用 self.<method>(*args)，返回 {key: 结果}
+        
+        workers > 1 时在进程池中渲染和编码（每个进程一个生成器），进程池不可用时退回单进程。
+        """
+        results: Dict[str, Any] = {}
+        total = len(jobs)
+        if not total:
+            return results
+        workers = min(workers or os.cpu_count() or 1, total)
+        started = time.perf_counter()
+        progress_step = max(1, total // 10)
+        
+        def record(key, result):
+            results[key] = result
+            done = len(results)
+            if done % progress_step == 0 or done == total:
+                rate = done / max(time.perf_counter() - started, 1e-6)
+                logger.info(f"🎨 {label}进度 {done}/{total}（{rate:.1f} 张/秒）")
+        
+        if workers > 1:
+            try:
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_thumbnail_worker,
+                                         initargs=(self.thumbnails_dir,)) as executor:
+                    chunksize = max(1, min(50, total // (workers * 4)))
+                    calls = [(method, key, args) for key, args in jobs]
+                    for key, result in executor.map(_run_thumbnail_job, calls, chunksize=chunksize):
+                        record(key, result)
+                return results
+            except (OSError, BrokenProcessPool) as e:
+                logger.warning(f"⚠️ 多进程{label}失败，改为单进程: {e}")
+        
+        for key, args in jobs:
+            if key not in results:
+                record(key, getattr(self, method)(*args))
+        return results
+
+
+# 进程池中每个工作进程的生成器（由 _init_thumbnail_worker 创建）
+_worker_thumbnail_generator: Optional[ThumbnailGenerator] = None
+
+
+def _init_thumbnail_worker(thumbnails_dir: str):
+    global _worker_thumbnail_generator
+    _worker_thumbnail_generator = ThumbnailGenerator(thumbnails_dir)
+
+
+def _run_thumbnail_job(call: Tuple[str, str, tuple]) -> Tuple[str, Any]:
+    method, key, args = call
+    return key, getattr(_worker_thumbnail_generator, method)(*args)
+
+
+class ThumbnailManifest:
+    """记录脚本生成的每个缩略图及其渲染参数哈希（ThumbnailGenerator.render_key）
+    
+    哈希不变的缩略图直接跳过；标题等参数变化时重新生成。不在清单中的缩略图文件
+    不是脚本生成的（手动放置或早期生成），不会被覆盖。
+    """
+    
+    def __init__(self, manifest_file: str = None):
+        self.manifest_file = manifest_file or Config.THUMBNAIL_MANIFEST_FILE
+        self._dirty = False
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                self._entries: Dict[str, Dict[str, Any]] = json.load(f)
+        except FileNotFoundError:
+            self._entries = {}
+        except Exception as e:
+            logger.warning(f"读取缩略图清单失败，已生成的缩略图将不会被更新: {e}")
+            self._entries = {}
+    
+    def get(self, game_id: str) -> Optional[Dict[str, Any]]:
+        return self._entries.get(game_id)
+    
+    def record(self, game_id: str, filename: str, render_key: str, variants: Optional[Dict[str, str]] = None):
+        self._entries[game_id] = {
+            'file': filename,
+            'render_key': render_key,
+            'variants': variants or {},
+            'generated_at': datetime.now().isoformat(timespec='seconds')
+        }
+        self._dirty = True
+    
+    def save(self):
+        if not self._dirty:
+            return
+        try:
+            atomic_write_json(self.manifest_file, self._entries)
+            self._dirty = False
+        except Exception as e:
+            logger.warning(f"保存缩略图清单失败: {e}")
+
+
+def dhash(image, hash_size: int = 8) -> int:
+    """差值感知哈希：缩成 (hash_size+1)×hash_size 灰度图，每一位表示像素是否比右边的亮"""
+    small = image.convert('L').resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = small.tobytes()
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+class CoverHashIndex:
+    """已保存封面的 dHash 索引
+    
+    镜像站点上的同一张封面往往尺寸、压缩质量不同，字节不同但 dHash 只差几位；
+    新封面与已有封面的汉明距离不超过 COVER_DHASH_DISTANCE 时直接复用已有文件。
+    """
+    
+    def __init__(self, index_file: str = None):
+        self.index_file = index_file or Config.COVER_HASHES_FILE
+        self._dirty = False
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                self._entries: Dict[str, Dict[str, Any]] = json.load(f)
+        except FileNotFoundError:
+            self._entries = {}
+        except Exception as e:
+            logger.warning(f"读取封面哈希索引失败，将重新建立: {e}")
+            self._entries = {}
+        self._hashes = {thumbnail: int(entry['dhash'], 16) for thumbnail, entry in self._entries.items()}
+    
+    def find(self, image_hash: int, max_distance: int) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """距离最近且不超过 max_distance 的已保存封面 (thumbnail, entry)，文件已被删除的忽略"""
+        best = None
+        for thumbnail, known_hash in self._hashes.items():
+            distance = bin(image_hash ^ known_hash).count('1')
+            if distance <= max_distance and (best is None or distance < best[0]):
+                best = (distance, thumbnail)
+        if best is None:
+            return None
+        thumbnail = best[1]
+        if not os.path.exists(os.path.join(THUMBNAILS_DIR, os.path.basename(thumbnail))):
+            self._entries.pop(thumbnail, None)
+            self._hashes.pop(thumbnail, None)
+            self._dirty = True
+            return self.find(image_hash, max_distance)
+        return thumbnail, self._entries[thumbnail]
+    
+    def get(self, thumbnail: Optional[str]) -> Optional[Dict[str, Any]]:
+        """thumbnail 是已保存的封面且文件仍存在时返回其记录"""
+        entry = self._entries.get(thumbnail)
+        if entry and os.path.exists(os.path.join(THUMBNAILS_DIR, os.path.basename(thumbnail))):
+            return entry
+        return None
+    
+    def add(self, thumbnail: str, image_hash: int, source_url: str, variants: Optional[Dict[str, str]] = None):
+        self._entries[thumbnail] = {
+            'dhash': f"{image_hash:016x}",
+            'source': source_url,
+            'variants': variants or {}
+        }
+        self._hashes[thumbnail] = image_hash
+        self._dirty = True
+    
+    def save(self):
+        if not self._dirty:
+            return
+        try:
+            atomic_write_json(self.index_file, self._entries)
+            self._dirty = False
+        except Exception as e:
+            logger.warning(f"保存封面哈希索引失败: {e}")
+
 
 class GameManager:
     """统一的游戏管理器"""
     
     def __init__(self):
+        ensure_global_proxy()
         self.session = requests.Session()
         
         # 确保目录存在
@@ -646,7 +2824,7 @@ class GameManager:
         
         # 显示反爬虫策略状态
         logger.info("🛡️ 反爬虫策略已启用:")
-        logger.info("  - 智能延迟（GameJolt: 3-6s, itch.io: 2-4s）")
+        logger.info("  - 按域名令牌桶限流（各平台间隔见 PLATFORM_DELAYS）")
         logger.info("  - 特殊请求头（模拟真实浏览器）")
         logger.info("  - URL模式推断（应对403错误）")
         
@@ -655,31 +2833,68 @@ class GameManager:
             logger.info("🔒 严格白名单模式：只接受预定义的可信域名")
         else:
             logger.info("🤖 智能验证模式：白名单优先 + AI评分系统")
-            logger.info(f"  - 白名单域名: {len(EMBEDDABLE_DOMAINS)} 个")
+            logger.info(f"  - 白名单域名: {len(EMBEDDABLE_MATCHER)} 个")
             logger.info("  - 智能评分: 基于域名、路径、文件名等特征")
         
-        # 初始化请求延迟跟踪
-        self.last_request_time = {}
-        self.domain_request_count = {}
+        # 按域名限流（令牌桶）
+        self.rate_limiter = DomainRateLimiter()
+        
+        # 429自适应退避（只对触发限制的域名降速，状态跨运行保存）
+        self.backoff = AdaptiveBackoff()
         
-        # 跟踪429错误的域名（用于增加延迟）
-        self.rate_limited_domains = set()
+        # HTTP响应缓存（重复爬取时大多得到304）
+        self.http_cache = HttpCache() if Config.HTTP_CACHE_ENABLED else None
+        
+        # 爬取边界（断点续爬、跳过已处理的URL）
+        self.frontier = CrawlFrontier()
+        
+        # 已知游戏索引（首次爬取时从games.ts和爬取边界构建）
+        self._known_index = None
+        
+        # 游戏目录（games.json的SQLite索引，首次使用时打开）
+        self._catalog = None
+        
+        # 已学习的选择器（跨运行持久化）
+        self.selector_store = LearnedSelectorStore()
+        
+        # games.ts备份快照
+        self.backups = BackupStore()
+        
+        # 选择器检测结果缓存（按站点和页面结构指纹）及耗时统计
+        self._selector_cache: Dict[tuple, Dict[str, str]] = {}
+        self.selector_detection_stats: List[Dict[str, Any]] = []
         
         # 初始化缩略图生成器
         if PIL_AVAILABLE:
             self.thumbnail_generator = ThumbnailGenerator(THUMBNAILS_DIR)
+            self.thumbnail_manifest = ThumbnailManifest()
+            self.cover_index = CoverHashIndex()
             logger.info("✅ 缩略图生成器已启用")
         else:
             self.thumbnail_generator = None
+            self.thumbnail_manifest = None
+            self.cover_index = None
             logger.info("⚠️ PIL库未安装，缩略图生成功能不可用")
     
     @retry(stop=stop_after_attempt(3), 
            wait=wait_fixed(2),
            retry=retry_if_exception_type((RequestException, ConnectionError, Timeout)))
-    def _make_request(self, url, method='get', **kwargs):
-        """带重试机制的HTTP请求（使用全局代理）"""
+    def _make_request(self, url, method='get', cache=True, **kwargs):
+        """带重试机制的HTTP请求（使用全局代理，GET请求经过磁盘缓存，cache=False 时总是重新请求）"""
         headers = kwargs.pop('headers', get_random_headers())
         
+        # 只缓存不带查询参数的GET（API调用每次都重新请求）
+        cache_entry = None
+        use_cache = (cache and self.http_cache is not None and method.lower() == 'get'
+                     and not kwargs.get('params'))
+        if use_cache:
+            cache_entry = self.http_cache.lookup(url)
+            if cache_entry and cache_entry['fresh']:
+                logger.debug(f"💾 缓存命中: {url}")
+                return self.http_cache.to_response(cache_entry)
+            if cache_entry:
+                headers = {**headers, **self.http_cache.conditional_headers(cache_entry)}
+        
         # 智能延迟策略
         self._apply_smart_delay(url)
         
@@ -691,20 +2906,27 @@ class GameManager:
                 response = self.session.head(url, headers=headers, timeout=10, **kwargs)
             else:
                 response = self.session.get(url, headers=headers, timeout=15, **kwargs)
+            
+            if response.status_code == 304 and cache_entry:
+                self.backoff.record_success(rate_limit_key(url))
+                logger.debug(f"💾 304未修改: {url}")
+                return self.http_cache.revalidated(cache_entry)
+            
             response.raise_for_status()
+            self.backoff.record_success(rate_limit_key(url))
+            if use_cache:
+                self.http_cache.store(url, response)
             return response
         except requests.exceptions.HTTPError as e:
             # 特殊处理429错误（频率限制）
             if hasattr(e.response, 'status_code') and e.response.status_code == 429:
-                domain = urlparse(url).netloc
-                self.rate_limited_domains.add(domain)
-                logger.error(f"🚫 429错误！{domain} 请求过于频繁，已标记为高风险域名")
-                # 立即等待一段时间
-                logger.info("⏳ 立即休息30秒以避免继续触发限制...")
-                time.sleep(30)
+                domain = rate_limit_key(url)
+                delay = self.backoff.record_rate_limited(domain, e.response.headers.get('Retry-After'))
+                logger.error(f"🚫 429错误！{domain} 请求过于频繁，该域名暂停 {delay:.0f}s，"
+                             f"降速倍数 ×{self.backoff.get_penalty(domain):g}")
             # 特殊处理403错误（内容保护）
             elif hasattr(e.response, 'status_code') and e.response.status_code == 403:
-                domain = urlparse(url).netloc
+                domain = parse_url(url).netloc
                 logger.debug(f"🛡️ {domain} 403错误（内容保护），尝试使用推断URL")
             logger.warning(f"请求失败 {url}: {e}")
             raise
@@ -712,83 +2934,63 @@ class GameManager:
             logger.warning(f"请求失败 {url}: {e}")
             raise
     
+    @staticmethod
+    def _is_transient_error(error: Exception) -> bool:
+        """是否为暂时性网络错误（429、5xx、连接中断、超时），这类失败不应记为拒绝"""
+        if isinstance(error, RetryError) and error.last_attempt.failed:
+            error = error.last_attempt.exception()
+        if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+            return error.response.status_code == 429 or error.response.status_code >= 500
+        return isinstance(error, (Timeout, ConnectionError, RemoteDisconnected))
+    
     def _apply_smart_delay(self, url: str):
-        """智能延迟策略，根据域名和请求频率调整"""
-        parsed = urlparse(url)
-        domain = parsed.netloc
-        current_time = time.time()
-        
-        # 跟踪每个域名的请求次数
-        if domain not in self.domain_request_count:
-            self.domain_request_count[domain] = 0
-        self.domain_request_count[domain] += 1
-        
-        # 根据域名使用配置文件中的延迟策略
-        platform = 'default'
-        for platform_name in Config.PLATFORM_DELAYS.keys():
-            if platform_name != 'default' and platform_name in domain:
-                platform = platform_name
-                break
-        
-        min_delay, max_delay = Config.PLATFORM_DELAYS[platform]
-        logger.debug(f"🚦 [{platform}] 使用延迟: {min_delay}-{max_delay}s")
-        
-        # 如果请求过于频繁，增加延迟
-        request_count = self.domain_request_count[domain]
-        if request_count > 5:
-            min_delay *= 1.5
-            max_delay *= 1.5
-            logger.warning(f"⚠️ [{domain}] 请求频繁，延迟增加到 {min_delay:.1f}-{max_delay:.1f}s")
-        
-        # 检查是否有429错误历史，如果有则大幅增加延迟
-        if hasattr(self, 'rate_limited_domains') and domain in self.rate_limited_domains:
-            min_delay *= 2.0
-            max_delay *= 2.0
-            logger.warning(f"🚫 [{domain}] 检测到429错误历史，延迟增加到 {min_delay:.1f}-{max_delay:.1f}s")
-        
-        # 确保与上次请求的时间间隔
-        if domain in self.last_request_time:
-            elapsed = current_time - self.last_request_time[domain]
-            if elapsed < min_delay:
-                sleep_time = min_delay - elapsed + random.uniform(0, 1)
-                time.sleep(sleep_time)
+        """智能延迟策略：按域名令牌桶限流，只等待必要的间隔（同一平台的子域名共用额度）"""
+        domain = rate_limit_key(url)
         
-        # 记录请求时间
-        self.last_request_time[domain] = time.time()
+        # 429退避期间只让该域名的请求等待
+        blocked = self.backoff.wait_time(domain)
+        if blocked > 0:
+            logger.info(f"⏳ [{domain}] 429退避中，等待 {blocked:.0f}s")
+            time.sleep(blocked)
         
-        # 基础随机延迟
-        time.sleep(random.uniform(min_delay, max_delay))
+        # 有429历史的域名按退避倍数降低请求速率
+        self.rate_limiter.acquire(domain, self.backoff.get_penalty(domain))
+    
+    def _open_catalog(self) -> GameCatalog:
+        if self._catalog is None:
+            self._catalog = GameCatalog()
+        return self._catalog
     
     def read_games_file(self) -> List[Dict]:
-        """读取当前games.ts文件中的游戏数据"""
+        """读取游戏数据：优先读取规范存储games.json，还没有时从games.ts解析（首次写入时生成games.json）"""
+        if not os.path.exists(GAMES_JSON_FILE):
+            return self.read_games_ts()
+        
+        try:
+            with open(GAMES_JSON_FILE, 'r', encoding='utf-8') as f:
+                games = json.load(f)
+            logger.info(f"成功读取 {len(games)} 个游戏")
+            return games
+        except Exception as e:
+            logger.error(f"读取games.json文件失败: {e}")
+            return []
+    
+    def read_games_ts(self) -> List[Dict]:
+        """从games.ts源码中解析游戏数据"""
         try:
             with open(GAMES_DATA_FILE, 'r', encoding='utf-8') as f:
                 content = f.read()
             
             # 提取games数组
-            start_marker = 'export const games: Game[] = ['
-            end_marker = '];'
-            
-            start_idx = content.find(start_marker)
-            if start_idx == -1:
-                logger.error("找不到games数组开始标记")
-                return []
-            
-            start_idx += len(start_marker)
-            end_idx = content.find(end_marker, start_idx)
-            if end_idx == -1:
-                logger.error("找不到games数组结束标记")
+            located = self._locate_games_array(content)
+            if not located:
+                logger.error("找不到games数组")
                 return []
             
-            games_str = content[start_idx:end_idx].strip()
-            
             # 简单解析游戏对象
             games = []
-            game_objects = self._extract_game_objects(games_str)
-            
-            for game_obj in game_objects:
-                game_data = self._parse_game_object(game_obj)
-                if game_data:
+            for _, _, game_data in scan_ts_objects(content, *located):
+                if 'id' in game_data and 'title' in game_data:
                     games.append(game_data)
             
             logger.info(f"成功读取 {len(games)} 个游戏")
@@ -798,73 +3000,6 @@ class GameManager:
             logger.error(f"读取games.ts文件失败: {e}")
             return []
     
-    def _extract_game_objects(self, games_str: str) -> List[str]:
-        """提取游戏对象字符串"""
-        objects = []
-        depth = 0
-        current_obj = ""
-        
-        for char in games_str:
-            if char == '{':
-                if depth == 0:
-                    current_obj = "{"
-                else:
-                    current_obj += char
-                depth += 1
-            elif char == '}':
-                depth -= 1
-                current_obj += char
-                if depth == 0:
-                    objects.append(current_obj.strip())
-                    current_obj = ""
-            elif depth > 0:
-                current_obj += char
-        
-        return objects
-    
-    def _parse_game_object(self, obj_str: str) -> Optional[Dict]:
-        """解析单个游戏对象"""
-        try:
-            game = {}
-            
-            # 提取各个字段
-            patterns = {
-                'id': r"id:\s*['\"]([^'\"]+)['\"]",
-                'title': r"title:\s*['\"]([^'\"]+)['\"]",
-                'description': r"description:\s*['\"]([^'\"]+)['\"]",
-                'category': r"category:\s*['\"]([^'\"]+)['\"]",
-                'categoryId': r"categoryId:\s*['\"]([^'\"]+)['\"]",
-                'thumbnail': r"thumbnail:\s*['\"]([^'\"]+)['\"]",
-                'path': r"path:\s*['\"]([^'\"]+)['\"]",
-                'featured': r"featured:\s*(true|false)",
-                'type': r"type:\s*['\"]([^'\"]+)['\"]",
-                'iframeUrl': r"iframeUrl:\s*['\"]([^'\"]+)['\"]",
-                'staticPath': r"staticPath:\s*['\"]([^'\"]+)['\"]",
-                'addedAt': r"addedAt:\s*['\"]([^'\"]+)['\"]"
-            }
-            
-            for field, pattern in patterns.items():
-                match = re.search(pattern, obj_str)
-                if match:
-                    value = match.group(1)
-                    if field == 'featured':
-                        game[field] = value == 'true'
-                    else:
-                        game[field] = value
-            
-            # 提取tags数组
-            tags_match = re.search(r'tags:\s*\[(.*?)\]', obj_str, re.DOTALL)
-            if tags_match:
-                tags_str = tags_match.group(1)
-                tags = [tag.strip(' "\'') for tag in tags_str.split(',') if tag.strip(' "\'')]
-                game['tags'] = tags
-            
-            return game if 'id' in game and 'title' in game else None
-            
-        except Exception as e:
-            logger.warning(f"解析游戏对象失败: {e}")
-            return None
-    
     def clean_games(self) -> List[Dict]:
         """清理游戏数据，移除无效游戏"""
         games = self.read_games_file()
@@ -889,9 +3024,8 @@ class GameManager:
                     continue
                 
                 # 检查是否是可嵌入的域名
-                parsed = urlparse(game['iframeUrl'])
-                if not any(domain in parsed.netloc for domain in EMBEDDABLE_DOMAINS):
-                    logger.warning(f"域名不在白名单中: {parsed.netloc} - {title}")
+                if game['iframeUrl'] not in EMBEDDABLE_MATCHER:
+                    logger.warning(f"域名不在白名单中: {parse_url(game['iframeUrl']).netloc} - {title}")
                     continue
             
             elif game['type'] == 'static':
@@ -918,8 +3052,8 @@ class GameManager:
                 logger.info(f"移除重复标题: {game['title']}")
                 continue
             
-            # 检查URL重复
-            url_key = game.get('iframeUrl') or game.get('staticPath', '')
+            # 检查URL重复（http/https、结尾斜杠、跟踪参数、/embed 形式视为同一URL）
+            url_key = game_url_key(game.get('iframeUrl') or game.get('staticPath', ''))
             if url_key and url_key in seen_urls:
                 logger.info(f"移除重复URL: {game['title']}")
                 continue
@@ -930,9 +3064,66 @@ class GameManager:
             
             unique_games.append(game)
         
+        if Config.DEDUP_NEAR_ENABLED:
+            unique_games = self._remove_near_duplicates(unique_games)
+        
         logger.info(f"去重完成: {len(unique_games)}/{len(games)} 个唯一游戏")
         return unique_games
     
+    def merge_new_games(self, games: List[Dict], new_games: List[Dict]) -> List[Dict]:
+        """把爬到的新游戏合并到当前完整列表 games 之后
+        
+        目录先与 games 同步（clean/去重刚删掉的游戏不再参与比较），按ID/标题/iframe精确去重后，
+        再对合并结果做近似去重；只会去掉新游戏，已有游戏之间的近似重复留给 clean 处理。
+        """
+        catalog = self._open_catalog()
+        catalog.sync(games)
+        added = catalog.add_new_games(new_games)
+        merged = games + added
+        if added and Config.DEDUP_NEAR_ENABLED:
+            merged = self._remove_near_duplicates(merged, start=len(games))
+        return merged
+    
+    def _remove_near_duplicates(self, games: List[Dict], start: int = 0) -> List[Dict]:
+        """合并近似重复的游戏（每簇保留最靠前的一个），并输出合并报告；只移除位置 ≥ start 的游戏"""
+        clusters = NearDuplicateDetector().find_clusters(games)
+        if not clusters:
+            return games
+        
+        removed = set()
+        report = []
+        for cluster in clusters:
+            kept = games[cluster['keep']]
+            entry = {'kept': {key: kept.get(key) for key in ('id', 'title', 'iframeUrl')}, 'merged': []}
+            for index, reason, similarity in cluster['merged']:
+                if index < start:
+                    continue
+                game = games[index]
+                removed.add(index)
+                logger.info(f"🔗 合并近似重复（{reason}, 相似度 {similarity}）: {game['title']} → {kept['title']}")
+                entry['merged'].append({**{key: game.get(key) for key in ('id', 'title', 'iframeUrl')},
+                                        'reason': reason, 'similarity': similarity})
+            if entry['merged']:
+                report.append(entry)
+        
+        if not removed:
+            return games
+        if Config.DEDUP_REPORT:
+            report_file = os.path.join(Config.REPORTS_DIR, f"dedup_clusters_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+            try:
+                atomic_write_json(report_file, {
+                    'generated_at': datetime.now().isoformat(timespec='seconds'),
+                    'threshold': Config.DEDUP_TITLE_THRESHOLD,
+                    'total_games': len(games),
+                    'removed': len(removed),
+                    'clusters': report
+                })
+                logger.info(f"🔗 近似去重报告: {report_file}")
+            except Exception as e:
+                logger.warning(f"写入近似去重报告失败: {e}")
+        
+        return [game for i, game in enumerate(games) if i not in removed]
+    
     def fix_thumbnails(self, games: List[Dict]) -> List[Dict]:
         """修复游戏封面，自动生成或分配合适的缩略图"""
         try:
@@ -942,13 +3133,17 @@ class GameManager:
                 if file.lower().endswith(('.jpg', '.jpeg', '.png', '.gif')):
                     available_thumbs.append(file)
             
-            # 排除default.jpg
-            available_thumbs = [thumb for thumb in available_thumbs if thumb != 'default.jpg']
+            # 排除default.jpg和响应式变体文件
+            available_thumbs = [thumb for thumb in available_thumbs
+                                if thumb != 'default.jpg' and not THUMBNAIL_VARIANT_RE.search(thumb)]
             available_thumbs.sort()  # 按文件名排序
             
             logger.info(f"找到 {len(available_thumbs)} 个现有缩略图")
             
-            # 为每个游戏分配或生成缩略图
+            # 为每个游戏分配缩略图，需要生成的先收集起来批量生成
+            can_generate = PIL_AVAILABLE and self.thumbnail_generator
+            to_generate: Dict[str, List[Dict]] = {}
+            unchanged = 0
             for i, game in enumerate(games):
                 game_id = game.get('id', f'game_{i}')
                 game_title = game.get('title', 'Untitled Game')
@@ -956,142 +3151,407 @@ class GameManager:
                 # 检查是否已有专属缩略图
                 specific_thumb = f"{game_id}.jpg"
                 specific_thumb_path = os.path.join(THUMBNAILS_DIR, specific_thumb)
+                manifest_entry = self.thumbnail_manifest.get(game_id) if can_generate else None
+                cover_entry = self.cover_index.get(game.get('thumbnail')) if can_generate else None
+                
+                if cover_entry:
+                    # 下载的真实封面（可能与其他游戏共用），不重新生成
+                    self._assign_thumbnail(game, game['thumbnail'], cover_entry.get('variants'))
+                    unchanged += 1
                 
-                if os.path.exists(specific_thumb_path):
-                    # 使用现有的专属缩略图
-                    game['thumbnail'] = f'/games/thumbnails/{specific_thumb}'
+                elif os.path.exists(specific_thumb_path) and (
+                        manifest_entry is None
+                        or manifest_entry['render_key'] == ThumbnailGenerator.render_key(game_id, game_title)):
+                    # 使用现有的专属缩略图：不是脚本生成的（不覆盖），或渲染参数没有变化
+                    variants = manifest_entry.get('variants') if manifest_entry else None
+                    self._assign_thumbnail(game, f'/games/thumbnails/{specific_thumb}', variants)
+                    unchanged += 1
                     logger.debug(f"使用现有缩略图: {game_title} -> {specific_thumb}")
                 
-                elif PIL_AVAILABLE and self.thumbnail_generator:
-                    # 自动生成新缩略图
-                    logger.info(f"🎨 为游戏 '{game_title}' 生成新缩略图...")
-                    generated_thumb = self.thumbnail_generator.generate_for_game(game_title, game_id)
-                    game['thumbnail'] = generated_thumb
-                    logger.info(f"✅ 生成完成: {game_title}")
+                elif can_generate:
+                    # 没有缩略图或标题已变化，稍后批量生成
+                    to_generate.setdefault(game_id, []).append(game)
                 
                 elif available_thumbs:
                     # 循环使用可用的缩略图
                     thumb_index = i % len(available_thumbs)
                     thumbnail_file = available_thumbs[thumb_index]
-                    game['thumbnail'] = f'/games/thumbnails/{thumbnail_file}'
+                    self._assign_thumbnail(game, f'/games/thumbnails/{thumbnail_file}')
                     logger.info(f"分配现有缩略图: {game_title} -> {thumbnail_file}")
                 
                 else:
                     # 使用默认缩略图
-                    game['thumbnail'] = '/games/thumbnails/default.jpg'
+                    self._assign_thumbnail(game, '/games/thumbnails/default.jpg')
                     logger.warning(f"使用默认缩略图: {game_title}")
             
+            if unchanged:
+                logger.info(f"⏭️ {unchanged} 个游戏的缩略图没有变化，跳过生成")
+            
+            if to_generate:
+                logger.info(f"🎨 为 {len(to_generate)} 个游戏生成新缩略图...")
+                jobs = [(game_id, same_id_games[0].get('title', 'Untitled Game'))
+                        for game_id, same_id_games in to_generate.items()]
+                generated = self.thumbnail_generator.generate_batch(jobs, Config.THUMBNAIL_WORKERS)
+                for game_id, title in jobs:
+                    result = generated.get(game_id) or {'thumbnail': '/games/thumbnails/default.jpg'}
+                    thumbnail, variants = result['thumbnail'], result.get('thumbnailVariants')
+                    for game in to_generate[game_id]:
+                        self._assign_thumbnail(game, thumbnail, variants)
+                    if thumbnail != '/games/thumbnails/default.jpg':
+                        self.thumbnail_manifest.record(game_id, os.path.basename(thumbnail),
+                                                       ThumbnailGenerator.render_key(game_id, title), variants)
+                self.thumbnail_manifest.save()
+                logger.info(f"✅ 缩略图生成完成: {len(generated)} 个")
+            
             return games
             
         except Exception as e:
             logger.error(f"修复缩略图失败: {e}")
             return games
     
-    def write_games_file(self, games: List[Dict]):
-        """写入游戏数据到games.ts文件"""
-        try:
-            # 备份原文件
-            backup_file = f"{GAMES_DATA_FILE}.backup.{int(time.time())}"
-            shutil.copy2(GAMES_DATA_FILE, backup_file)
-            logger.info(f"已备份原文件: {backup_file}")
+    @staticmethod
+    def _assign_thumbnail(game: Dict, thumbnail: str, variants: Optional[Dict[str, str]] = None):
+        """设置缩略图；换成另一张图片且没有新的变体时，去掉不再对应的 thumbnailVariants"""
+        if variants:
+            game['thumbnailVariants'] = variants
+        elif game.get('thumbnail') != thumbnail:
+            game.pop('thumbnailVariants', None)
+        game['thumbnail'] = thumbnail
+    
+    def encode_thumbnail_variants(self, games: List[Dict], force: bool = False) -> List[Dict]:
+        """为 thumbnails 目录中已有的缩略图批量生成多尺寸变体，并写入引用它们的游戏的 thumbnailVariants"""
+        if not (PIL_AVAILABLE and self.thumbnail_generator):
+            logger.warning("PIL不可用，无法编码缩略图变体")
+            return games
+        
+        filenames = sorted(file for file in os.listdir(THUMBNAILS_DIR)
+                           if file.lower().endswith(('.jpg', '.jpeg', '.png', '.gif', '.webp'))
+                           and not THUMBNAIL_VARIANT_RE.search(file))
+        logger.info(f"🖼️ 为 {len(filenames)} 个缩略图生成变体（{', '.join(self.thumbnail_generator.variant_formats())}）...")
+        encoded = self.thumbnail_generator.encode_batch(filenames, Config.THUMBNAIL_WORKERS, force=force)
+        
+        by_path = {f'/games/thumbnails/{filename}': variants for filename, variants in encoded.items() if variants}
+        updated = 0
+        for game in games:
+            variants = by_path.get(game.get('thumbnail'))
+            if variants and game.get('thumbnailVariants') != variants:
+                game['thumbnailVariants'] = variants
+                updated += 1
+        logger.info(f"✅ 变体编码完成: {len(by_path)}/{len(filenames)} 个文件，更新了 {updated} 个游戏")
+        return games
+    
+    def fetch_covers(self, games: List[Dict]) -> List[Dict]:
+        """下载爬取时记录的封面URL（coverUrl）作为缩略图
+        
+        封面在列表页/API结果中已经拿到地址，这里只并发下载图片本身（每个域名仍经过限流），
+        缩放裁剪后保存为 {id}.jpg 及其变体；与已保存封面 dHash 相近的直接复用已有文件。
+        下载失败或图片不合适的游戏保留原缩略图，之后由 fix_thumbnails 生成。
+        """
+        pending = [(game, game.pop('coverUrl')) for game in games if game.get('coverUrl')]
+        if not pending:
+            return games
+        if not (Config.COVER_FETCH_ENABLED and PIL_AVAILABLE and self.thumbnail_generator):
+            return games
+        
+        logger.info(f"🖼️ 下载 {len(pending)} 个游戏封面（{Config.COVER_FETCH_WORKERS}个并发）...")
+        with ThreadPoolExecutor(max_workers=max(1, Config.COVER_FETCH_WORKERS)) as executor:
+            images = list(executor.map(self._download_cover, [url for _, url in pending]))
+        
+        saved = reused = 0
+        for (game, url), image in zip(pending, images):
+            if image is None:
+                continue
+            image_hash = dhash(image)
+            match = self.cover_index.find(image_hash, Config.COVER_DHASH_DISTANCE)
+            if match:
+                thumbnail, entry = match
+                self._assign_thumbnail(game, thumbnail, entry.get('variants'))
+                reused += 1
+                logger.debug(f"♻️ 封面与已有缩略图相同: {game['title']} -> {thumbnail}")
+                continue
             
+            result = self.thumbnail_generator.save_cover(image, game['id'])
+            if not result:
+                continue
+            self._assign_thumbnail(game, result['thumbnail'], result.get('thumbnailVariants'))
+            self.cover_index.add(result['thumbnail'], image_hash, url, result.get('thumbnailVariants'))
+            saved += 1
+        
+        self.cover_index.save()
+        logger.info(f"✅ 封面下载完成: 保存 {saved} 个，复用 {reused} 个，"
+                    f"失败/跳过 {len(pending) - saved - reused} 个")
+        return games
+    
+    def _download_cover(self, url: str):
+        """下载并解码一张封面，过大、过小或无法解析时返回None"""
+        try:
+            response = self._make_request(url)
+            if len(response.content) > Config.COVER_MAX_BYTES:
+                logger.debug(f"封面过大，跳过: {url}")
+                return None
+            image = Image.open(io.BytesIO(response.content))
+            image.load()
+            min_width, min_height = Config.COVER_MIN_SIZE
+            if image.width < min_width or image.height < min_height:
+                logger.debug(f"封面过小（{image.width}×{image.height}），跳过: {url}")
+                return None
+            return image.convert('RGB') if image.mode != 'RGB' else image
+        except Exception as e:
+            logger.debug(f"封面下载失败 {url}: {e}")
+            return None
+    
+    GAMES_ARRAY_START = 'export const games: Game[] = ['
+    GAMES_ARRAY_END = '];'
+    
+    def _locate_games_array(self, content: str) -> Optional[tuple]:
+        """返回games数组内容的起止位置（'[' 之后，结尾的 '];' 处），找不到返回None
+        
+        结尾用分词器匹配括号，标题、描述中出现的 '];' 不会被当成数组结尾。
+        """
+        start_idx = content.find(self.GAMES_ARRAY_START)
+        if start_idx == -1:
+            return None
+        start_idx += len(self.GAMES_ARRAY_START)
+        end_idx = find_ts_array_end(content, start_idx)
+        if end_idx == -1 or not content.startswith(self.GAMES_ARRAY_END, end_idx):
+            return None
+        return start_idx, end_idx
+    
+    def write_games_file(self, games: List[Dict], incremental: bool = None) -> bool:
+        """写入游戏数据到games.json，并重新生成games.ts，成功返回True
+        
+        games.ts的增量模式只改写变化的游戏对象、在末尾追加新游戏，并按差量更新分类计数；
+        游戏顺序被调整等无法增量处理的情况自动回退到整体重写。
+        """
+        if incremental is None:
+            incremental = Config.INCREMENTAL_WRITE
+        
+        try:
             # 读取原文件内容
             with open(GAMES_DATA_FILE, 'r', encoding='utf-8') as f:
                 content = f.read()
+            try:
+                with open(GAMES_JSON_FILE, 'r', encoding='utf-8') as f:
+                    json_content = f.read()
+            except FileNotFoundError:
+                json_content = None
+            new_json_content = json.dumps(games, ensure_ascii=False, indent=2) + '\n'
             
-            # 更新分类计数
-            category_counts = {}
-            for game in games:
-                cat_id = game.get('categoryId', '1')
-                category_counts[cat_id] = category_counts.get(cat_id, 0) + 1
+            # 目录与即将写入的数据保持一致，整体重写时的分类计数直接由SQL统计
+            catalog = self._open_catalog()
+            catalog.sync(games)
+            
+            new_content = self._patch_games_content(content, games) if incremental else None
+            if new_content is None:
+                new_content = self._rewrite_games_content(content, games, catalog.category_counts())
+            if new_content is None:
+                logger.error("无法找到games数组位置")
+                return False
+            
+            if new_content == content and new_json_content == json_content:
+                logger.info("游戏数据没有变化，跳过写入")
+                return True
             
-            # 更新categories部分
-            categories_pattern = r'export const categories: Category\[\] = \[(.*?)\];'
-            categories_match = re.search(categories_pattern, content, re.DOTALL)
+            # 备份原数据（内容相同的快照只保存一份；还没有games.json时备份games.ts）
+            backup_id = self.backups.snapshot(GAMES_JSON_FILE if json_content is not None else GAMES_DATA_FILE)
+            logger.info(f"已备份原文件: {backup_id}（恢复: --restore {backup_id}）")
             
-            if categories_match:
-                categories_content = categories_match.group(1)
-                
-                # 更新每个分类的count
-                def update_count(match):
-                    cat_data = match.group(0)
-                    id_match = re.search(r"id:\s*['\"](\d+)['\"]", cat_data)
-                    if id_match:
-                        cat_id = id_match.group(1)
-                        count = category_counts.get(cat_id, 0)
-                        return re.sub(r'count:\s*\d+', f'count: {count}', cat_data)
-                    return cat_data
-                
-                updated_categories = re.sub(r'\{[^}]+\}', update_count, categories_content)
-                content = content.replace(categories_match.group(1), updated_categories)
-            
-            # 生成游戏数组代码
-            games_code = self._generate_games_code(games)
-            
-            # 替换games数组
-            start_marker = 'export const games: Game[] = ['
-            end_marker = '];'
-            
-            start_idx = content.find(start_marker)
-            end_idx = content.find(end_marker, start_idx) + len(end_marker)
-            
-            if start_idx != -1 and end_idx != -1:
-                new_content = (
-                    content[:start_idx] + 
-                    start_marker + '\n' + 
-                    games_code + '\n' + 
-                    end_marker + 
-                    content[end_idx:]
-                )
-                
-                # 写入文件
-                with open(GAMES_DATA_FILE, 'w', encoding='utf-8') as f:
-                    f.write(new_content)
-                
-                logger.info(f"✅ 成功更新games.ts文件，包含 {len(games)} 个游戏")
-            else:
-                logger.error("无法找到games数组位置")
+            # 先写规范存储，再写生成的games.ts（都是临时文件 + 重命名）
+            if new_json_content != json_content:
+                atomic_write_text(GAMES_JSON_FILE, new_json_content)
+            if new_content != content:
+                atomic_write_text(GAMES_DATA_FILE, new_content)
+            
+            logger.info(f"✅ 成功更新games.json和games.ts，包含 {len(games)} 个游戏")
+            return True
                 
         except Exception as e:
-            logger.error(f"写入games.ts文件失败: {e}")
+            logger.error(f"写入游戏数据失败: {e}")
+            return False
+    
+    def _rewrite_games_content(self, content: str, games: List[Dict],
+                               category_counts: Dict[str, int] = None) -> Optional[str]:
+        """整体重写games数组并重新统计所有分类计数"""
+        # 更新分类计数
+        if category_counts is None:
+            category_counts = {}
+            for game in games:
+                cat_id = game.get('categoryId', '1')
+                category_counts[cat_id] = category_counts.get(cat_id, 0) + 1
+        
+        content = self._update_category_counts(content, lambda cat_id, count: category_counts.get(cat_id, 0))
+        
+        located = self._locate_games_array(content)
+        if not located:
+            return None
+        start_idx, end_idx = located
+        
+        # 生成游戏数组代码并替换
+        games_code = self._generate_games_code(games)
+        return content[:start_idx] + '\n' + games_code + '\n' + content[end_idx:]
+    
+    def _patch_games_content(self, content: str, games: List[Dict]) -> Optional[str]:
+        """增量更新：只替换变化的对象、删除移除的对象、追加新对象；无法增量时返回None"""
+        located = self._locate_games_array(content)
+        if not located:
+            return None
+        array_start, array_end = located
+        
+        existing = []
+        for start, end, parsed in scan_ts_objects(content, array_start, array_end):
+            if 'id' not in parsed:
+                return None
+            existing.append((start, end, parsed))
+        
+        existing_ids = [parsed['id'] for _, _, parsed in existing]
+        incoming_ids = [game['id'] for game in games]
+        if len(set(existing_ids)) != len(existing_ids) or len(set(incoming_ids)) != len(incoming_ids):
+            return None
+        
+        # 保留下来的游戏必须保持原顺序，新游戏必须都在末尾
+        existing_set = set(existing_ids)
+        games_by_id = {game['id']: game for game in games}
+        kept_ids = [game_id for game_id in existing_ids if game_id in games_by_id]
+        added_from = next((i for i, game_id in enumerate(incoming_ids) if game_id not in existing_set), len(games))
+        if incoming_ids[:added_from] != kept_ids or any(gid in existing_set for gid in incoming_ids[added_from:]):
+            logger.info("游戏顺序有调整，使用整体重写")
+            return None
+        added = games[added_from:]
+        
+        pieces = []
+        cursor = 0
+        category_delta: Dict[str, int] = {}
+        changed = removed = 0
+        
+        def shift(cat_id, amount):
+            category_delta[cat_id] = category_delta.get(cat_id, 0) + amount
+        
+        for start, end, parsed in existing:
+            game = games_by_id.get(parsed['id'])
+            if game is None:
+                remove_start, remove_end = self._object_removal_range(content, start, end)
+                pieces.append(content[cursor:remove_start])
+                cursor = remove_end
+                shift(parsed.get('categoryId', '1'), -1)
+                removed += 1
+            elif game != parsed:
+                pieces.append(content[cursor:start])
+                pieces.append(self._render_game_object(game))
+                cursor = end
+                shift(parsed.get('categoryId', '1'), -1)
+                shift(game.get('categoryId', '1'), 1)
+                changed += 1
+        
+        if added:
+            pieces.append(content[cursor:array_end])
+            cursor = array_end
+            head = ''.join(pieces).rstrip()
+            if head.endswith('}'):
+                head += ','
+            pieces = [head, '\n', self._generate_games_code(added), '\n']
+            for game in added:
+                shift(game.get('categoryId', '1'), 1)
+        pieces.append(content[cursor:])
+        
+        new_content = ''.join(pieces)
+        if any(category_delta.values()):
+            new_content = self._update_category_counts(
+                new_content, lambda cat_id, count: max(0, count + category_delta.get(cat_id, 0)),
+                only=set(cat_id for cat_id, delta in category_delta.items() if delta))
+        
+        logger.info(f"📝 增量写入: 新增 {len(added)}, 修改 {changed}, 删除 {removed}, "
+                    f"未变 {len(existing) - changed - removed}")
+        return new_content
+    
+    @staticmethod
+    def _object_removal_range(content: str, start: int, end: int) -> tuple:
+        """删除一个对象时连同它所在行的缩进和后面的逗号一起删除"""
+        remove_start = start
+        while remove_start > 0 and content[remove_start - 1] in ' \t':
+            remove_start -= 1
+        if remove_start > 0 and content[remove_start - 1] == '\n':
+            remove_start -= 1
+        remove_end = end
+        if remove_end < len(content) and content[remove_end] == ',':
+            remove_end += 1
+        return remove_start, remove_end
+    
+    def _update_category_counts(self, content: str, new_count, only: set = None) -> str:
+        """更新categories中的count；new_count(cat_id, 当前count) 返回新值，only 限定要改的分类"""
+        categories_pattern = r'export const categories: Category\[\] = \[(.*?)\];'
+        categories_match = re.search(categories_pattern, content, re.DOTALL)
+        if not categories_match:
+            return content
+        
+        # 更新每个分类的count
+        def update_count(match):
+            cat_data = match.group(0)
+            id_match = re.search(r"id:\s*['\"](\d+)['\"]", cat_data)
+            count_match = re.search(r'count:\s*(\d+)', cat_data)
+            if id_match and count_match and (only is None or id_match.group(1) in only):
+                count = new_count(id_match.group(1), int(count_match.group(1)))
+                return re.sub(r'count:\s*\d+', f'count: {count}', cat_data)
+            return cat_data
+        
+        updated_categories = re.sub(r'\{[^}]+\}', update_count, categories_match.group(1))
+        return content[:categories_match.start(1)] + updated_categories + content[categories_match.end(1):]
     
     def _generate_games_code(self, games: List[Dict]) -> str:
         """生成游戏数组的TypeScript代码"""
-        lines = []
-        
-        for game in games:
-            lines.append('  {')
-            lines.append(f"    id: '{game['id']}',")
-            lines.append(f"    title: '{game['title']}',")
-            lines.append(f"    description: '{game.get('description', '')}',")
-            lines.append(f"    category: '{game.get('category', '休闲')}',")
-            lines.append(f"    categoryId: '{game.get('categoryId', '1')}',")
-            lines.append(f"    thumbnail: '{game.get('thumbnail', '/games/thumbnails/default.jpg')}',")
-            lines.append(f"    path: '{game.get('path', f'/games/{game['id']}')}',")
-            lines.append(f"    featured: {str(game.get('featured', False)).lower()},")
-            lines.append(f"    type: '{game['type']}',")
-            
-            if game['type'] == 'iframe':
-                lines.append(f"    iframeUrl: '{game['iframeUrl']}',")
-            elif game['type'] == 'static':
-                lines.append(f"    staticPath: '{game['staticPath']}',")
-            
-            lines.append(f"    addedAt: '{game.get('addedAt', datetime.now().strftime('%Y-%m-%d'))}',")
-            
-            tags = game.get('tags', ['休闲'])
-            tags_str = ', '.join([f'"{tag}"' for tag in tags])
-            lines.append(f"    tags: [{tags_str}]")
-            lines.append('  },')
+        return '\n'.join(f"  {self._render_game_object(game)}," for game in games)
+    
+    def _render_game_object(self, game: Dict) -> str:
+        """生成单个游戏对象的TypeScript代码（从 '{' 到 '}'，不含末尾逗号）"""
+        default_path = f"/games/{game['id']}"
+        lines = ['{']
+        lines.append(f"    id: {ts_quote(game['id'])},")
+        lines.append(f"    title: {ts_quote(game['title'])},")
+        lines.append(f"    description: {ts_quote(game.get('description', ''))},")
+        lines.append(f"    category: {ts_quote(game.get('category', '休闲'))},")
+        lines.append(f"    categoryId: {ts_quote(game.get('categoryId', '1'))},")
+        lines.append(f"    thumbnail: {ts_quote(game.get('thumbnail', '/games/thumbnails/default.jpg'))},")
+        variants = game.get('thumbnailVariants')
+        if variants:
+            lines.append('    thumbnailVariants: {')
+            lines.append(',\n'.join(f"      {fmt}: {ts_quote(srcset)}" for fmt, srcset in variants.items()))
+            lines.append('    },')
+        lines.append(f"    path: {ts_quote(game.get('path', default_path))},")
+        lines.append(f"    featured: {str(game.get('featured', False)).lower()},")
+        lines.append(f"    type: {ts_quote(game['type'])},")
+        
+        if game['type'] == 'iframe':
+            lines.append(f"    iframeUrl: {ts_quote(game['iframeUrl'])},")
+        elif game['type'] == 'static':
+            lines.append(f"    staticPath: {ts_quote(game['staticPath'])},")
+        
+        lines.append(f"    addedAt: {ts_quote(game.get('addedAt', datetime.now().strftime('%Y-%m-%d')))},")
+        
+        tags = game.get('tags', ['休闲'])
+        tags_str = ', '.join([ts_quote(tag, '"') for tag in tags])
+        lines.append(f"    tags: [{tags_str}]")
+        lines.append('  }')
         
         return '\n'.join(lines)
     
-    def crawl_new_games(self, max_games: int = 10) -> List[Dict]:
+    def crawl_new_games(self, max_games: int = 10, resume: bool = False) -> List[Dict]:
         """爬取新游戏（组合使用基础爬虫和API搜索）"""
         logger.info("🚀 开始爬取新游戏...")
         all_new_games = []
         
+        # 0. 断点续爬：先取回上次已验证但未写入的游戏
+        if resume:
+            resumed_games = self.frontier.load_checkpoint()[:max_games]
+            all_new_games.extend(resumed_games)
+            logger.info(f"🧭 从检查点恢复 {len(resumed_games)} 个已验证的游戏")
+        
         # 1. 基础爬虫（多个平台）
-        basic_games = self._crawl_basic_sites(max_games // 2)
+        basic_quota = max(0, max_games // 2 - len(all_new_games))
+        if basic_quota == 0:
+            basic_games = []
+        elif Config.CRAWL_ENGINE == 'async':
+            basic_games = self._crawl_basic_sites_async(basic_quota)
+        else:
+            basic_games = self._crawl_basic_sites(basic_quota)
         all_new_games.extend(basic_games)
         
         # 2. API搜索（如果配置了API）
@@ -1100,8 +3560,27 @@ class GameManager:
             all_new_games.extend(api_games)
         
         logger.info(f"爬取完成，总共找到 {len(all_new_games)} 个新游戏")
+        self.fetch_covers(all_new_games)
+        self.rate_limiter.log_stats()
+        if self.http_cache:
+            self.http_cache.log_stats()
+        logger.info(f"🧭 爬取边界状态: {self.frontier.summary()}")
         return all_new_games
     
+    @property
+    def known_index(self) -> KnownGameIndex:
+        """已知游戏索引，只构建一次"""
+        if self._known_index is None:
+            self._known_index = KnownGameIndex.build(self.read_games_file(), self.frontier)
+        return self._known_index
+    
+    def _is_known_game(self, page_url: str = None, title: str = None, iframe_url: str = None) -> bool:
+        """在发起网络请求前检查游戏是否已收录或已处理过"""
+        reason = self.known_index.match(page_url=page_url, title=title, iframe_url=iframe_url)
+        if reason:
+            logger.debug(f"📇 跳过已知游戏 ({reason}): {title or page_url or iframe_url}")
+        return reason is not None
+    
     def _crawl_basic_sites(self, max_games: int) -> List[Dict]:
         """基础站点爬虫（支持多个平台，智能检测选择器）"""
         logger.info("🌐 开始基础站点爬取...")
@@ -1113,79 +3592,17 @@ class GameManager:
                 
             try:
                 logger.info(f"爬取平台: {site['name']}")
-                response = self._make_request(site['search_url'])
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # 智能检测选择器（如果未配置的话）
-                game_selector = site.get('game_selector')
-                title_selector = site.get('title_selector')
-                
-                if not game_selector or not title_selector:
-                    logger.info(f"🔍 自动检测 {site['name']} 的CSS选择器...")
-                    detected_selectors = self._detect_game_selectors(soup, site['name'])
-                    
-                    if not game_selector:
-                        game_selector = detected_selectors.get('game_selector')
-                    if not title_selector:
-                        title_selector = detected_selectors.get('title_selector')
-                    
-                    if game_selector and title_selector:
-                        logger.info(f"✅ 检测成功: game='{game_selector}', title='{title_selector}'")
-                    else:
-                        logger.warning(f"❌ 选择器检测失败，跳过平台: {site['name']}")
-                        continue
+                listing = self._load_site_listing(site)
+                if not listing:
+                    continue
                 
-                game_elements = soup.select(game_selector)[:max_games - len(new_games)]
-                logger.info(f"找到 {len(game_elements)} 个游戏元素")
+                candidates = self._extract_listing_candidates(site, listing, max_games - len(new_games))
                 
-                for i, element in enumerate(game_elements):
+                for candidate in candidates:
                     try:
-                        title_elem = element.select_one(title_selector)
-                        if not title_elem:
-                            # 尝试备用标题选择器
-                            title_elem = self._find_title_element(element)
-                        
-                        if not title_elem:
-                            continue
-                        
-                        title = title_elem.get_text(strip=True)
-                        if len(title) < 3:
-                            continue
-                        
-                        link_elem = element.select_one('a[href]')
-                        if not link_elem:
-                            # 如果元素本身就是链接
-                            if element.name == 'a' and element.get('href'):
-                                link_elem = element
-                            else:
-                                continue
-                        
-                        game_url = urljoin(site['base_url'], link_elem['href'])
-                        
-                        # 尝试查找iframe URL
-                        iframe_url = self._find_iframe_url(game_url)
-                        if iframe_url and self._verify_iframe_playable(iframe_url):
-                            game_id = f"basic_{site['name'].lower().replace(' ', '_')}_{int(time.time())}_{i}"
-                            
-                            game_info = {
-                                'id': game_id,
-                                'title': title,
-                                'description': f"来自{site['name']}的HTML5游戏",
-                                'category': '休闲',
-                                'categoryId': '1',
-                                'thumbnail': '/games/thumbnails/default.jpg',
-                                'path': f'/games/{game_id}',
-                                'featured': False,
-                                'type': 'iframe',
-                                'iframeUrl': iframe_url,
-                                'addedAt': datetime.now().strftime('%Y-%m-%d'),
-                                'tags': ['HTML5', '在线', site['name']]
-                            }
+                        game_info = self._build_game_from_candidate(site, candidate)
+                        if game_info:
                             new_games.append(game_info)
-                            logger.info(f"✅ 基础爬取找到游戏: {title} - {site['name']}")
-                        
-                        time.sleep(random.uniform(2, 4))
-                        
                     except Exception as e:
                         logger.error(f"处理游戏失败: {e}")
                         continue
@@ -1197,8 +3614,247 @@ class GameManager:
         logger.info(f"基础爬取完成，找到 {len(new_games)} 个游戏")
         return new_games
     
-    def _detect_game_selectors(self, soup: BeautifulSoup, site_name: str) -> Dict[str, str]:
+    def _crawl_basic_sites_async(self, max_games: int) -> List[Dict]:
+        """基础站点爬虫（异步引擎）：所有平台同时爬取，每个域名按自身延迟预算限流"""
+        logger.info(f"⚡ 开始基础站点爬取（异步引擎，每域名并发 {Config.ASYNC_DOMAIN_CONCURRENCY}）...")
+        started = time.time()
+        new_games = asyncio.run(self._crawl_sites_concurrently(max_games))
+        logger.info(f"基础爬取完成，找到 {len(new_games)} 个游戏，耗时 {time.time() - started:.1f}s")
+        return new_games
+    
+    async def _crawl_sites_concurrently(self, max_games: int) -> List[Dict]:
+        """并发爬取所有平台，结果按平台优先级排序"""
+        loop = asyncio.get_running_loop()
+        domain_semaphores: Dict[str, asyncio.Semaphore] = {}
+        found = []
+        
+        def get_semaphore(url: str) -> asyncio.Semaphore:
+            domain = rate_limit_key(url)
+            if domain not in domain_semaphores:
+                domain_semaphores[domain] = asyncio.Semaphore(Config.ASYNC_DOMAIN_CONCURRENCY)
+            return domain_semaphores[domain]
+        
+        async def process_candidate(site, candidate):
+            if len(found) >= max_games:
+                return
+            async with get_semaphore(candidate['url']):
+                if len(found) >= max_games:
+                    return
+                try:
+                    game_info = await loop.run_in_executor(
+                        executor, self._build_game_from_candidate, site, candidate)
+                except Exception as e:
+                    logger.error(f"处理游戏失败: {e}")
+                    return
+            if game_info and len(found) < max_games:
+                found.append((site.get('priority', 99), candidate['index'], game_info))
+        
+        async def crawl_site(site):
+            try:
+                logger.info(f"爬取平台: {site['name']}")
+                async with get_semaphore(site['search_url']):
+                    listing = await loop.run_in_executor(executor, self._load_site_listing, site)
+                if not listing:
+                    return
+                
+                candidates = self._extract_listing_candidates(site, listing, max_games)
+                await asyncio.gather(*(process_candidate(site, c) for c in candidates))
+            except Exception as e:
+                logger.error(f"平台 {site['name']} 爬取失败: {e}")
+        
+        with ThreadPoolExecutor(max_workers=Config.ASYNC_MAX_WORKERS) as executor:
+            await asyncio.gather(*(crawl_site(site) for site in PREMIUM_GAME_SITES))
+        
+        found.sort(key=lambda item: (item[0], item[1]))
+        return [game_info for _, _, game_info in found]
+    
+    def _load_site_listing(self, site: Dict) -> Optional[Dict]:
+        """下载平台列表页并确定游戏/标题选择器"""
+        response = self._make_request(site['search_url'])
+        soup = parse_html(response.text)
+        
+        # 智能检测选择器（如果未配置的话）
+        game_selector = site.get('game_selector')
+        title_selector = site.get('title_selector')
+        
+        if not game_selector or not title_selector:
+            # 优先复用之前学习到的选择器，结构变化时才重新检测
+            fingerprint = layout_fingerprint(soup)
+            detected_selectors = self.selector_store.lookup(site['name'], soup, fingerprint)
+            if not detected_selectors:
+                logger.info(f"🔍 自动检测 {site['name']} 的CSS选择器...")
+                detected_selectors = self._detect_game_selectors(soup, site['name'], fingerprint)
+                if detected_selectors:
+                    self.selector_store.save(site['name'], soup, fingerprint, detected_selectors)
+            
+            if not game_selector:
+                game_selector = detected_selectors.get('game_selector')
+            if not title_selector:
+                title_selector = detected_selectors.get('title_selector')
+            
+            if game_selector and title_selector:
+                logger.info(f"✅ 检测成功: game='{game_selector}', title='{title_selector}'")
+            else:
+                logger.warning(f"❌ 选择器检测失败，跳过平台: {site['name']}")
+                return None
+        
+        return {'soup': soup, 'game_selector': game_selector, 'title_selector': title_selector}
+    
+    def _extract_listing_candidates(self, site: Dict, listing: Dict, limit: int) -> List[Dict]:
+        """从列表页中提取最多 limit 个未知的候选游戏（标题 + 详情页链接），不发起网络请求
+        
+        已收录或已有结论（拒绝/已写入）的游戏先跳过再计数：成熟目录中列表页前面的条目大多已知，不能只看前 limit 个元素。
+        """
+        game_elements = listing['soup'].select(listing['game_selector'])
+        logger.info(f"找到 {len(game_elements)} 个游戏元素")
+        
+        candidates = []
+        scanned = 0
+        for i, element in enumerate(game_elements):
+            if len(candidates) >= limit:
+                break
+            scanned += 1
+            title_elem = element.select_one(listing['title_selector'])
+            if not title_elem:
+                # 尝试备用标题选择器
+                title_elem = self._find_title_element(element)
+            
+            if not title_elem:
+                continue
+            
+            title = title_elem.get_text(strip=True)
+            if len(title) < 3:
+                continue
+            
+            link_elem = element.select_one('a[href]')
+            if not link_elem:
+                # 如果元素本身就是链接
+                if element.name == 'a' and element.get('href'):
+                    link_elem = element
+                else:
+                    continue
+            
+            game_url = resolve_url(site['base_url'], link_elem['href'])
+            if self._is_known_game(page_url=game_url, title=title) or self.frontier.is_finished(game_url):
+                continue
+            
+            candidate = {
+                'index': i,
+                'title': title,
+                'url': game_url
+            }
+            cover_url = self._extract_cover_url(element, site['base_url'])
+            if cover_url:
+                candidate['cover_url'] = cover_url
+            candidates.append(candidate)
+        
+        if len(candidates) < scanned:
+            logger.info(f"📇 {site['name']}: 检查 {scanned} 个元素，{len(candidates)} 个是未处理的新游戏")
+        
+        # 已有结论的URL不再处理
+        return self.frontier.enqueue(site['name'], candidates)
+    
+    COVER_IMAGE_ATTRS = ('data-src', 'data-lazy-src', 'data-original', 'src')
+    
+    @classmethod
+    def _extract_cover_url(cls, element, base_url: str) -> Optional[str]:
+        """从列表页的游戏元素中取封面图片地址（懒加载属性优先，srcset取最宽的一张）"""
+        for img in element.select('img'):
+            srcset = img.get('data-srcset') or img.get('srcset')
+            if srcset:
+                widest = None
+                for entry in srcset.split(','):
+                    parts = entry.split()
+                    if not parts:
+                        continue
+                    width = int(parts[1][:-1]) if len(parts) > 1 and parts[1][:-1].isdigit() else 0
+                    if widest is None or width > widest[0]:
+                        widest = (width, parts[0])
+                if widest and not widest[1].startswith('data:'):
+                    return resolve_url(base_url, widest[1])
+            
+            for attr in cls.COVER_IMAGE_ATTRS:
+                src = (img.get(attr) or '').strip()
+                if src and not src.startswith('data:'):
+                    return resolve_url(base_url, src)
+        return None
+    
+    @staticmethod
+    def _api_cover_url(result: Dict) -> Optional[str]:
+        """搜索API结果中的封面图片：SerpAPI的 thumbnail，Google的 pagemap 图片"""
+        pagemap = result.get('pagemap') or {}
+        candidates = [result.get('thumbnail')]
+        candidates += [image.get('src') for image in pagemap.get('cse_image', [])]
+        candidates += [tags.get('og:image') for tags in pagemap.get('metatags', [])]
+        candidates += [image.get('src') for image in pagemap.get('cse_thumbnail', [])]
+        for url in candidates:
+            if isinstance(url, str) and url.startswith(('http://', 'https://')):
+                return url
+        return None
+    
+    def _build_game_from_candidate(self, site: Dict, candidate: Dict) -> Optional[Dict]:
+        """访问候选游戏详情页，找到并验证iframe后生成游戏数据（每一步都写入检查点）"""
+        title = candidate['title']
+        page_url = candidate['url']
+        
+        # 上次运行已验证过的游戏直接复用
+        checkpoint = self.frontier.get(page_url)
+        if checkpoint and checkpoint['status'] == CrawlFrontier.VERIFIED and checkpoint['game']:
+            logger.info(f"🧭 复用检查点中的游戏: {title}")
+            return checkpoint['game']
+        
+        # 尝试查找iframe URL（上次已找到的直接使用）
+        iframe_url = candidate.get('iframe_url') or self._find_iframe_url(page_url)
+        if not iframe_url:
+            self.frontier.mark_rejected(page_url, 'no_iframe')
+            return None
+        self.frontier.mark_fetched(page_url, iframe_url)
+        
+        # 同一个iframe已经收录，不再发HEAD验证
+        if self._is_known_game(iframe_url=iframe_url):
+            self.frontier.mark_rejected(page_url, 'duplicate_iframe')
+            return None
+        
+        if not self._verify_iframe_playable(iframe_url):
+            self.frontier.mark_rejected(page_url, 'not_playable')
+            return None
+        
+        game_id = f"basic_{site['name'].lower().replace(' ', '_')}_{int(time.time())}_{candidate['index']}"
+        
+        game_info = {
+            'id': game_id,
+            'title': title,
+            'description': f"来自{site['name']}的HTML5游戏",
+            'category': '休闲',
+            'categoryId': '1',
+            'thumbnail': '/games/thumbnails/default.jpg',
+            'path': f'/games/{game_id}',
+            'featured': False,
+            'type': 'iframe',
+            'iframeUrl': iframe_url,
+            'addedAt': datetime.now().strftime('%Y-%m-%d'),
+            'tags': ['HTML5', '在线', site['name']]
+        }
+        if candidate.get('cover_url'):
+            game_info['coverUrl'] = candidate['cover_url']  # 写入前由 fetch_covers 下载并去掉
+        self.frontier.mark_verified(page_url, game_info)
+        self.known_index.add_game(game_info, page_url)
+        logger.info(f"✅ 基础爬取找到游戏: {title} - {site['name']}")
+        return game_info
+    
+    def _detect_game_selectors(self, soup: BeautifulSoup, site_name: str,
+                               fingerprint: str = None) -> Dict[str, str]:
         """智能检测游戏相关的CSS选择器"""
+        started = time.perf_counter()
+        
+        # 同一站点、同一页面结构只检测一次
+        fingerprint = fingerprint or layout_fingerprint(soup)
+        cache_key = (site_name, fingerprint)
+        if cache_key in self._selector_cache:
+            result = self._selector_cache[cache_key]
+            self._record_selector_timing(site_name, started, combinations=0, cached=True)
+            return dict(result)
+        
         # 常见的游戏容器选择器模式
         game_container_patterns = [
             # 常见的class名称模式
@@ -1227,6 +3883,12 @@ class GameManager:
         best_game_selector = None
         best_title_selector = None
         best_score = 0
+        combinations = 0
+        
+        # 元素特征缓存：同一元素可能被多个容器模式选中，特征只计算一次
+        feature_cache: Dict[int, Dict[str, Any]] = {}
+        title_validity_cache: Dict[int, bool] = {}
+        evaluated_sets = set()
         
         logger.debug(f"🔍 分析 {site_name} 页面结构...")
         
@@ -1239,11 +3901,19 @@ class GameManager:
                 if len(game_elements) < 3 or len(game_elements) > 100:
                     continue
                 
-                # 测试标题选择器
+                # 不同模式选中完全相同的元素时得分相同，不会超过先出现的模式
+                element_set = tuple(id(element) for element in game_elements)
+                if element_set in evaluated_sets:
+                    continue
+                evaluated_sets.add(element_set)
+                
+                # 一次计算所有标题选择器的得分
+                scores = self._score_selector_combinations(
+                    game_elements, title_patterns, feature_cache, title_validity_cache)
+                combinations += len(title_patterns)
+                
                 for title_pattern in title_patterns:
-                    score = self._evaluate_selector_combination(
-                        game_elements, title_pattern, site_name)
-                    
+                    score = scores[title_pattern]
                     if score > best_score:
                         best_score = score
                         best_game_selector = game_pattern
@@ -1261,90 +3931,104 @@ class GameManager:
         else:
             logger.warning(f"⚠️ 未找到合适的选择器组合 (最高得分: {best_score})")
         
-        return result
+        self._selector_cache[cache_key] = result
+        self._record_selector_timing(site_name, started, combinations=combinations, cached=False)
+        return dict(result)
     
-    def _evaluate_selector_combination(self, game_elements: list, title_pattern: str, site_name: str) -> int:
-        """评估选择器组合的质量"""
-        score = 0
-        valid_titles = 0
-        has_links = 0
-        
+    def _record_selector_timing(self, site_name: str, started: float, combinations: int, cached: bool):
+        """记录选择器检测耗时"""
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.selector_detection_stats.append({
+            'site': site_name,
+            'ms': round(elapsed_ms, 1),
+            'combinations': combinations,
+            'cached': cached
+        })
+        source = '缓存' if cached else f'{combinations} 个组合'
+        logger.info(f"⏱️ {site_name} 选择器检测耗时 {elapsed_ms:.1f}ms（{source}）")
+    
+    def _score_selector_combinations(self, game_elements: list, title_patterns: List[str],
+                                     feature_cache: Dict[int, Dict[str, Any]],
+                                     title_validity_cache: Dict[int, bool]) -> Dict[str, int]:
+        """评估一个容器选择器与所有标题选择器组合的质量"""
         # 取样测试（最多测试前10个元素）
         sample_elements = game_elements[:min(10, len(game_elements))]
+        sample_features = [self._get_element_features(element, feature_cache) for element in sample_elements]
         
-        for element in sample_elements:
-            try:
-                # 测试标题选择器
-                title_elem = element.select_one(title_pattern)
-                if title_elem:
-                    title_text = title_elem.get_text(strip=True)
-                    
-                    # 验证标题质量
-                    if self._is_valid_game_title(title_text):
-                        valid_titles += 1
-                        score += 2
-                
-                # 检查是否包含链接
-                link_elem = element.select_one('a[href]')
-                if link_elem or (element.name == 'a' and element.get('href')):
-                    has_links += 1
-                    score += 1
-                
-                # 检查元素结构合理性
-                if self._has_reasonable_structure(element):
-                    score += 1
-                    
-            except Exception:
+        # 与标题选择器无关的部分只计算一次
+        base_score = 0
+        has_links = 0
+        for features in sample_features:
+            if features is None:
                 continue
-        
-        # 计算质量比例
-        if len(sample_elements) > 0:
-            title_ratio = valid_titles / len(sample_elements)
-            link_ratio = has_links / len(sample_elements)
-            
-            # 标题覆盖率权重
-            score += int(title_ratio * 10)
-            # 链接覆盖率权重
-            score += int(link_ratio * 5)
-            
+            if features['has_link']:
+                has_links += 1
+                base_score += 1
+            if features['structure']:
+                base_score += 1
+        
+        if sample_elements:
+            base_score += int(has_links / len(sample_elements) * 5)
             # 数量合理性奖励
             total_elements = len(game_elements)
             if 5 <= total_elements <= 50:
-                score += 5
+                base_score += 5
             elif 3 <= total_elements <= 100:
-                score += 3
+                base_score += 3
         
-        return score
+        scores = {}
+        for title_pattern in title_patterns:
+            valid_titles = 0
+            for element, features in zip(sample_elements, sample_features):
+                if features is None:
+                    continue
+                if self._element_has_valid_title(element, title_pattern, features, title_validity_cache):
+                    valid_titles += 1
+            
+            score = base_score + valid_titles * 2
+            if sample_elements:
+                # 标题覆盖率权重
+                score += int(valid_titles / len(sample_elements) * 10)
+            scores[title_pattern] = score
+        
+        return scores
+    
+    def _get_element_features(self, element, feature_cache: Dict[int, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """计算（并缓存）元素的链接和结构特征"""
+        key = id(element)
+        if key not in feature_cache:
+            try:
+                link_elem = element.select_one('a[href]')
+                feature_cache[key] = {
+                    'has_link': bool(link_elem or (element.name == 'a' and element.get('href'))),
+                    'structure': self._has_reasonable_structure(element),
+                    'titles': {}
+                }
+            except Exception:
+                feature_cache[key] = None
+        return feature_cache[key]
+    
+    def _element_has_valid_title(self, element, title_pattern: str, features: Dict[str, Any],
+                                 title_validity_cache: Dict[int, bool]) -> bool:
+        """元素在该标题选择器下是否有有效标题（按元素和标题元素缓存）"""
+        if title_pattern not in features['titles']:
+            valid = False
+            try:
+                title_elem = element.select_one(title_pattern)
+                if title_elem:
+                    title_key = id(title_elem)
+                    if title_key not in title_validity_cache:
+                        title_text = title_elem.get_text(strip=True)
+                        title_validity_cache[title_key] = self._is_valid_game_title(title_text)
+                    valid = title_validity_cache[title_key]
+            except Exception:
+                pass
+            features['titles'][title_pattern] = valid
+        return features['titles'][title_pattern]
     
     def _is_valid_game_title(self, title: str) -> bool:
         """验证是否是有效的游戏标题"""
-        if not title or len(title.strip()) < 2:
-            return False
-        
-        # 过滤掉明显不是游戏的标题
-        invalid_keywords = [
-            'menu', 'navigation', 'header', 'footer', 'sidebar',
-            'advertisement', 'ad', 'sponsor', 'login', 'register',
-            'search', 'filter', 'sort', 'category', 'tag',
-            'more', 'view all', 'load more', 'next', 'previous',
-            'home', 'about', 'contact', 'privacy', 'terms'
-        ]
-        
-        title_lower = title.lower()
-        if any(keyword in title_lower for keyword in invalid_keywords):
-            return False
-        
-        # 检查长度合理性
-        if len(title) > 100:
-            return False
-        
-        # 包含游戏相关词汇加分
-        game_keywords = ['game', 'play', 'adventure', 'puzzle', 'action', 'fun']
-        if any(keyword in title_lower for keyword in game_keywords):
-            return True
-        
-        # 基本验证：包含字母和合理长度
-        return len(title.strip()) >= 3 and any(c.isalpha() for c in title)
+        return KEYWORD_RULES.is_valid_title(title)
     
     def _has_reasonable_structure(self, element) -> bool:
         """检查元素是否有合理的游戏条目结构"""
@@ -1390,13 +4074,11 @@ class GameManager:
             if self.has_serpapi:
                 serp_results = self._search_with_serpapi_enhanced(query, max_games - len(api_games))
                 api_games.extend(serp_results)
-                time.sleep(random.uniform(3, 5))  # 避免请求过快
             
             # 备用Google Custom Search
             elif self.has_google_api:
                 google_results = self._search_with_google(query, max_games - len(api_games))
                 api_games.extend(google_results)
-                time.sleep(random.uniform(3, 5))
         
         logger.info(f"API搜索完成，找到 {len(api_games)} 个游戏")
         return api_games
@@ -1436,7 +4118,12 @@ class GameManager:
                 response = self._make_request('https://serpapi.com/search', params=params)
                 data = response.json()
             
-            for i, result in enumerate(data.get('organic_results', [])[:max_results]):
+            organic_results = data.get('organic_results', [])[:max_results]
+            # 一次批量判断所有结果的相关性和分类
+            classifications = KEYWORD_RULES.classify_results(
+                (result.get('title', '').strip(), result.get('snippet', '')) for result in organic_results)
+            
+            for i, (result, classification) in enumerate(zip(organic_results, classifications)):
                 try:
                     title = result.get('title', '').strip()
                     link = result.get('link', '')
@@ -1446,18 +4133,31 @@ class GameManager:
                         continue
                     
                     # 验证是否是游戏相关
-                    if not self._is_game_related(title, snippet):
+                    if not classification['related']:
                         logger.debug(f"❌ SerpAPI跳过非游戏内容: {title}")
                         continue
                     
+                    if self._is_known_game(page_url=link, title=self._clean_title(title)):
+                        continue
+                    
+                    if self.frontier.is_finished(link):
+                        logger.debug(f"🧭 SerpAPI跳过已处理的URL: {link}")
+                        continue
+                    
                     # 尝试查找iframe URL
                     iframe_url = self._find_iframe_url(link)
                     if not iframe_url:
                         logger.debug(f"❌ SerpAPI未找到iframe: {title}")
+                        self.frontier.mark_rejected(link, 'no_iframe')
+                        continue
+                    
+                    if self._is_known_game(iframe_url=iframe_url):
+                        self.frontier.mark_rejected(link, 'duplicate_iframe')
                         continue
                     
                     if not self._verify_iframe_playable(iframe_url):
                         logger.debug(f"❌ SerpAPI iframe不可用: {title}")
+                        self.frontier.mark_rejected(link, 'not_playable')
                         continue
                     
                     game_id = f"serp_{int(time.time())}_{i}"
@@ -1466,8 +4166,8 @@ class GameManager:
                         'id': game_id,
                         'title': self._clean_title(title),
                         'description': f"通过SerpAPI发现的HTML5游戏: {snippet[:100]}...",
-                        'category': self._categorize_game(title, snippet),
-                        'categoryId': self._get_category_id(title, snippet),
+                        'category': classification['category'],
+                        'categoryId': classification['categoryId'],
                         'thumbnail': '/games/thumbnails/default.jpg',
                         'path': f'/games/{game_id}',
                         'featured': False,
@@ -1476,7 +4176,12 @@ class GameManager:
                         'addedAt': datetime.now().strftime('%Y-%m-%d'),
                         'tags': ['API搜索', 'HTML5', 'SerpAPI']
                     }
+                    cover_url = self._api_cover_url(result)
+                    if cover_url:
+                        game_info['coverUrl'] = cover_url
                     results.append(game_info)
+                    self.frontier.mark_verified(link, game_info)
+                    self.known_index.add_game(game_info, link)
                     logger.info(f"✅ SerpAPI找到游戏: {title}")
                 
                 except Exception as e:
@@ -1505,7 +4210,12 @@ class GameManager:
             response = self._make_request('https://www.googleapis.com/customsearch/v1', params=params)
             data = response.json()
             
-            for i, item in enumerate(data.get('items', [])[:max_results]):
+            items = data.get('items', [])[:max_results]
+            # 一次批量判断所有结果的相关性和分类
+            classifications = KEYWORD_RULES.classify_results(
+                (item.get('title', '').strip(), item.get('snippet', '')) for item in items)
+            
+            for i, (item, classification) in enumerate(zip(items, classifications)):
                 try:
                     title = item.get('title', '').strip()
                     link = item.get('link', '')
@@ -1515,20 +4225,30 @@ class GameManager:
                         continue
                     
                     # 验证是否是游戏相关
-                    if not self._is_game_related(title, snippet):
+                    if not classification['related']:
+                        continue
+                    
+                    if self._is_known_game(page_url=link, title=self._clean_title(title)):
+                        continue
+                    
+                    if self.frontier.is_finished(link):
                         continue
                     
                     # 尝试查找iframe URL
                     iframe_url = self._find_iframe_url(link)
-                    if iframe_url and self._verify_iframe_playable(iframe_url):
+                    if iframe_url and self._is_known_game(iframe_url=iframe_url):
+                        self.frontier.mark_rejected(link, 'duplicate_iframe')
+                    elif not iframe_url or not self._verify_iframe_playable(iframe_url):
+                        self.frontier.mark_rejected(link, 'no_playable_iframe')
+                    else:
                         game_id = f"google_{int(time.time())}_{i}"
                         
                         game_info = {
                             'id': game_id,
                             'title': self._clean_title(title),
                             'description': f"通过Google Custom Search发现的HTML5游戏: {snippet[:100]}...",
-                            'category': self._categorize_game(title, snippet),
-                            'categoryId': self._get_category_id(title, snippet),
+                            'category': classification['category'],
+                            'categoryId': classification['categoryId'],
                             'thumbnail': '/games/thumbnails/default.jpg',
                             'path': f'/games/{game_id}',
                             'featured': False,
@@ -1537,7 +4257,12 @@ class GameManager:
                             'addedAt': datetime.now().strftime('%Y-%m-%d'),
                             'tags': ['API搜索', 'HTML5', 'Google']
                         }
+                        cover_url = self._api_cover_url(item)
+                        if cover_url:
+                            game_info['coverUrl'] = cover_url
                         results.append(game_info)
+                        self.frontier.mark_verified(link, game_info)
+                        self.known_index.add_game(game_info, link)
                         logger.info(f"✅ Google API找到游戏: {title}")
                 
                 except Exception as e:
@@ -1552,41 +4277,7 @@ class GameManager:
     
     def _is_game_related(self, title: str, snippet: str) -> bool:
         """验证标题和摘要是否与游戏相关且可在线玩"""
-        text = (title + ' ' + snippet).lower()
-        
-        # 必须包含的游戏关键词
-        game_keywords = [
-            'game', 'play', 'html5', 'browser', 'online',
-            'arcade', 'puzzle', 'action', 'adventure', 'strategy', 'casual',
-            '游戏', '玩', '在线'
-        ]
-        
-        # 可在线玩的关键词
-        playable_keywords = [
-            'play now', 'play online', 'in browser', 'play free',
-            'no download', 'instant play', 'web game', 'browser game',
-            'click to play', 'start playing', 'play instantly'
-        ]
-        
-        # 排除的关键词（论坛、下载、新闻等）
-        exclude_keywords = [
-            'forum', 'discussion', 'review', 'news', 'blog', 'tutorial',
-            'guide', 'download', 'wiki', 'community', 'devlog', 'discord',
-            'reddit', 'youtube', 'steam', 'app store', 'google play',
-            'walkthrough', 'cheats', 'tips', 'trailer', 'preview'
-        ]
-        
-        # 必须包含游戏关键词
-        has_game_keyword = any(keyword in text for keyword in game_keywords)
-        
-        # 最好包含可玩关键词
-        has_playable_keyword = any(keyword in text for keyword in playable_keywords)
-        
-        # 不能包含排除关键词
-        has_exclude_keyword = any(keyword in text for keyword in exclude_keywords)
-        
-        # 判断逻辑：有游戏关键词，没有排除关键词，最好有可玩关键词
-        return has_game_keyword and not has_exclude_keyword and (has_playable_keyword or 'itch.io' in text or 'gamejolt' in text)
+        return KEYWORD_RULES.classify_result(title, snippet)['related']
     
     def _clean_title(self, title: str) -> str:
         """清理游戏标题"""
@@ -1600,33 +4291,11 @@ class GameManager:
     
     def _categorize_game(self, title: str, snippet: str) -> str:
         """根据标题和摘要自动分类游戏"""
-        text = (title + ' ' + snippet).lower()
-        
-        if any(word in text for word in ['puzzle', 'brain', 'logic', 'match', '益智', '谜题']):
-            return '益智'
-        elif any(word in text for word in ['action', 'shoot', 'fight', 'run', '动作', '射击']):
-            return '动作'
-        elif any(word in text for word in ['card', 'poker', 'solitaire', '卡牌', '纸牌']):
-            return '卡牌'
-        elif any(word in text for word in ['sport', 'football', 'soccer', 'basketball', '体育', '足球']):
-            return '体育'
-        elif any(word in text for word in ['board', 'chess', 'checkers', '棋盘', '象棋']):
-            return '棋盘'
-        else:
-            return '休闲'
+        return KEYWORD_RULES.classify_result(title, snippet)['category']
     
     def _get_category_id(self, title: str, snippet: str) -> str:
         """获取分类ID"""
-        category = self._categorize_game(title, snippet)
-        category_map = {
-            '休闲': '1',
-            '益智': '2',
-            '动作': '3',
-            '卡牌': '4',
-            '体育': '5',
-            '棋盘': '6'
-        }
-        return category_map.get(category, '1')
+        return KEYWORD_RULES.classify_result(title, snippet)['categoryId']
     
     @retry(stop=stop_after_attempt(2), wait=wait_fixed(3))
     def _find_iframe_url(self, game_url: str) -> Optional[str]:
@@ -1635,50 +4304,23 @@ class GameManager:
             # 对于某些平台使用特殊的请求头
             special_headers = self._get_special_headers(game_url)
             response = self._make_request(game_url, headers=special_headers)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # 1. 优先查找明确的游戏iframe
-            game_iframes = soup.select('iframe[src*="game"], iframe[class*="game"], iframe[id*="game"]')
-            for iframe in game_iframes:
-                iframe_src = iframe.get('src')
-                if iframe_src and self._is_valid_game_iframe(iframe_src, game_url):
-                    return urljoin(game_url, iframe_src)
-            
-            # 2. 查找所有iframe，按可信度排序
-            all_iframes = soup.select('iframe[src]')
-            valid_iframes = []
-            
-            for iframe in all_iframes:
-                iframe_src = iframe.get('src')
-                if iframe_src:
-                    full_url = urljoin(game_url, iframe_src)
-                    if self._is_valid_game_iframe(iframe_src, game_url):
-                        # 计算可信度分数
-                        score = self._calculate_iframe_score(iframe, full_url)
-                        valid_iframes.append((full_url, score))
-            
-            # 按分数排序，返回最高分的
-            if valid_iframes:
-                valid_iframes.sort(key=lambda x: x[1], reverse=True)
-                return valid_iframes[0][0]
-            
-            # 3. 查找其他游戏嵌入方式
-            game_elements = soup.select(
-                '[data-game-url], [data-embed-url], [data-src*="game"], '
-                '[class*="embed"], [id*="embed"], [class*="player"], [id*="player"]'
-            )
+            soup = parse_html(response.text, parse_only=IFRAME_CANDIDATE_STRAINER)
             
-            for element in game_elements:
-                for attr in ['data-game-url', 'data-embed-url', 'data-src', 'src']:
-                    url = element.get(attr)
-                    if url and self._is_valid_game_iframe(url, game_url):
-                        return urljoin(game_url, url)
+            # 一次遍历收集所有候选，统一排序
+            candidates = self._collect_iframe_candidates(soup, game_url)
+            if not candidates:
+                return None
             
-            # 4. 特殊平台处理
-            return self._extract_platform_specific_url(soup, game_url)
+            best = min(candidates, key=lambda c: (c['tier'], -c['score'], c['order']))
+            logger.debug(f"🎯 iframe候选 {len(candidates)} 个，选中 [{best['source']}] "
+                         f"(得分: {best['score']}): {best['url']}")
+            return best['url']
             
         except Exception as e:
             logger.warning(f"查找iframe失败 {game_url}: {e}")
+            # 暂时性错误向上抛出，候选保持待处理状态，下次续爬时重试
+            if self._is_transient_error(e):
+                raise
             # 对于403错误，尝试基于URL模式推断iframe
             if "403" in str(e) or "Forbidden" in str(e):
                 return self._infer_iframe_from_url(game_url)
@@ -1690,16 +4332,15 @@ class GameManager:
             return False
         
         # 转换为完整URL
-        full_url = urljoin(base_url, iframe_src)
-        parsed = urlparse(full_url)
+        full_url = resolve_url(base_url, iframe_src)
+        parsed = parse_url(full_url)
         
         # 🚫 首先过滤明显无效的URL
         if not self._basic_url_validation(full_url, parsed):
             return False
         
         # 🥇 第一优先级：白名单域名（最可信）
-        is_whitelisted = any(domain in parsed.netloc or domain in full_url for domain in EMBEDDABLE_DOMAINS)
-        if is_whitelisted:
+        if full_url in EMBEDDABLE_MATCHER:
             logger.debug(f"✅ 白名单验证通过: {full_url}")
             return True
         
@@ -1722,150 +4363,23 @@ class GameManager:
         return is_valid
     
     def _basic_url_validation(self, full_url: str, parsed) -> bool:
-        """基础URL验证，过滤明显无效的URL"""
-        url_lower = full_url.lower()
-        
-        # 🚫 必须是HTTP/HTTPS协议
-        if parsed.scheme not in ['http', 'https']:
-            logger.debug(f"❌ 协议无效: {parsed.scheme}")
-            return False
-        
-        # 🚫 排除明显不是游戏的iframe
-        exclude_patterns = [
-            'ads', 'analytics', 'tracking', 'social', 'comment', 'chat',
-            'youtube', 'vimeo', 'twitter', 'facebook', 'instagram',
-            'discord', 'reddit', 'forum', 'feedback', 'survey',
-            'advertisement', 'banner', 'popup', 'cookie', 'gdpr',
-            'newsletter', 'signup', 'login', 'register', 'captcha',
-            'recaptcha', 'cloudflare', 'error', '404', '403'
-        ]
-        
-        for pattern in exclude_patterns:
-            if pattern in url_lower:
-                logger.debug(f"❌ 包含排除模式 '{pattern}': {full_url}")
-                return False
-        
-        # 🚫 排除可疑的顶级域名
-        suspicious_tlds = ['.tk', '.ml', '.ga', '.cf', '.click', '.download']
-        for tld in suspicious_tlds:
-            if parsed.netloc.endswith(tld):
-                logger.debug(f"❌ 可疑域名后缀 '{tld}': {parsed.netloc}")
-                return False
-        
-        # 🚫 检查URL长度合理性
-        if len(full_url) > 500:
-            logger.debug(f"❌ URL过长 ({len(full_url)} 字符): {full_url[:100]}...")
-            return False
-        
-        # 🚫 检查域名合理性
-        if len(parsed.netloc) > 80 or len(parsed.netloc) < 4:
-            logger.debug(f"❌ 域名长度异常: {parsed.netloc}")
+        """基础URL验证，过滤明显无效的URL（规则见 KEYWORD_RULES）"""
+        reason = KEYWORD_RULES.url_rejection(full_url, parsed)
+        if reason:
+            logger.debug(f"❌ {reason}")
             return False
-        
-        # 🚫 排除localhost和内网地址
-        localhost_patterns = ['localhost', '127.0.0.1', '192.168.', '10.0.', '172.16.']
-        for pattern in localhost_patterns:
-            if pattern in parsed.netloc:
-                logger.debug(f"❌ 本地/内网地址: {parsed.netloc}")
-                return False
-        
         return True
     
     def _calculate_game_url_score(self, full_url: str, parsed) -> int:
         """计算游戏URL的可信度评分（不依赖白名单）"""
-        score = 0
-        url_lower = full_url.lower()
-        domain = parsed.netloc.lower()
-        path = parsed.path.lower()
-        
-        # 🎯 游戏相关路径检测（高分）
-        game_paths = [
-            '/game/', '/games/', '/play/', '/embed/', '/player/', '/html5/',
-            '/swf/', '/flash/', '/unity/', '/webgl/', '/canvas/'
-        ]
-        
-        for pattern in game_paths:
-            if pattern in path:
-                score += 25
-                break  # 只加一次分
-        
-        # 🎯 游戏相关文件名检测
-        game_files = [
-            'game.html', 'index.html', 'main.html', 'play.html',
-            'game.js', 'main.js', 'app.js', 'bundle.js'
-        ]
-        
-        for filename in game_files:
-            if filename in path:
-                score += 20
-                break
-        
-        # 🎯 游戏相关域名特征
-        game_domain_keywords = [
-            'game', 'play', 'arcade', 'html5', 'flash', 'unity',
-            'embed', 'cdn', 'assets', 'static', 'media'
-        ]
-        
-        for keyword in game_domain_keywords:
-            if keyword in domain:
-                score += 15
-                break
-        
-        # 🎯 知名游戏CDN和托管服务检测
-        trusted_patterns = [
-            '.itch.zone', '.hwcdn.net', '.gamedistribution.com',
-            '.armorgames.com', '.kongregate.com', '.newgrounds.com',
-            '.crazygames.com', '.poki.com', '.y8.com',
-            'cloudfront.net', 'amazonaws.com', 'github.io'
-        ]
-        
-        for pattern in trusted_patterns:
-            if pattern in domain:
-                score += 30  # 高分，这些是可信的托管服务
-                break
-        
-        # 🎯 HTTPS协议加分
-        if parsed.scheme == 'https':
-            score += 10
-        
-        # 🎯 合理的端口（非常见端口减分）
-        if parsed.port and parsed.port not in [80, 443, 8080, 3000]:
-            score -= 10
-        
-        # 🎯 查询参数中的游戏标识
-        if parsed.query:
-            query_lower = parsed.query.lower()
-            if any(param in query_lower for param in ['game', 'play', 'embed', 'id=']):
-                score += 10
-        
-        # 🚫 可疑域名特征减分
-        suspicious_keywords = [
-            'redirect', 'proxy', 'mirror', 'fake', 'spam',
-            'ad', 'ads', 'banner', 'popup'
-        ]
-        
-        for keyword in suspicious_keywords:
-            if keyword in domain:
-                score -= 20
-        
-        # 🚫 过长的域名可能是可疑的
-        if len(domain) > 50:
-            score -= 15
-        
-        # 🚫 包含多个连续数字的域名（可能是临时域名）
-        import re
-        if re.search(r'\d{4,}', domain):
-            score -= 10
-        
-        return max(0, score)  # 确保分数不为负数
+        return KEYWORD_RULES.score_url(full_url, parsed)
     
     def _calculate_iframe_score(self, iframe_element, iframe_url: str) -> int:
         """计算iframe的可信度分数"""
         score = 0
         
         # URL域名权重
-        parsed = urlparse(iframe_url)
-        if any(domain in parsed.netloc for domain in EMBEDDABLE_DOMAINS):
+        if iframe_url in EMBEDDABLE_MATCHER:
             score += 100
         
         # iframe属性检查
@@ -1899,43 +4413,82 @@ class GameManager:
         
         return score
     
-    def _extract_platform_specific_url(self, soup, base_url: str) -> Optional[str]:
-        """特定平台的URL提取逻辑"""
-        parsed_base = urlparse(base_url)
-        
-        # itch.io 特殊处理
-        if 'itch.io' in parsed_base.netloc:
-            # 查找itch.io的游戏嵌入
-            play_buttons = soup.select('a[href*="html"], .button[href*="html"]')
-            for button in play_buttons:
-                href = button.get('href')
-                if href and 'html' in href:
-                    return urljoin(base_url, href)
-        
-        # GameJolt 特殊处理
-        elif 'gamejolt.com' in parsed_base.netloc:
-            # 查找GameJolt的游戏嵌入
-            game_frames = soup.select('[class*="game-embed"], [id*="game-embed"]')
-            for frame in game_frames:
-                src = frame.get('src') or frame.get('data-src')
-                if src:
-                    return urljoin(base_url, src)
-        
-        # Newgrounds 特殊处理
-        elif 'newgrounds.com' in parsed_base.netloc:
-            # 查找Newgrounds的游戏嵌入
-            embed_links = soup.select('a[href*="/portal/view/"]')
-            for link in embed_links:
-                href = link.get('href')
-                if href:
-                    return urljoin(base_url, href)
+    # iframe候选的优先级（数字越小越优先，同级按 _calculate_iframe_score 排序）
+    IFRAME_TIER_GAME_IFRAME = 1    # src/class/id 含 game 的iframe
+    IFRAME_TIER_IFRAME = 2         # 其他有效iframe
+    IFRAME_TIER_EMBED = 3          # data-game-url 等属性、embed/player 容器
+    IFRAME_TIER_PLATFORM = 4       # 平台特定规则（itch.io/GameJolt/Newgrounds）
+    
+    def _collect_iframe_candidates(self, soup, base_url: str) -> List[Dict[str, Any]]:
+        """单次遍历页面，收集所有可能的游戏嵌入URL及其优先级和得分"""
+        domain = parse_url(base_url).netloc
+        if 'itch.io' in domain:
+            platform = 'itch.io'
+        elif 'gamejolt.com' in domain:
+            platform = 'gamejolt'
+        elif 'newgrounds.com' in domain:
+            platform = 'newgrounds'
+        else:
+            platform = None
+        
+        candidates = []
+        
+        def add(element, url, tier, source):
+            full_url = resolve_url(base_url, url)
+            candidates.append({
+                'url': full_url,
+                'tier': tier,
+                'source': source,
+                'score': self._calculate_iframe_score(element, full_url),
+                'order': len(candidates)
+            })
         
-        return None
+        for element in soup.find_all(True):
+            css_class = element.get('class', [])
+            if isinstance(css_class, list):
+                css_class = ' '.join(css_class)
+            element_id = element.get('id', '')
+            
+            # 1/2. iframe：含 game 特征的优先，其余按得分
+            src = element.get('src')
+            if element.name == 'iframe' and src:
+                if self._is_valid_game_iframe(src, base_url):
+                    is_game_iframe = 'game' in src or 'game' in css_class or 'game' in element_id
+                    tier = self.IFRAME_TIER_GAME_IFRAME if is_game_iframe else self.IFRAME_TIER_IFRAME
+                    add(element, src, tier, 'iframe')
+            
+            # 3. 其他游戏嵌入方式
+            data_src = element.get('data-src') or ''
+            if (element.get('data-game-url') or element.get('data-embed-url') or 'game' in data_src
+                    or 'embed' in css_class or 'embed' in element_id
+                    or 'player' in css_class or 'player' in element_id):
+                for attr in ['data-game-url', 'data-embed-url', 'data-src', 'src']:
+                    url = element.get(attr)
+                    if url and self._is_valid_game_iframe(url, base_url):
+                        add(element, url, self.IFRAME_TIER_EMBED, attr)
+                        break
+            
+            # 4. 平台特定规则（不经过白名单验证）
+            if platform == 'itch.io':
+                href = element.get('href') or ''
+                if 'html' in href and (element.name == 'a' or 'button' in css_class.split()):
+                    add(element, href, self.IFRAME_TIER_PLATFORM, 'itch.io')
+            elif platform == 'gamejolt':
+                if 'game-embed' in css_class or 'game-embed' in element_id:
+                    url = element.get('src') or element.get('data-src')
+                    if url:
+                        add(element, url, self.IFRAME_TIER_PLATFORM, 'gamejolt')
+            elif platform == 'newgrounds':
+                href = element.get('href') or ''
+                if element.name == 'a' and '/portal/view/' in href:
+                    add(element, href, self.IFRAME_TIER_PLATFORM, 'newgrounds')
+        
+        return candidates
     
     def _get_special_headers(self, url: str) -> Dict[str, str]:
         """为特定网站返回特殊的请求头"""
         headers = get_random_headers()
-        parsed = urlparse(url)
+        parsed = parse_url(url)
         
         # GameJolt 特殊处理
         if 'gamejolt.com' in parsed.netloc:
@@ -1974,7 +4527,7 @@ class GameManager:
     
     def _infer_iframe_from_url(self, game_url: str) -> Optional[str]:
         """基于游戏页面URL推断可能的iframe URL"""
-        parsed = urlparse(game_url)
+        parsed = parse_url(game_url)
         
         try:
             # GameJolt URL模式推断
@@ -2013,9 +4566,9 @@ class GameManager:
     def _verify_iframe_playable(self, iframe_url: str) -> bool:
         """验证iframe URL是否真的可以加载游戏"""
         try:
-            # 发送HEAD请求检查URL是否可访问
+            # 发送HEAD请求检查URL是否可访问（不使用缓存，已下线的游戏要立即发现）
             special_headers = self._get_special_headers(iframe_url)
-            response = self._make_request(iframe_url, method='head', headers=special_headers)
+            response = self._make_request(iframe_url, method='head', cache=False, headers=special_headers)
             
             if response.status_code != 200:
                 logger.debug(f"iframe响应状态: {response.status_code} - {iframe_url}")
@@ -2040,23 +4593,40 @@ class GameManager:
             
             # 对于某些特定错误，我们仍然认为URL可能有效
             if any(pattern in error_msg for pattern in ['403', 'forbidden', 'timeout']):
-                # 如果是白名单域名，即使403也认为可能有效
-                parsed = urlparse(iframe_url)
-                if any(domain in parsed.netloc or domain in iframe_url for domain in EMBEDDABLE_DOMAINS):
+                # 如果是白名单域名，即使403/超时也认为可能有效
+                if iframe_url in EMBEDDABLE_MATCHER:
                     logger.info(f"白名单域名403错误，仍然接受: {iframe_url}")
                     return True
             
+            # 429/连接中断/超时等暂时性错误不能当作"不可玩"：向上抛出，候选保持待处理，下次重试
+            if self._is_transient_error(e):
+                raise
+            
             logger.debug(f"验证iframe失败: {e} - {iframe_url}")
             return False
 
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(description='游戏管理器 - 统一的游戏数据管理工具')
-    parser.add_argument('--action', choices=['clean', 'crawl', 'fix-thumbnails', 'all'], 
+    parser.add_argument('--action', choices=['clean', 'crawl', 'fix-thumbnails', 'encode-thumbnails', 'generate', 'all'], 
                        default='all', help='执行的操作')
     parser.add_argument('--max-games', type=int, default=Config.MAX_GAMES_DEFAULT, help='爬取的最大游戏数量')
     parser.add_argument('--use-proxy', action='store_true', help='启用代理模式（也可通过环境变量 USE_PROXY=true 配置）')
     parser.add_argument('--strict-whitelist', action='store_true', help='启用严格白名单模式，只接受预定义域名')
+    parser.add_argument('--engine', choices=['sync', 'async'], default=None,
+                       help='爬虫引擎：sync 逐个爬取，async 多平台并发（也可通过环境变量 CRAWL_ENGINE 配置）')
+    parser.add_argument('--resume', action='store_true', help='从上次中断的检查点继续爬取')
+    parser.add_argument('--full-rewrite', action='store_true', help='整体重写games.ts（默认只改写变化的游戏）')
+    parser.add_argument('--no-cache', action='store_true', help='禁用HTTP响应缓存，所有页面重新下载')
+    parser.add_argument('--thumbnail-workers', type=int, default=None, metavar='N',
+                        help='批量生成缩略图的进程数（默认CPU核数，1为单进程）')
+    parser.add_argument('--no-covers', action='store_true', help='不下载真实封面，新游戏使用生成的缩略图')
+    parser.add_argument('--force-encode', action='store_true',
+                        help='encode-thumbnails 时重新编码所有变体（默认跳过比原图新的变体）')
+    parser.add_argument('--list-backups', action='store_true', help='列出游戏数据的备份快照并退出')
+    parser.add_argument('--restore', metavar='ID', help='恢复到指定备份快照（支持ID前缀），并重新生成games.ts后退出')
+    parser.add_argument('--import-legacy-backups', action='store_true',
+                       help='把旧的 games.ts.backup.<时间戳> 文件导入备份仓库并删除')
     parser.add_argument('--show-config', action='store_true', help='显示当前配置并退出')
     
     args = parser.parse_args()
@@ -2069,6 +4639,24 @@ def main():
         Config.print_status()
         return
     
+    if args.list_backups or args.restore or args.import_legacy_backups:
+        backups = BackupStore()
+        if args.import_legacy_backups:
+            logger.info(f"🗄️ 导入了 {backups.import_legacy(GAMES_DATA_FILE)} 个旧备份文件")
+        if args.restore:
+            restored = backups.restore(args.restore, os.path.dirname(GAMES_JSON_FILE))
+            if restored:
+                # 让games.json和games.ts重新保持一致
+                manager = GameManager()
+                games = manager.read_games_ts() if restored == GAMES_DATA_FILE else manager.read_games_file()
+                manager.write_games_file(games)
+        if args.list_backups:
+            for entry in backups.list():
+                created = datetime.fromtimestamp(entry['created_at']).strftime('%Y-%m-%d %H:%M:%S')
+                print(f"  {entry['id']}  {created}  {entry.get('file', 'games.ts'):<10}  "
+                      f"{entry['size'] / 1024:.1f} KB → {entry['stored_size'] / 1024:.1f} KB")
+        return
+    
     manager = GameManager()
     
     if args.action == 'clean':
@@ -2079,11 +4667,11 @@ def main():
         
     elif args.action == 'crawl':
         logger.info(f"🕷️ 开始爬取新游戏（最多{args.max_games}个）...")
-        new_games = manager.crawl_new_games(args.max_games)
-        existing_games = manager.read_games_file()
-        all_games = existing_games + new_games
-        all_games = manager.remove_duplicates(all_games)
-        manager.write_games_file(all_games)
+        new_games = manager.crawl_new_games(args.max_games, resume=args.resume)
+        # 按目录索引精确去重，再做近似去重
+        all_games = manager.merge_new_games(manager.read_games_file(), new_games)
+        if manager.write_games_file(all_games):
+            manager.frontier.mark_written([game['id'] for game in new_games])
         
     elif args.action == 'fix-thumbnails':
         logger.info("🖼️ 开始修复游戏封面...")
@@ -2091,6 +4679,16 @@ def main():
         games = manager.fix_thumbnails(games)
         manager.write_games_file(games)
         
+    elif args.action == 'encode-thumbnails':
+        logger.info("🖼️ 开始批量编码缩略图变体...")
+        games = manager.read_games_file()
+        games = manager.encode_thumbnail_variants(games, force=args.force_encode)
+        manager.write_games_file(games)
+        
+    elif args.action == 'generate':
+        logger.info("📄 根据games.json重新生成games.ts...")
+        manager.write_games_file(manager.read_games_file())
+        
     elif args.action == 'all':
         logger.info("🔄 开始全面管理...")
         # 1. 清理现有数据
@@ -2101,15 +4699,15 @@ def main():
         games = manager.fix_thumbnails(games)
         
         # 3. 爬取新游戏
-        new_games = manager.crawl_new_games(args.max_games)
-        all_games = games + new_games
-        all_games = manager.remove_duplicates(all_games)
+        new_games = manager.crawl_new_games(args.max_games, resume=args.resume)
+        all_games = manager.merge_new_games(games, new_games)
         
         # 4. 再次修复缩略图
         all_games = manager.fix_thumbnails(all_games)
         
         # 5. 保存结果
-        manager.write_games_file(all_games)
+        if manager.write_games_file(all_games):
+            manager.frontier.mark_written([game['id'] for game in new_games])
     
     logger.info("✅ 游戏管理器执行完成！")
 
@@ -7,18 +7,50 @@ interface GameCardProps {
   featured?: boolean;
 }
 
+// 与 GameGrid 的列数对应：手机1列，sm 2列，md 3列，lg 4列
+const THUMBNAIL_SIZES = '(min-width: 1024px) 25vw, (min-width: 768px) 33vw, (min-width: 640px) 50vw, 100vw';
+
+function GameThumbnail({ game }: { game: Game }) {
+  const variants = game.thumbnailVariants;
+  if (!variants) {
+    return (
+      <Image
+        src={game.thumbnail}
+        alt={game.title}
+        className="game-thumbnail"
+        width={400}
+        height={225}
+      />
+    );
+  }
+
+  // 浏览器按顺序选择第一个支持的格式，再按 sizes 选择尺寸
+  return (
+    <picture>
+      {variants.avif && <source type="image/avif" srcSet={variants.avif} sizes={THUMBNAIL_SIZES} />}
+      {variants.webp && <source type="image/webp" srcSet={variants.webp} sizes={THUMBNAIL_SIZES} />}
+      {/* eslint-disable-next-line @next/next/no-img-element */}
+      <img
+        src={game.thumbnail}
+        srcSet={variants.jpeg}
+        sizes={THUMBNAIL_SIZES}
+        alt={game.title}
+        className="game-thumbnail"
+        width={400}
+        height={225}
+        loading="lazy"
+        decoding="async"
+      />
+    </picture>
+  );
+}
+
 export default function GameCard({ game, featured = false }: GameCardProps) {
   return (
     <Link href={game.path} className="game-card group">
       <div className="relative">
         <div className="aspect-video bg-gray-200 relative">
-          <Image
-            src={game.thumbnail}
-            alt={game.title}
-            className="game-thumbnail"
-            width={400}
-            height={225}
-          />
+          <GameThumbnail game={game} />
         </div>
         {featured && (
           <div className="absolute top-2 right-2 bg-yellow-400 text-yellow-900 px-2 py-1 rounded text-xs font-bold">
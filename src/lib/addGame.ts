@@ -1,8 +1,94 @@
 import { Game } from '@/types';
-import { games, categories } from '@/data/games';
+import { categories } from '@/data/games';
 import fs from 'fs';
 import path from 'path';
 
+const GAMES_JSON_PATH = path.join(process.cwd(), 'src/data/games.json');
+const GAMES_TS_PATH = path.join(process.cwd(), 'src/data/games.ts');
+
+/**
+ * 先写临时文件再重命名，避免中断时留下写了一半的文件
+ */
+function writeFileAtomic(filePath: string, content: string): void {
+  const tmpPath = `${filePath}.tmp`;
+  fs.writeFileSync(tmpPath, content, 'utf8');
+  fs.renameSync(tmpPath, filePath);
+}
+
+/**
+ * 生成games.ts中的游戏对象代码，字符串通过JSON.stringify转义
+ */
+function renderGameObject(game: Game): string {
+  const q = (value: string | undefined) => JSON.stringify(value ?? '');
+  const typeField = game.type === 'iframe'
+    ? `iframeUrl: ${q(game.iframeUrl)}`
+    : `staticPath: ${q(game.staticPath)}`;
+  const variantsField = game.thumbnailVariants
+    ? `\n    thumbnailVariants: {\n${Object.entries(game.thumbnailVariants)
+        .map(([format, srcset]) => `      ${format}: ${q(srcset)}`)
+        .join(',\n')}\n    },`
+    : '';
+  return `  {
+    id: ${q(game.id)},
+    title: ${q(game.title)},
+    description: ${q(game.description)},
+    category: ${q(game.category)},
+    categoryId: ${q(game.categoryId)},
+    thumbnail: ${q(game.thumbnail)},${variantsField}
+    path: ${q(game.path)},
+    featured: ${game.featured || false},
+    type: ${q(game.type)},
+    ${typeField},
+    addedAt: ${q(game.addedAt)},
+    tags: [${(game.tags || []).map(tag => q(tag)).join(', ')}]
+  },`;
+}
+
+/**
+ * 从数组 '[' 之后的 start 开始，返回与之匹配的 ']' 的位置，找不到返回-1
+ * 跳过字符串和注释，标题、描述中出现的 '];' 或括号不会被当成数组结尾
+ */
+function findArrayEnd(content: string, start: number): number {
+  let depth = 0;
+  for (let i = start; i < content.length; i++) {
+    const char = content[i];
+    if (char === '"' || char === "'" || char === '`') {
+      for (i++; i < content.length && content[i] !== char; i++) {
+        if (content[i] === '\\') i++;
+      }
+    } else if (char === '/' && content[i + 1] === '/') {
+      const lineEnd = content.indexOf('\n', i);
+      i = lineEnd === -1 ? content.length : lineEnd;
+    } else if (char === '/' && content[i + 1] === '*') {
+      const commentEnd = content.indexOf('*/', i + 2);
+      i = commentEnd === -1 ? content.length : commentEnd + 1;
+    } else if (char === '[' || char === '{') {
+      depth++;
+    } else if (char === ']' || char === '}') {
+      if (depth === 0) return char === ']' ? i : -1;
+      depth--;
+    }
+  }
+  return -1;
+}
+
+/**
+ * 按游戏列表重新统计categories中每个分类的count
+ */
+function updateCategoryCounts(content: string, games: Game[]): string {
+  const counts = new Map<string, number>();
+  for (const g of games) {
+    counts.set(g.categoryId, (counts.get(g.categoryId) ?? 0) + 1);
+  }
+  return content.replace(
+    /export const categories: Category\[\] = \[[\s\S]*?\];/,
+    (block: string) => block.replace(/\{[^}]+\}/g, (category: string) => {
+      const id = category.match(/id:\s*['"](\d+)['"]/);
+      return id ? category.replace(/count:\s*\d+/, `count: ${counts.get(id[1]) ?? 0}`) : category;
+    })
+  );
+}
+
 /**
  * 添加新游戏到数据库
  * @param game 新游戏数据
@@ -35,6 +121,9 @@ export async function addGame(game: Omit<Game, 'id' | 'path' | 'addedAt'>): Prom
       return { success: false, message: 'static类型的游戏必须提供staticPath' };
     }
     
+    // 读取规范数据（games.json），games.ts由它生成
+    const games: Game[] = JSON.parse(fs.readFileSync(GAMES_JSON_PATH, 'utf8'));
+    
     // 生成新ID
     const newId = (Math.max(...games.map(g => parseInt(g.id)), 0) + 1).toString();
     
@@ -49,42 +138,27 @@ export async function addGame(game: Omit<Game, 'id' | 'path' | 'addedAt'>): Prom
       ...game
     };
     
-    // 读取当前数据
-    const gamesFilePath = path.join(process.cwd(), 'src/data/games.ts');
-    const content = fs.readFileSync(gamesFilePath, 'utf8');
+    games.push(newGame);
     
-    // 解析现有数组
-    const gamesArrayStart = content.indexOf('export const games: Game[] = [');
-    const gamesArrayEnd = content.indexOf('];', gamesArrayStart);
+    // 按更新后的完整列表重新生成games.ts中的games数组和分类计数
+    const content = updateCategoryCounts(fs.readFileSync(GAMES_TS_PATH, 'utf8'), games);
+    const marker = 'export const games: Game[] = [';
+    const markerIndex = content.indexOf(marker);
+    const gamesArrayStart = markerIndex === -1 ? -1 : markerIndex + marker.length;
+    const gamesArrayEnd = gamesArrayStart === -1 ? -1 : findArrayEnd(content, gamesArrayStart);
     
-    if (gamesArrayStart === -1 || gamesArrayEnd === -1) {
+    if (gamesArrayEnd === -1) {
       return { success: false, message: '无法在文件中找到游戏数组' };
     }
     
-    // 添加新游戏到数组
-    const gameString = `  {
-    id: '${newGame.id}',
-    title: '${newGame.title}',
-    description: '${newGame.description || ''}',
-    category: '${newGame.category}',
-    categoryId: '${newGame.categoryId}',
-    thumbnail: '${newGame.thumbnail}',
-    path: '${newGame.path}',
-    featured: ${newGame.featured || false},
-    type: '${newGame.type}',
-    ${newGame.type === 'iframe' ? `iframeUrl: '${newGame.iframeUrl}'` : `staticPath: '${newGame.staticPath}'`},
-    addedAt: '${newGame.addedAt}',
-    tags: [${newGame.tags ? newGame.tags.map(tag => `'${tag}'`).join(', ') : ''}]
-  },`;
-    
-    // 插入新游戏
-    const updatedContent = 
-      content.substring(0, gamesArrayEnd) + 
-      '\n' + gameString + 
+    const updatedContent =
+      content.substring(0, gamesArrayStart) + '\n' +
+      games.map(renderGameObject).join('\n') + '\n' +
       content.substring(gamesArrayEnd);
     
-    // 写入文件
-    fs.writeFileSync(gamesFilePath, updatedContent, 'utf8');
+    // 先写games.json，再写games.ts
+    writeFileAtomic(GAMES_JSON_PATH, JSON.stringify(games, null, 2) + '\n');
+    writeFileAtomic(GAMES_TS_PATH, updatedContent);
     
     return { 
       success: true, 
@@ -1,3 +1,5 @@
+export type ThumbnailFormat = 'avif' | 'webp' | 'jpeg';
+
 export interface Game {
   id: string;
   title: string;
@@ -5,6 +7,8 @@ export interface Game {
   category: string;
   categoryId: string;
   thumbnail: string;
+  /** 各格式的响应式缩略图 srcset，例如 "/games/thumbnails/x-160w.webp 160w, /games/thumbnails/x-320w.webp 320w" */
+  thumbnailVariants?: Partial<Record<ThumbnailFormat, string>>;
   path: string;
   featured?: boolean;
   type: 'iframe' | 'static';